@@ -0,0 +1,133 @@
+"""Cold-start benchmark for the dashboard.
+
+Every measurement runs in a fresh interpreter so nothing is already imported:
+
+- ``import_<name>``: time to import one section (and everything it pulls in)
+- ``import_legacy_stack``: the modules the single-file dashboard imported at
+  the top before sections were loaded lazily (incl. geopandas/contextily)
+- ``first_paint``: running dashboard.py with nothing selected in the sidebar
+- ``first_paint_eager``: the same, after importing the legacy stack and every
+  section up front, i.e. what a cold start cost before
+- ``first_paint_cached``: ``first_paint`` with the home figure already in
+  ``DASHBOARD_FIGURE_CACHE_DIR``, so Matplotlib and Seaborn are not imported
+
+A measurement that fails (e.g. geopandas is not installed) is reported with
+its error instead of timings.
+
+Usage (from the repository root)::
+
+    python benchmarks/cold_start.py --repeat 3 --output cold_start.json
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+DASHBOARD_DIR = ROOT / "dashboard"
+
+LEGACY_IMPORTS = [
+    "pandas", "matplotlib.pyplot", "seaborn", "streamlit",
+    "geopandas", "shapely.geometry", "contextily",
+]
+
+sys.path.insert(0, str(DASHBOARD_DIR))
+
+import sections  # noqa: E402
+
+# The registry only imports the sections when they are loaded
+SECTIONS = ["sections.home", *sections.SECTIONS.values()]
+
+_PRELUDE = f"""
+import importlib, json, sys, time, warnings
+warnings.filterwarnings("ignore")
+sys.path.insert(0, {str(DASHBOARD_DIR)!r})
+"""
+
+_IMPORT = _PRELUDE + """
+start = time.perf_counter()
+for module in {modules!r}:
+    importlib.import_module(module)
+print(json.dumps(time.perf_counter() - start))
+"""
+
+_FIRST_PAINT = _PRELUDE + """
+start = time.perf_counter()
+for module in {modules!r}:
+    importlib.import_module(module)
+from streamlit.testing.v1 import AppTest
+app = AppTest.from_file({script!r}, default_timeout=300)
+app.run()
+if app.exception:
+    raise SystemExit(str(app.exception))
+print(json.dumps(time.perf_counter() - start))
+"""
+
+
+class _Failed(Exception):
+    pass
+
+
+def _run(code, env=None):
+    result = subprocess.run(
+        [sys.executable, "-c", code], cwd=ROOT, capture_output=True, text=True, env=env
+    )
+    if result.returncode != 0:
+        lines = result.stderr.strip().splitlines()
+        raise _Failed(lines[-1] if lines else f"exit status {result.returncode}")
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def _measure(code, repeat, env=None):
+    try:
+        samples = [_run(code, env) for _ in range(repeat)]
+    except _Failed as error:
+        return {"error": str(error)}
+    return {"median_s": statistics.median(samples), "samples_s": samples}
+
+
+def run(repeat=3):
+    results = {}
+    for module in SECTIONS:
+        name = module.split(".")[-1]
+        results[f"import_{name}"] = _measure(_IMPORT.format(modules=[module]), repeat)
+    results["import_legacy_stack"] = _measure(_IMPORT.format(modules=LEGACY_IMPORTS), repeat)
+
+    script = str(DASHBOARD_DIR / "dashboard.py")
+    results["first_paint"] = _measure(_FIRST_PAINT.format(modules=[], script=script), repeat)
+    results["first_paint_eager"] = _measure(
+        _FIRST_PAINT.format(modules=LEGACY_IMPORTS + SECTIONS, script=script), repeat
+    )
+    with tempfile.TemporaryDirectory() as cache_dir:
+        env = {**os.environ, "DASHBOARD_FIGURE_CACHE_DIR": cache_dir}
+        # The first run fills the figure cache
+        code = _FIRST_PAINT.format(modules=[], script=script)
+        results["first_paint_cached"] = _measure(code, 1, env)
+        if "error" not in results["first_paint_cached"]:
+            results["first_paint_cached"] = _measure(code, repeat, env)
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=3, help="fresh processes per measurement")
+    parser.add_argument("--output", help="write the JSON results here instead of stdout")
+    args = parser.parse_args(argv)
+
+    results = run(args.repeat)
+    for name, result in results.items():
+        if "error" in result:
+            print(f"[failed] {name}: {result['error']}", file=sys.stderr)
+    report = json.dumps(results, indent=2)
+    if args.output:
+        Path(args.output).write_text(report + "\n")
+    else:
+        print(report)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,130 @@
+"""Memory benchmark of concurrent dashboard sessions.
+
+``--workers`` server processes each hold ``--sessions`` simulated sessions
+that reference every dataset the dashboard reads, in three modes:
+
+- ``session_copy``: every session holds its own deep copy of each frame, as
+  when each script run read the CSVs itself
+- ``process_heap``: sessions share one copy per process on the heap
+  (``DASHBOARD_SHARED_MMAP=0``)
+- ``shared_mmap``: sessions share zero-copy views of the memory-mapped
+  Feather files, which the processes of the host share in the page cache
+
+With every worker alive, each reports RSS, PSS (shared pages divided among
+the processes mapping them) and private memory from /proc/self/smaps_rollup
+(Linux only). ``data_pss_mb`` is the PSS above a worker that loaded nothing,
+summed over the workers: the memory the data costs the host.
+
+Usage (from the repository root)::
+
+    python benchmarks/memory_bench.py --workers 4 --sessions 1 10 50 --output memory.json
+    python benchmarks/memory_bench.py --data-dir /path/to/built/artifacts
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+DASHBOARD_DIR = ROOT / "dashboard"
+
+MODES = ["session_copy", "process_heap", "shared_mmap"]
+
+_WORKER = """
+import json, sys, warnings
+warnings.filterwarnings("ignore")
+sys.path.insert(0, {dashboard!r})
+from pathlib import Path
+import pyarrow.feather  # imported in every mode and in the baseline
+import data_loader
+data_loader.DATA_DIR = Path({data_dir!r})
+
+def memory():
+    fields = dict(line.split(":", 1) for line in open("/proc/self/smaps_rollup").read().splitlines()[1:])
+    kb = {{key: int(value.split()[0]) for key, value in fields.items()}}
+    return {{"rss_mb": kb["Rss"] / 1024, "pss_mb": kb["Pss"] / 1024,
+             "private_mb": (kb["Private_Clean"] + kb["Private_Dirty"]) / 1024}}
+
+names = [name for name in data_loader.DATASETS if data_loader.csv_path(name).exists()]
+sessions = []
+for _ in range({sessions}):
+    frames = {{name: data_loader.load(name) for name in names}}
+    if {copy}:
+        frames = {{name: frame.copy(deep=True) for name, frame in frames.items()}}
+    # Touch every column, as rendering the sections would
+    for frame in frames.values():
+        for column in frame.columns:
+            frame[column].to_numpy()
+    sessions.append(frames)
+print(json.dumps(len(names)), flush=True)
+sys.stdin.readline()
+print(json.dumps(memory()), flush=True)
+sys.stdin.readline()
+"""
+
+
+def _start(mode, sessions, data_dir):
+    code = _WORKER.format(
+        dashboard=str(DASHBOARD_DIR), data_dir=str(data_dir), sessions=sessions, copy=mode == "session_copy"
+    )
+    env = dict(os.environ, DASHBOARD_SHARED_MMAP="1" if mode == "shared_mmap" else "0", DASHBOARD_WARM_UP="0")
+    return subprocess.Popen(
+        [sys.executable, "-c", code], cwd=ROOT, env=env, text=True,
+        stdin=subprocess.PIPE, stdout=subprocess.PIPE,
+    )
+
+
+def measure(mode, workers, sessions, data_dir):
+    """Memory of ``workers`` processes holding ``sessions`` sessions each, measured while all are alive."""
+    processes = [_start(mode, sessions, data_dir) for _ in range(workers)]
+    try:
+        datasets = [json.loads(process.stdout.readline()) for process in processes]
+        for process in processes:
+            process.stdin.write("\n")
+            process.stdin.flush()
+        results = [json.loads(process.stdout.readline()) for process in processes]
+    finally:
+        for process in processes:
+            process.communicate("\n")
+    return {
+        "datasets": datasets[0],
+        "rss_mb": sum(result["rss_mb"] for result in results),
+        "pss_mb": sum(result["pss_mb"] for result in results),
+        "private_mb": sum(result["private_mb"] for result in results),
+    }
+
+
+def run(workers=4, session_counts=(1, 10), data_dir=DASHBOARD_DIR, log=print):
+    # Build the Feather copies once, outside the measurements
+    measure("shared_mmap", 1, 1, data_dir)
+    baseline = measure("shared_mmap", workers, 0, data_dir)
+    log(f"baseline {workers} workers: {baseline['pss_mb']:.1f} MB PSS")
+
+    results = {"workers": workers, "baseline": baseline, "modes": {}}
+    for mode in MODES:
+        for sessions in session_counts:
+            result = measure(mode, workers, sessions, data_dir)
+            result["data_pss_mb"] = result["pss_mb"] - baseline["pss_mb"]
+            results["modes"].setdefault(mode, {})[str(sessions)] = result
+            log(f"{mode} {workers}x{sessions} sessions: {result['data_pss_mb']:.1f} MB data PSS, "
+                f"{result['rss_mb']:.1f} MB RSS")
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--workers", type=int, default=4, help="server processes")
+    parser.add_argument("--sessions", type=int, nargs="+", default=[1, 10], help="sessions per process")
+    parser.add_argument("--data-dir", default=str(DASHBOARD_DIR), help="directory with the dashboard CSVs")
+    parser.add_argument("--output", help="write the JSON results here")
+    args = parser.parse_args(argv)
+
+    results = run(args.workers, args.sessions, Path(args.data_dir))
+    if args.output:
+        Path(args.output).write_text(json.dumps(results, indent=2) + "\n")
+
+
+if __name__ == "__main__":
+    main()
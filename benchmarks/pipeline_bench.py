@@ -0,0 +1,244 @@
+"""Time and memory benchmark of the data pipeline and chart rendering.
+
+For every scale factor a synthetic Olist-shaped dataset is generated (see
+``synthetic.py``, cached under ``--work-dir``) and each step is measured in
+this process:
+
+- ``load:<table>``: reading one raw CSV with its declared dtypes
+- ``geo`` / ``geo_grid``: geocoding customers and sellers through the zip
+  index, and the customer / seller grid cells
+- ``order_per_city``: the customers + orders count per city
+- ``order_details``: the orders + reviews + items join
+- ``score_per_product`` / ``score_per_store``: the per-key review aggregation
+  (``scores``, read in chunks, with ``DASHBOARD_STREAMING=1``)
+- ``product_detail``: the detailed / non-detailed product split
+- ``sales_cube``: the Sales Explorer cube
+- ``seller_distances``: the seller-customer distance bands and city distances
+- ``review_sketches``: the review score quantile and distinct-count sketches
+- ``render:<figure>``: drawing one dashboard figure to PNG from the stage
+  outputs above (bypassing the cache)
+
+Every step is timed ``--repeat`` times (median wall time is reported), then
+run once more under tracemalloc for its peak Python-heap allocation, which
+includes numpy and pandas buffers. The JSON report can be compared between
+commits with the ``compare`` command.
+
+Usage (from the repository root)::
+
+    python benchmarks/pipeline_bench.py run --scale 1 10 100 --output bench.json
+    python benchmarks/pipeline_bench.py compare before.json after.json
+"""
+import argparse
+import json
+import platform
+import statistics
+import subprocess
+import sys
+import time
+import tracemalloc
+import warnings
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+DASHBOARD_DIR = ROOT / "dashboard"
+sys.path.insert(0, str(DASHBOARD_DIR))
+sys.path.insert(0, str(ROOT / "benchmarks"))
+
+import matplotlib  # noqa: E402
+
+matplotlib.use("Agg")
+# seaborn's palette-without-hue deprecation fires on every bar chart
+warnings.filterwarnings("ignore", category=FutureWarning)
+
+import pandas as pd  # noqa: E402
+
+import synthetic  # noqa: E402
+from pipeline.build import topological_order  # noqa: E402
+from pipeline.raw import RAW_TABLES, raw_path, read_raw  # noqa: E402
+from pipeline.stages import STAGES  # noqa: E402
+
+DEFAULT_SCALES = [1, 10, 100]
+DEFAULT_WORK_DIR = ROOT / "benchmarks" / ".data"
+
+# Every stage, in dependency order; the geolocation table stops growing at
+# scale 1, but the geo stages also read the customers, sellers and items
+BENCH_STAGES = topological_order()
+
+
+def _measure(func, repeat):
+    """Median wall time over ``repeat`` calls, then one traced call for peak bytes."""
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        samples.append(time.perf_counter() - start)
+        del result
+
+    tracemalloc.start()
+    try:
+        result = func()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return result, {"median_s": statistics.median(samples), "samples_s": samples, "peak_bytes": peak}
+
+
+def _figures(outputs):
+    """Dashboard figures as (name, draw, args), drawn from the stage outputs.
+
+    The inputs are computed the same way the sections do.
+    """
+    import charts
+    import geo_charts
+    import geo_grid
+    import sketches
+
+    review_sketches = sketches.read(outputs["review_sketches"])
+    order_per_city = outputs["order_per_city"]
+
+    # The Geographics maps, over blank tiles when none are stored
+    customers_geo_grid = outputs["customers_geo_grid"]
+    top_cities_cells, resolution = geo_grid.select_cells(
+        customers_geo_grid[customers_geo_grid["customer_city"].isin(order_per_city.head(20)["customer_city"])],
+        weight="customer_count",
+    )
+    top_sellers = outputs["sellers_geo_count"].head(20)[["geolocation_lat", "geolocation_lng"]]
+    return [
+        ("home_fig", charts.home_fig, (order_per_city.head(5), ["#72BCD4"] + ["#D3D3D3"] * 4)),
+        ("good_bad_product_sales_fig", charts.good_bad_product_sales_fig, (
+            sketches.bucket_sales("score_per_product", "good_bad", review_sketches).loc[["Good Review", "Bad Review"]],
+        )),
+        ("each_product_sales_fig", charts.each_review_sales_fig, (
+            sketches.bucket_sales("score_per_product", "star_bands", review_sketches), "Product Review", "Product",
+        )),
+        ("each_store_sales_fig", charts.each_review_sales_fig, (
+            sketches.bucket_sales("score_per_store", "star_bands", review_sketches), "Store Review", "Store",
+        )),
+        ("detail_to_review_fig", charts.detail_to_review_fig, (
+            sketches.box_stats("detailed_product_review", sketches=review_sketches),
+            sketches.box_stats("non_detailed_product_review", sketches=review_sketches),
+        )),
+        ("detail_to_sales_fig", charts.detail_to_sales_fig, (
+            outputs["detailed_product_sales"]["order_id"].mean(),
+            outputs["non_detailed_product_sales"]["order_id"].mean(),
+        )),
+        ("top_cities_map_fig", geo_charts.grid_map_fig, (
+            top_cities_cells, resolution, "customer_count", "Geolocation of Top 20 Orders",
+        )),
+        ("top_sellers_map_fig", geo_charts.points_map_fig, (top_sellers, "Geolocation of Top 20 Sellers", 20)),
+        ("distance_bands_fig", charts.distance_bands_fig, (outputs["distance_bands"],)),
+    ]
+
+
+def bench_scale(scale, work_dir, repeat=1, seed=0, log=print):
+    raw_dir = Path(work_dir) / f"scale_{scale:g}"
+    results = {}
+    if not (raw_dir / RAW_TABLES["orders"][0]).exists():
+        start = time.perf_counter()
+        rows = synthetic.generate(raw_dir, scale, seed)
+        log(f"[scale {scale:g}] generated {rows} in {time.perf_counter() - start:.1f}s")
+
+    tables = {}
+    needed = sorted({table for name in BENCH_STAGES for table in STAGES[name]["raw"]})
+    for table in needed:
+        tables[table], results[f"load:{table}"] = _measure(lambda: read_raw(table, raw_dir), repeat)
+        results[f"load:{table}"]["rows"] = len(tables[table])
+        log(f"[scale {scale:g}] load:{table} {results[f'load:{table}']['median_s']:.2f}s")
+
+    outputs = {}
+    for name in BENCH_STAGES:
+        stage = STAGES[name]
+        if stage.get("stream"):
+            inputs = {table: raw_path(table, raw_dir) for table in stage["raw"]}
+        else:
+            inputs = {table: tables[table] for table in stage["raw"]}
+        for dep in stage["deps"]:
+            inputs.update({output: outputs[output] for output in STAGES[dep]["outputs"]})
+        produced, results[name] = _measure(lambda: stage["func"](inputs), repeat)
+        results[name]["rows"] = {output: len(produced[output]) for output in stage["outputs"]}
+        outputs.update(produced)
+        log(f"[scale {scale:g}] {name} {results[name]['median_s']:.2f}s")
+
+    import figure_cache
+
+    for name, draw, args in _figures(outputs):
+        _, results[f"render:{name}"] = _measure(lambda: figure_cache.figure_to_png(draw(*args)), repeat)
+        log(f"[scale {scale:g}] render:{name} {results[f'render:{name}']['median_s']:.2f}s")
+    return results
+
+
+def _git_commit():
+    result = subprocess.run(["git", "rev-parse", "HEAD"], cwd=ROOT, capture_output=True, text=True)
+    return result.stdout.strip() or None
+
+
+def run(scales=DEFAULT_SCALES, work_dir=DEFAULT_WORK_DIR, repeat=1, seed=0, log=print):
+    return {
+        "meta": {
+            "commit": _git_commit(),
+            "python": platform.python_version(),
+            "pandas": pd.__version__,
+            "machine": platform.machine(),
+            "repeat": repeat,
+            "seed": seed,
+        },
+        "scales": {f"{scale:g}": bench_scale(scale, work_dir, repeat, seed, log) for scale in scales},
+    }
+
+
+def compare(before, after, threshold=1.2):
+    """Rows of (scale, step, metric, before, after, ratio), flagging ratios above ``threshold``."""
+    rows = []
+    for scale, steps in after["scales"].items():
+        for step, result in steps.items():
+            previous = before["scales"].get(scale, {}).get(step)
+            if previous is None:
+                continue
+            for metric in ("median_s", "peak_bytes"):
+                ratio = result[metric] / previous[metric] if previous[metric] else float("nan")
+                rows.append({
+                    "scale": scale,
+                    "step": step,
+                    "metric": metric,
+                    "before": previous[metric],
+                    "after": result[metric],
+                    "ratio": round(ratio, 3),
+                    "regression": ratio > threshold,
+                })
+    return pd.DataFrame(rows)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = commands.add_parser("run", help="run the benchmark")
+    run_parser.add_argument("--scale", type=float, nargs="+", default=DEFAULT_SCALES, help="scale factors")
+    run_parser.add_argument("--repeat", type=int, default=1, help="timed runs per step")
+    run_parser.add_argument("--seed", type=int, default=0)
+    run_parser.add_argument("--work-dir", default=DEFAULT_WORK_DIR, help="where the synthetic data is kept")
+    run_parser.add_argument("--output", help="write the JSON results here instead of stdout")
+
+    compare_parser = commands.add_parser("compare", help="compare two JSON results")
+    compare_parser.add_argument("before")
+    compare_parser.add_argument("after")
+    compare_parser.add_argument("--threshold", type=float, default=1.2, help="ratio that counts as a regression")
+
+    args = parser.parse_args(argv)
+    if args.command == "compare":
+        report = compare(json.loads(Path(args.before).read_text()), json.loads(Path(args.after).read_text()),
+                         args.threshold)
+        print(report.to_string(index=False))
+        # Non-zero exit so CI can fail on a regression
+        sys.exit(1 if report["regression"].any() else 0)
+
+    log = (lambda message: print(message, file=sys.stderr)) if not args.output else print
+    report = json.dumps(run(args.scale, args.work_dir, args.repeat, args.seed, log), indent=2)
+    if args.output:
+        Path(args.output).write_text(report + "\n")
+    else:
+        print(report)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,204 @@
+"""Synthetic tables shaped like the Olist "E-Commerce Public Dataset".
+
+``generate(out_dir, scale)`` writes every raw table the pipeline reads, under
+the same file names and columns, with row counts proportional to the real
+dataset (scale 1 ~ 99k orders). The geolocation table, zip prefixes and cities
+describe Brazil rather than business volume, so they grow with the scale only
+up to their scale 1 size (1M geolocation rows). Distributions follow the
+real data closely enough for performance work: a few cities dominate, most
+orders have one item and one review, review scores are skewed to 5 and about
+2% of the products miss some detail.
+
+    python benchmarks/synthetic.py --scale 10 --out /tmp/olist_x10
+"""
+import argparse
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT / "dashboard"))
+
+from pipeline.raw import RAW_TABLES  # noqa: E402
+
+# Row counts of the real dataset (scale 1)
+BASE_ROWS = {
+    "customers": 99_441,
+    "orders": 99_441,
+    "products": 32_951,
+    "sellers": 3_095,
+    "geolocation": 1_000_163,
+    "zip_prefixes": 19_015,
+    "cities": 4_119,
+}
+GEOGRAPHY = ["geolocation", "zip_prefixes", "cities"]
+
+REVIEW_SCORES = [1, 2, 3, 4, 5]
+REVIEW_SCORE_WEIGHTS = [0.115, 0.032, 0.082, 0.193, 0.578]
+ITEMS_PER_ORDER_WEIGHTS = [0.90, 0.076, 0.013, 0.006, 0.005]
+CATEGORIES = [
+    "cama_mesa_banho", "beleza_saude", "esporte_lazer", "moveis_decoracao", "informatica_acessorios",
+    "utilidades_domesticas", "relogios_presentes", "telefonia", "ferramentas_jardim", "automotivo",
+]
+STATES = ["SP", "RJ", "MG", "RS", "PR", "SC", "BA", "DF", "ES", "GO", "PE", "CE"]
+
+# Rough lat/lng box of populated Brazil
+LAT_RANGE = (-30.0, -3.0)
+LNG_RANGE = (-55.0, -35.0)
+
+
+def hex_ids(rng, n):
+    """``n`` random 32-character hex ids (like the Olist md5 keys)."""
+    text = rng.bytes(16 * n).hex()
+    return np.array([text[i:i + 32] for i in range(0, 32 * n, 32)], dtype=object)
+
+
+def zipf_choice(rng, n_values, size, exponent=1.1):
+    """Indices in [0, n_values) drawn with a Zipf-like skew (index 0 most common)."""
+    weights = 1.0 / np.arange(1, n_values + 1) ** exponent
+    return rng.choice(n_values, size=size, p=weights / weights.sum())
+
+
+def _timestamps(rng, size, start="2016-09-01", days=730):
+    offsets = rng.integers(0, days * 86_400, size=size)
+    return (pd.Timestamp(start) + pd.to_timedelta(offsets, unit="s")).strftime("%Y-%m-%d %H:%M:%S")
+
+
+def generate_tables(scale=1.0, seed=0):
+    rng = np.random.default_rng(seed)
+    rows = {name: max(int(count * scale), 1) for name, count in BASE_ROWS.items()}
+    # Geography is bounded by the country, not by volume
+    for name in GEOGRAPHY:
+        rows[name] = min(rows[name], BASE_ROWS[name])
+
+    cities = np.array(["sao paulo", "rio de janeiro", "belo horizonte", "brasilia", "curitiba"]
+                      + [f"city {i}" for i in range(5, rows["cities"])], dtype=object)
+    prefixes = np.sort(rng.choice(np.arange(1_000, 100_000), size=rows["zip_prefixes"], replace=False))
+    prefix_city = zipf_choice(rng, len(cities), len(prefixes))
+    prefix_lat = rng.uniform(*LAT_RANGE, size=len(prefixes))
+    prefix_lng = rng.uniform(*LNG_RANGE, size=len(prefixes))
+    prefix_state = rng.choice(STATES, size=len(prefixes))
+
+    # geolocation: many jittered rows per prefix
+    geo_prefix = rng.integers(0, len(prefixes), size=rows["geolocation"])
+    geolocation = pd.DataFrame({
+        "geolocation_zip_code_prefix": prefixes[geo_prefix],
+        "geolocation_lat": prefix_lat[geo_prefix] + rng.normal(0, 0.02, rows["geolocation"]),
+        "geolocation_lng": prefix_lng[geo_prefix] + rng.normal(0, 0.02, rows["geolocation"]),
+        "geolocation_city": cities[prefix_city[geo_prefix]],
+        "geolocation_state": prefix_state[geo_prefix],
+    })
+
+    customer_prefix = zipf_choice(rng, len(prefixes), rows["customers"], exponent=0.8)
+    customers = pd.DataFrame({
+        "customer_id": hex_ids(rng, rows["customers"]),
+        "customer_unique_id": hex_ids(rng, rows["customers"]),
+        "customer_zip_code_prefix": prefixes[customer_prefix],
+        "customer_city": cities[prefix_city[customer_prefix]],
+        "customer_state": prefix_state[customer_prefix],
+    })
+
+    seller_prefix = rng.integers(0, len(prefixes), size=rows["sellers"])
+    sellers = pd.DataFrame({
+        "seller_id": hex_ids(rng, rows["sellers"]),
+        "seller_zip_code_prefix": prefixes[seller_prefix],
+        "seller_city": cities[prefix_city[seller_prefix]],
+        "seller_state": prefix_state[seller_prefix],
+    })
+
+    products = pd.DataFrame({
+        "product_id": hex_ids(rng, rows["products"]),
+        "product_category_name": rng.choice(CATEGORIES, size=rows["products"]).astype(object),
+        "product_name_lenght": rng.integers(5, 76, rows["products"]).astype("float64"),
+        "product_description_lenght": rng.integers(4, 4000, rows["products"]).astype("float64"),
+        "product_photos_qty": rng.integers(1, 10, rows["products"]).astype("float64"),
+        "product_weight_g": rng.integers(50, 30_000, rows["products"]).astype("float64"),
+        "product_length_cm": rng.integers(7, 105, rows["products"]).astype("float64"),
+        "product_height_cm": rng.integers(2, 105, rows["products"]).astype("float64"),
+        "product_width_cm": rng.integers(6, 118, rows["products"]).astype("float64"),
+    })
+    missing = rng.random(rows["products"]) < 0.02
+    products.loc[missing, ["product_category_name", "product_name_lenght",
+                           "product_description_lenght", "product_photos_qty"]] = np.nan
+
+    purchase = _timestamps(rng, rows["orders"])
+    orders = pd.DataFrame({
+        "order_id": hex_ids(rng, rows["orders"]),
+        "customer_id": customers["customer_id"].to_numpy()[rng.permutation(rows["customers"])[:rows["orders"]]],
+        "order_status": np.where(rng.random(rows["orders"]) < 0.97, "delivered", "shipped").astype(object),
+        "order_purchase_timestamp": purchase,
+        "order_approved_at": purchase,
+        "order_delivered_carrier_date": purchase,
+        "order_delivered_customer_date": purchase,
+        "order_estimated_delivery_date": purchase,
+    })
+
+    items_per_order = rng.choice(np.arange(1, 6), size=rows["orders"], p=ITEMS_PER_ORDER_WEIGHTS)
+    item_order = np.repeat(np.arange(rows["orders"]), items_per_order)
+    n_items = len(item_order)
+    first_item = np.repeat(np.cumsum(items_per_order) - items_per_order, items_per_order)
+    order_items = pd.DataFrame({
+        "order_id": orders["order_id"].to_numpy()[item_order],
+        "order_item_id": np.arange(n_items) - first_item + 1,
+        "product_id": products["product_id"].to_numpy()[zipf_choice(rng, rows["products"], n_items, 0.7)],
+        "seller_id": sellers["seller_id"].to_numpy()[zipf_choice(rng, rows["sellers"], n_items, 0.9)],
+        "shipping_limit_date": np.asarray(purchase)[item_order],
+        "price": rng.gamma(2.0, 60.0, n_items).round(2),
+        "freight_value": rng.gamma(2.0, 10.0, n_items).round(2),
+    })
+
+    # ~99% of orders get a review, ~1% of those a second one
+    reviewed = np.flatnonzero(rng.random(rows["orders"]) < 0.99)
+    reviewed = np.concatenate([reviewed, reviewed[rng.random(len(reviewed)) < 0.01]])
+    n_reviews = len(reviewed)
+    order_reviews = pd.DataFrame({
+        "review_id": hex_ids(rng, n_reviews),
+        "order_id": orders["order_id"].to_numpy()[reviewed],
+        "review_score": rng.choice(REVIEW_SCORES, size=n_reviews, p=REVIEW_SCORE_WEIGHTS),
+        "review_comment_title": np.nan,
+        "review_comment_message": np.nan,
+        "review_creation_date": np.asarray(purchase)[reviewed],
+        "review_answer_timestamp": np.asarray(purchase)[reviewed],
+    })
+
+    product_category = pd.DataFrame({
+        "product_category_name": CATEGORIES,
+        "product_category_name_english": [name.replace("_", " ") for name in CATEGORIES],
+    })
+
+    return {
+        "customers": customers,
+        "geolocation": geolocation,
+        "order_items": order_items,
+        "order_reviews": order_reviews,
+        "orders": orders,
+        "products": products,
+        "sellers": sellers,
+        "product_category": product_category,
+    }
+
+
+def generate(out_dir, scale=1.0, seed=0):
+    """Write the synthetic raw tables to ``out_dir`` and return their row counts."""
+    out_dir = Path(out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    counts = {}
+    for name, frame in generate_tables(scale, seed).items():
+        frame[list(RAW_TABLES[name][1])].to_csv(out_dir / RAW_TABLES[name][0], index=False)
+        counts[name] = len(frame)
+    return counts
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generate synthetic Olist-shaped raw tables.")
+    parser.add_argument("--scale", type=float, default=1.0, help="scale factor (1 = real dataset size)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--out", required=True, help="output directory")
+    args = parser.parse_args(argv)
+    print(generate(args.out, args.scale, args.seed))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,192 @@
+"""Matplotlib/Seaborn charts shown on the dashboard (maps live in geo_charts).
+
+Every function takes the (small) data it plots and returns a Figure, so the
+result can be rendered once and reused through ``figure_cache.render``.
+Matplotlib and Seaborn take about two seconds to import, so they are only
+imported when the first figure is drawn (see ``pyplot``): a page whose
+figures are all cached never imports them.
+"""
+import threading
+
+import pandas as pd
+
+from star_buckets import STAR_PALETTE
+
+_style_lock = threading.Lock()
+_styled = False
+
+
+def pyplot():
+    """(matplotlib.pyplot, seaborn), with the dashboard's seaborn style set on first use."""
+    global _styled
+    import matplotlib.pyplot as plt
+    import seaborn as sns
+    with _style_lock:
+        if not _styled:
+            sns.set(style='dark')
+            _styled = True
+    return plt, sns
+
+
+def home_fig(top_cities, colors):
+    plt, sns = pyplot()
+    fig, ax = plt.subplots()
+
+    sns.barplot(
+        data=top_cities,
+        y="customer_city",
+        x="order_id",
+        palette=colors,
+        ax=ax
+    )
+
+    ax.set_xlabel("Number of Orders")
+    ax.set_ylabel("City")
+    ax.set_title("Top 5 Cities by Orders")
+    return fig
+
+
+def good_bad_product_sales_fig(good_bad_product):
+    """``good_bad_product`` is the bucket_sales() result ordered Good, Bad."""
+    plt, sns = pyplot()
+    # Create fig and subplots
+    fig, ax = plt.subplots(1, 2)
+
+    # Create the bar plot to compare the total sales
+    plot_data = pd.DataFrame({
+        "Product Review": good_bad_product.index.tolist(),
+        "Total Sales": good_bad_product["total_sales"].astype(float).tolist()
+    })
+    sns.barplot(x="Product Review", y="Total Sales", data=plot_data, palette=["green", "red"], ax=ax[0])
+
+    # Add labels and title
+    ax[0].set_xlabel("Product Review")
+    ax[0].set_ylabel("Total Sales")
+
+    # Create the bar plot to compare the average sales
+    plot_data = pd.DataFrame({
+        "Product Review": good_bad_product.index.tolist(),
+        "Average Sales": good_bad_product["average_sales"].tolist()
+    })
+    sns.barplot(x="Product Review", y="Average Sales", data=plot_data, palette=["green", "red"], ax=ax[1])
+
+    # Add labels and title
+    ax[1].set_xlabel("Product Review")
+    ax[1].set_ylabel("Average Sales")
+
+    # Add a single title for both subplots
+    fig.suptitle("Comparison of Sales for Good and Bad Reviewed Products", fontsize=14, fontweight="bold")
+
+    # Adjust spacing between subplots
+    fig.subplots_adjust(wspace=0.4)
+    return fig
+
+
+def each_review_sales_fig(buckets, label, title):
+    """Total and average sales per star band, e.g. label="Store Review"."""
+    plt, sns = pyplot()
+    # Create fig and subplots
+    fig, ax = plt.subplots(2, 1)
+
+    # Create the bar plot to compare the total sales for each band
+    plot_data = pd.DataFrame({
+        label: buckets.index.tolist(),
+        "Total Sales": buckets["total_sales"].astype(float).tolist()
+    })
+    sns.barplot(x=label, y="Total Sales", data=plot_data, palette=STAR_PALETTE, ax=ax[0])
+
+    # Add labels
+    ax[0].set_xlabel(label)
+    ax[0].set_ylabel("Total Sales")
+
+    # Create the bar plot to compare the average sales for each band
+    plot_data = pd.DataFrame({
+        label: buckets.index.tolist(),
+        "Average Sales": buckets["average_sales"].tolist()
+    })
+    sns.barplot(x=label, y="Average Sales", data=plot_data, palette=STAR_PALETTE, ax=ax[1])
+
+    # Add labels
+    ax[1].set_xlabel(label)
+    ax[1].set_ylabel("Average Sales")
+
+    # Add a single title for both subplots
+    fig.suptitle(title, fontsize=14, fontweight="bold")
+
+    # Adjust spacing between subplots
+    fig.subplots_adjust(wspace=0.8)
+    return fig
+
+
+def detail_to_review_fig(detailed_stats, non_detailed_stats):
+    plt, sns = pyplot()
+    # Box plots drawn from precomputed quartiles/whiskers (sketches.box_stats)
+    fig, ax = plt.subplots(1, 2, figsize=(12, 6))
+
+    # Boxplot for detailed_review
+    _box(ax[0], detailed_stats, sns.color_palette("Set2")[0])
+    ax[0].set_ylabel("Review Score")
+    ax[0].set_xlabel("Detailed Product")
+
+    # Boxplot for non_detailed_review
+    _box(ax[1], non_detailed_stats, sns.color_palette("Set1")[0])
+    ax[1].set_ylabel("Review Score")
+    ax[1].set_xlabel("Non Detailed Product")
+
+    # Add a single title for both subplots
+    fig.suptitle("Comparison of Review Score: Detailed vs Non Detailed Products", fontsize=14, fontweight="bold")
+
+    # Adjust spacing between subplots
+    fig.subplots_adjust(wspace=0.8)
+    return fig
+
+
+def _box(ax, stats, color):
+    ax.bxp(
+        [dict(stats, label="")], widths=0.8, patch_artist=True,
+        boxprops={"facecolor": color, "edgecolor": "0.25"},
+        medianprops={"color": "0.25"}, whiskerprops={"color": "0.25"}, capprops={"color": "0.25"},
+        flierprops={"marker": "d", "markerfacecolor": "0.25", "markeredgecolor": "0.25", "markersize": 5},
+    )
+    ax.set_xticks([])
+
+
+def detail_to_sales_fig(detailed_mean_sales, non_detailed_mean_sales):
+    plt, sns = pyplot()
+    # Create a DataFrame for plotting
+    sales_data = pd.DataFrame({
+        "Product Type": ["Detailed Product", "Non-Detailed Product"],
+        "Sales Value": [detailed_mean_sales, non_detailed_mean_sales]
+    })
+
+    # Create subplots
+    fig, ax = plt.subplots(figsize=(12, 6))
+
+    # Plot using Seaborn
+    sns.barplot(data=sales_data, x="Product Type", y="Sales Value", palette=["green", "red"], ax=ax)
+
+    # Add labels and title
+    ax.set_xlabel("Product Type")
+    ax.set_ylabel("Average Sales")
+    ax.set_title("Comparison of The Average Sales: Detailed vs Non-Detailed Products")
+    return fig
+
+
+def distance_bands_fig(bands):
+    """Items sold and average review score per seller-customer distance band."""
+    plt, sns = pyplot()
+    fig, ax = plt.subplots(2, 1)
+
+    # Items sold per distance band
+    sns.barplot(x="distance_band", y="items", data=bands, color="indianred", ax=ax[0])
+    ax[0].set_xlabel("Seller-Customer Distance")
+    ax[0].set_ylabel("Total Sales")
+
+    # Average review score per distance band
+    sns.barplot(x="distance_band", y="review_mean", data=bands, color="indianred", ax=ax[1])
+    ax[1].set_xlabel("Seller-Customer Distance")
+    ax[1].set_ylabel("Average Review Score")
+
+    fig.suptitle("Sales and Review Score by Seller-Customer Distance", fontsize=14, fontweight="bold")
+    fig.subplots_adjust(hspace=0.6)
+    return fig
@@ -0,0 +1,211 @@
+"""Browser-rendered counterparts of the figures in charts.py and geo_charts.py.
+
+Each function takes the same arguments as the Matplotlib figure of the same
+name (``*_fig`` -> ``*_spec`` / ``*_deck``) and returns a Vega-Lite spec
+(a dict with the aggregated values inlined) or a pydeck ``Deck`` drawn with
+WebGL. Only those few rows are sent to the browser, which does the layout,
+rasterization and map tiles itself.
+"""
+import json
+
+import numpy as np
+
+from star_buckets import STAR_PALETTE
+
+try:
+    import pydeck as pdk
+except ImportError:
+    # The maps fall back to Matplotlib (see renderers.show)
+    pdk = None
+
+# First colors of the seaborn Set2 / Set1 palettes used by the box plots
+SET2_GREEN = "#66c2a5"
+SET1_RED = "#e41a1c"
+
+# Light, middle and dark colors of the Matplotlib "Reds" colormap
+REDS = np.array([[255, 245, 240], [251, 106, 74], [103, 0, 13]], dtype="float64")
+
+
+def _bar(data, x, y, color, title=None, horizontal=False, x_title=None, y_title=None):
+    """Bar chart of ``data`` rows, bars colored by their ``color`` field."""
+    category = {"field": x, "type": "nominal", "sort": None, "title": x_title or x}
+    value = {"field": y, "type": "quantitative", "title": y_title or y}
+    spec = {
+        "data": {"values": data},
+        "mark": {"type": "bar", "tooltip": True},
+        "encoding": {
+            "x": value if horizontal else category,
+            "y": category if horizontal else value,
+            "color": {"field": color, "type": "nominal", "scale": None},
+        },
+    }
+    if title:
+        spec["title"] = title
+    return spec
+
+
+def home_spec(top_cities, colors):
+    data = [
+        {"customer_city": city, "order_id": int(orders), "color": color}
+        for city, orders, color in zip(top_cities["customer_city"], top_cities["order_id"], colors)
+    ]
+    return _bar(data, "customer_city", "order_id", "color", "Top 5 Cities by Orders", horizontal=True,
+                x_title="City", y_title="Number of Orders")
+
+
+def good_bad_product_sales_spec(good_bad_product):
+    data = [
+        {"Product Review": label, "Total Sales": float(total), "Average Sales": float(average), "color": color}
+        for label, total, average, color in zip(
+            good_bad_product.index, good_bad_product["total_sales"], good_bad_product["average_sales"],
+            ["green", "red"],
+        )
+    ]
+    return {
+        "title": "Comparison of Sales for Good and Bad Reviewed Products",
+        "hconcat": [_bar(data, "Product Review", measure, "color") for measure in ("Total Sales", "Average Sales")],
+    }
+
+
+def each_review_sales_spec(buckets, label, title):
+    data = [
+        {label: bucket, "Total Sales": float(total), "Average Sales": None if np.isnan(average) else float(average),
+         "color": color}
+        for bucket, total, average, color in zip(
+            buckets.index, buckets["total_sales"], buckets["average_sales"], STAR_PALETTE,
+        )
+    ]
+    return {
+        "title": title,
+        "vconcat": [_bar(data, label, measure, "color") for measure in ("Total Sales", "Average Sales")],
+    }
+
+
+def detail_to_review_spec(detailed_stats, non_detailed_stats):
+    """Box plots from precomputed ``Axes.bxp`` statistics (see sketches.box_stats)."""
+    groups = [("Detailed Product", detailed_stats, SET2_GREEN), ("Non Detailed Product", non_detailed_stats, SET1_RED)]
+    boxes = [
+        {"group": group, "q1": float(stats["q1"]), "q3": float(stats["q3"]), "med": float(stats["med"]),
+         "whislo": float(stats["whislo"]), "whishi": float(stats["whishi"]), "color": color}
+        for group, stats, color in groups
+    ]
+    fliers = [{"group": group, "value": float(value)} for group, stats, _ in groups for value in stats["fliers"]]
+    x = {"field": "group", "type": "nominal", "title": None, "sort": None}
+    score = {"type": "quantitative", "title": "Review Score", "scale": {"zero": False}}
+    return {
+        "title": "Comparison of Review Score: Detailed vs Non Detailed Products",
+        "layer": [
+            {"data": {"values": boxes}, "mark": "rule",
+             "encoding": {"x": x, "y": {"field": "whislo", **score}, "y2": {"field": "whishi"}}},
+            {"data": {"values": boxes}, "mark": {"type": "bar", "size": 80},
+             "encoding": {"x": x, "y": {"field": "q1", **score}, "y2": {"field": "q3"},
+                          "color": {"field": "color", "type": "nominal", "scale": None}}},
+            {"data": {"values": boxes}, "mark": {"type": "tick", "size": 80, "color": "#404040"},
+             "encoding": {"x": x, "y": {"field": "med", **score}}},
+            {"data": {"values": fliers}, "mark": {"type": "point", "shape": "diamond", "color": "#404040"},
+             "encoding": {"x": x, "y": {"field": "value", **score}}},
+        ],
+    }
+
+
+def detail_to_sales_spec(detailed_mean_sales, non_detailed_mean_sales):
+    data = [
+        {"Product Type": "Detailed Product", "Sales Value": float(detailed_mean_sales), "color": "green"},
+        {"Product Type": "Non-Detailed Product", "Sales Value": float(non_detailed_mean_sales), "color": "red"},
+    ]
+    return _bar(data, "Product Type", "Sales Value", "color",
+                "Comparison of The Average Sales: Detailed vs Non-Detailed Products", y_title="Average Sales")
+
+
+def distance_bands_spec(bands):
+    data = [
+        {"Seller-Customer Distance": band, "Total Sales": int(items),
+         "Average Review Score": None if np.isnan(review) else float(review), "color": "indianred"}
+        for band, items, review in zip(bands["distance_band"], bands["items"], bands["review_mean"])
+    ]
+    return {
+        "title": "Sales and Review Score by Seller-Customer Distance",
+        "vconcat": [_bar(data, "Seller-Customer Distance", measure, "color")
+                    for measure in ("Total Sales", "Average Review Score")],
+    }
+
+
+# ============= Maps ============= #
+def _ramp(shade):
+    """deck.gl expression for the Reds color of a 0..1 ``shade`` field (see REDS)."""
+    channels = []
+    for low, middle, high in REDS.T:
+        channels.append(
+            f"{shade} < 0.5 ? {low:g} + {2 * (middle - low):g} * {shade} "
+            f": {middle:g} + {2 * (high - middle):g} * ({shade} - 0.5)"
+        )
+    return "[" + ", ".join(f"({channel})" for channel in channels) + ", 180]"
+
+
+def _view(lat, lng):
+    lat, lng = np.asarray(lat, dtype="float64"), np.asarray(lng, dtype="float64")
+    if not len(lat):
+        return pdk.ViewState(latitude=-15, longitude=-50, zoom=3)
+    span = max(np.ptp(lat), np.ptp(lng), 0.01)
+    return pdk.ViewState(
+        latitude=float((lat.min() + lat.max()) / 2), longitude=float((lng.min() + lng.max()) / 2),
+        zoom=float(np.clip(np.log2(360 / span) - 0.5, 1, 14)),
+    )
+
+
+if pdk is not None:
+    class CompactDeck(pdk.Deck):
+        """Deck whose JSON (what st.pydeck_chart sends) is not indented."""
+
+        def to_json(self):
+            return json.dumps(json.loads(super().to_json()), separators=(",", ":"))
+
+
+def _require_pydeck():
+    if pdk is None:
+        raise ImportError("pydeck is not installed")
+
+
+def _deck(layer, lat, lng, **kwargs):
+    return CompactDeck(layers=[layer], initial_view_state=_view(lat, lng), map_style="light", **kwargs)
+
+
+def points_map_deck(points, title, markersize):
+    """WebGL scatter of ``points``, shaded along the row order like points_map_fig; ``title`` is the tooltip."""
+    _require_pydeck()
+    lat, lng = points["geolocation_lat"].to_numpy(), points["geolocation_lng"].to_numpy()
+    shade = np.arange(len(lat)) / max(len(lat) - 1, 1)
+    data = [
+        {"lng": x, "lat": y, "shade": round(s, 3)}
+        for x, y, s in zip(lng.tolist(), lat.tolist(), shade.tolist())
+    ]
+    layer = pdk.Layer(
+        "ScatterplotLayer", data, get_position="[lng, lat]", get_fill_color=_ramp("shade"),
+        get_radius=markersize * 100, radius_min_pixels=3, pickable=True,
+    )
+    return _deck(layer, lat, lng, tooltip={"text": title})
+
+
+def grid_map_deck(cells, resolution, weight, title):
+    """WebGL grid cells (from geo_grid.select_cells) shaded by log ``weight``, like grid_map_fig.
+
+    Only the south-west corner, value and shade of each cell are sent; the
+    browser builds the cell polygons.
+    """
+    _require_pydeck()
+    lat, lng = cells["cell_lat"].to_numpy(), cells["cell_lng"].to_numpy()
+    values = cells[weight].to_numpy(dtype="float64")
+    logs = np.log(np.maximum(values, 1e-3))
+    shade = (logs - logs.min()) / (np.ptp(logs) or 1) if len(logs) else logs
+    data = [
+        {"lng": x, "lat": y, "value": value, "shade": round(s, 3)}
+        for x, y, value, s in zip(lng.tolist(), lat.tolist(), values.tolist(), shade.tolist())
+    ]
+    layer = pdk.Layer(
+        "PolygonLayer", data,
+        get_polygon=f"[[lng, lat], [lng + {resolution:g}, lat], [lng + {resolution:g}, lat + {resolution:g}], "
+                    f"[lng, lat + {resolution:g}]]",
+        get_fill_color=_ramp("shade"), stroked=False, pickable=True,
+    )
+    label = weight.replace("_", " ").capitalize()
+    return _deck(layer, lat, lng, tooltip={"text": f"{title}\n{label}: {{value}}"})
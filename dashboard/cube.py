@@ -0,0 +1,117 @@
+"""Query layer over the precomputed sales cube (sales_cube.csv).
+
+The cube has one row per month x customer_state x product_category x
+seller_state x star_bucket cell with additive measures: items, review_sum,
+review_count and orders. Any filter combination is answered by masking the
+cells on their integer dimension codes and summing, so a query touches the
+cube (tens of thousands of cells) rather than the raw orders.
+
+``orders`` is additive too: every item carries an equal share of its order,
+so a cell holds the fraction of each order whose items fall in it. Any sum of
+cells counts each order at most once; an order with items from several
+categories or seller states is split between them by item count.
+"""
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+import data_loader
+import tracing
+from star_buckets import STAR_BANDS
+
+DIMENSIONS = ["month", "customer_state", "product_category", "seller_state", "star_bucket"]
+MEASURES = ["orders", "items", "review_sum", "review_count"]
+
+STAR_BUCKETS = STAR_BANDS["labels"] + ["No review"]
+
+MAX_QUERIES = 1024
+
+_cube = {}
+_results = OrderedDict()
+_lock = threading.Lock()
+
+
+def _encoded():
+    """Dimension codes and measure arrays of the current cube, cached per version of sales_cube.csv."""
+    # Signature taken before loading: a CSV replaced in between is read again on the next call
+    signature = data_loader._signature(data_loader.csv_path("sales_cube"))
+    frame = data_loader.load("sales_cube")
+    with _lock:
+        cube = _cube.get("current")
+        if cube is None or cube["version"] != signature:
+            dimensions = {}
+            for dimension in DIMENSIONS:
+                categories = STAR_BUCKETS if dimension == "star_bucket" else sorted(frame[dimension].unique())
+                codes = pd.Categorical(frame[dimension], categories=categories).codes
+                dimensions[dimension] = (codes, list(categories))
+            cube = _cube["current"] = {
+                "version": signature,
+                "dimensions": dimensions,
+                "measures": {measure: frame[measure].to_numpy(dtype="float64") for measure in MEASURES},
+            }
+            _results.clear()
+        return cube
+
+
+def options(dimension):
+    """Values of ``dimension`` in display order (months ascending)."""
+    return _encoded()["dimensions"][dimension][1]
+
+
+def _mask(cube, filters):
+    mask = np.ones(len(cube["measures"]["items"]), dtype=bool)
+    for dimension, allowed in filters:
+        codes, categories = cube["dimensions"][dimension]
+        if dimension == "month":
+            # Inclusive (first, last) range; month strings sort chronologically
+            first, last = allowed
+            keep = np.array([first <= month <= last for month in categories])
+        else:
+            keep = np.isin(categories, list(allowed))
+        mask &= keep[codes]
+    return mask
+
+
+def _key(filters, by):
+    # Empty selections mean "no filter"
+    items = tuple(sorted((dimension, tuple(value)) for dimension, value in (filters or {}).items() if value))
+    return items, by
+
+
+def query(filters=None, by=None):
+    """Measures summed over the cells matching ``filters``.
+
+    ``filters`` maps a dimension to the values to keep; ``month`` takes an
+    inclusive ``(first, last)`` range. Dimensions left out or given an empty
+    selection are not filtered. Returns a Series of the measures plus
+    ``average_review``, or with ``by`` a DataFrame with one row per value of
+    that dimension. Results are cached, so repeated combinations are free.
+    """
+    items, by = _key(filters, by)
+    cube = _encoded()
+    cache_key = (cube["version"], items, by)
+    with _lock:
+        if cache_key in _results:
+            _results.move_to_end(cache_key)
+            return _results[cache_key]
+
+    with tracing.span("cube:query", by=by):
+        mask = _mask(cube, items)
+        if by is None:
+            result = pd.Series({measure: values[mask].sum() for measure, values in cube["measures"].items()})
+            result["average_review"] = result["review_sum"] / result["review_count"] if result["review_count"] else np.nan
+        else:
+            codes, categories = cube["dimensions"][by]
+            result = pd.DataFrame({
+                measure: np.bincount(codes[mask], weights=values[mask], minlength=len(categories))
+                for measure, values in cube["measures"].items()
+            }, index=pd.Index(categories, name=by))
+            result["average_review"] = result["review_sum"] / result["review_count"].replace(0, np.nan)
+
+    with _lock:
+        _results[cache_key] = result
+        while len(_results) > MAX_QUERIES:
+            _results.popitem(last=False)
+    return result
@@ -0,0 +1,479 @@
+"""Cached, typed loading of the CSV artifacts the dashboard reads.
+
+Each dataset is parsed once per process and kept in memory until the source
+CSV changes on disk (size or mtime). On the first parse a columnar copy
+(Feather by default, Parquet optionally) is written next to the CSV, so later
+cold starts memory-map that file instead of parsing text.
+
+Frames returned by ``load`` are shared between reruns and sessions: treat them
+as read-only and copy before mutating.
+
+Frames are kept in a compact form (see ``compact``): product and seller ids
+are packed into 16-byte binary values, the Sales Explorer dimensions are
+categoricals, and integer and float columns are downcast to the narrowest
+dtype that holds their values exactly. ``python data_loader.py`` prints the
+bytes of every dataset before and after.
+
+With Feather artifacts (the default) the frames are zero-copy views of the
+memory-mapped file: numeric columns are read-only numpy views, and string and
+packed id columns wrap the Arrow buffers. The data then lives in the OS page cache,
+which every worker process on the host maps and shares instead of holding
+its own copy. ``DASHBOARD_SHARED_MMAP=0`` copies the data onto the heap of
+each process instead.
+"""
+import os
+import threading
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+import tracing
+from star_buckets import STAR_BANDS
+
+DATA_DIR = Path(__file__).resolve().parent
+
+# "feather", "parquet" or "csv" (csv disables the columnar copy)
+ARTIFACT_FORMAT = os.environ.get("DASHBOARD_ARTIFACT_FORMAT", "feather")
+SHARED_MMAP = os.environ.get("DASHBOARD_SHARED_MMAP", "1") == "1"
+# Bumped when the stored form of the frames changes, so older artifacts are rewritten
+ARTIFACT_VERSION = 2
+
+# Per dataset, besides "dtypes":
+#   keys:       32-character hex id columns, packed into 16 bytes (see pack_ids)
+#   categories: columns kept as categoricals, with their category order (None: sorted)
+#
+# The review/score files were exported from a groupby().agg() with a two-row
+# MultiIndex header, e.g. "product_id,order_id,review_score,..." followed by
+# ",count,max,min,mean". Those two rows are skipped and replaced with the
+# flattened names below, in file order.
+DATASETS = {
+    "order_per_city": {
+        "file": "order_per_city.csv",
+        "header_rows": 1,
+        "dtypes": {"customer_city": "object", "order_id": "int64"},
+    },
+    "score_per_product": {
+        "file": "score_per_product.csv",
+        "keys": ["product_id"],
+        "header_rows": 2,
+        "dtypes": {
+            "product_id": "object",
+            "order_id": "int64",
+            "review_score_max": "float64",
+            "review_score_min": "float64",
+            "review_score_mean": "float64",
+        },
+    },
+    "score_per_store": {
+        "file": "score_per_store.csv",
+        "keys": ["seller_id"],
+        "header_rows": 2,
+        "dtypes": {
+            "seller_id": "object",
+            "order_id": "int64",
+            "review_score_max": "float64",
+            "review_score_min": "float64",
+            "review_score_mean": "float64",
+        },
+    },
+    "detailed_product_review": {
+        "file": "detailed_product_review.csv",
+        "keys": ["product_id"],
+        "header_rows": 2,
+        "dtypes": {
+            "product_id": "object",
+            "review_score_max": "float64",
+            "review_score_min": "float64",
+            "review_score_mean": "float64",
+        },
+    },
+    "non_detailed_product_review": {
+        "file": "non_detailed_product_review.csv",
+        "keys": ["product_id"],
+        "header_rows": 2,
+        "dtypes": {
+            "product_id": "object",
+            "review_score_max": "float64",
+            "review_score_min": "float64",
+            "review_score_mean": "float64",
+        },
+    },
+    "detailed_product_sales": {
+        "file": "detailed_product_sales.csv",
+        "keys": ["product_id"],
+        "header_rows": 1,
+        "dtypes": {"product_id": "object", "order_id": "int64"},
+    },
+    "non_detailed_product_sales": {
+        "file": "non_detailed_product_sales.csv",
+        "keys": ["product_id"],
+        "header_rows": 1,
+        "dtypes": {"product_id": "object", "order_id": "int64"},
+    },
+    "geolocation_df": {
+        "file": "geolocation_df.csv",
+        "header_rows": 1,
+        "dtypes": {
+            "geolocation_zip_code_prefix": "int64",
+            "geolocation_lat": "float64",
+            "geolocation_lng": "float64",
+            "geolocation_city": "object",
+            "geolocation_state": "object",
+            "geolocation_points": "int64",
+        },
+    },
+    "customers_geo_count": {
+        "file": "customers_geo_count.csv",
+        "header_rows": 1,
+        "dtypes": {
+            "geolocation_zip_code_prefix": "int64",
+            "geolocation_lat": "float64",
+            "geolocation_lng": "float64",
+            "customer_count": "int64",
+        },
+    },
+    "sellers_geo_count": {
+        "file": "sellers_geo_count.csv",
+        "header_rows": 1,
+        "dtypes": {
+            "geolocation_zip_code_prefix": "int64",
+            "geolocation_lat": "float64",
+            "geolocation_lng": "float64",
+            "seller_count": "int64",
+        },
+    },
+    "customers_geo_grid": {
+        "file": "customers_geo_grid.csv",
+        "header_rows": 1,
+        "dtypes": {
+            "resolution": "float64",
+            "customer_city": "object",
+            "cell_lat": "float64",
+            "cell_lng": "float64",
+            "customer_count": "float64",
+        },
+    },
+    "distance_bands": {
+        "file": "distance_bands.csv",
+        "header_rows": 1,
+        "dtypes": {
+            "distance_band": "object",
+            "items": "int64",
+            "item_share": "float64",
+            "mean_km": "float64",
+            "review_count": "int64",
+            "review_mean": "float64",
+        },
+    },
+    "city_seller_distances": {
+        "file": "city_seller_distances.csv",
+        "header_rows": 1,
+        "dtypes": {
+            "customer_city": "object",
+            "items": "int64",
+            "median_km": "float64",
+            "mean_km": "float64",
+            "nearest_seller_km": "float64",
+            "sellers_within_100km": "int64",
+            "sellers_within_500km": "int64",
+        },
+    },
+    "sales_cube": {
+        "file": "sales_cube.csv",
+        "header_rows": 1,
+        "categories": {
+            "month": None,
+            "customer_state": None,
+            "product_category": None,
+            "seller_state": None,
+            "star_bucket": STAR_BANDS["labels"] + ["No review"],
+        },
+        "dtypes": {
+            "month": "object",
+            "customer_state": "object",
+            "product_category": "object",
+            "seller_state": "object",
+            "star_bucket": "object",
+            "orders": "float64",
+            "items": "int64",
+            "review_sum": "float64",
+            "review_count": "int64",
+        },
+    },
+    "review_sketches": {
+        "file": "review_sketches.csv",
+        "header_rows": 1,
+        "dtypes": {
+            "name": "object",
+            "bins": "object",
+            "bucket": "object",
+            "kind": "object",
+            "total": "float64",
+            "state": "object",
+        },
+    },
+}
+
+_cache = {}
+_lock = threading.Lock()
+
+
+def csv_path(name):
+    return DATA_DIR / DATASETS[name]["file"]
+
+
+def available(name):
+    """Whether the CSV of dataset ``name`` has been built."""
+    return csv_path(name).exists()
+
+
+def _signature(path):
+    stat = os.stat(path)
+    return (stat.st_size, stat.st_mtime_ns)
+
+
+def _read_csv(path, spec):
+    names = list(spec["dtypes"])
+    # Integer columns are parsed as float first when the file may hold NaNs;
+    # only the declared dtypes are enforced afterwards.
+    frame = pd.read_csv(
+        path,
+        skiprows=spec["header_rows"],
+        header=None,
+        names=names,
+        dtype={col: ("float64" if dtype == "int64" else dtype) for col, dtype in spec["dtypes"].items()},
+    )
+    for col, dtype in spec["dtypes"].items():
+        if dtype == "int64" and not frame[col].isna().any():
+            frame[col] = frame[col].astype("int64")
+    return frame
+
+
+def pack_ids(values):
+    """32-character hex ids as an Arrow-backed array of 16-byte binary values.
+
+    Returns None when some value is not a 32-character hex string (e.g.
+    missing), so the column stays as it is.
+    """
+    try:
+        import pyarrow as pa
+    except ImportError:
+        return None
+    ids = np.asarray(values, dtype=object)
+    if not all(isinstance(value, str) and len(value) == 32 for value in ids):
+        return None
+    try:
+        packed = bytes.fromhex("".join(ids))
+    except ValueError:
+        return None
+    array = pa.Array.from_buffers(pa.binary(16), len(ids), [None, pa.py_buffer(packed)])
+    return pd.arrays.ArrowExtensionArray(pa.chunked_array([array], type=pa.binary(16)))
+
+
+def unpack_ids(values):
+    """Hex strings of packed ids (see ``pack_ids``); other values are returned as they are."""
+    if isinstance(getattr(values, "dtype", None), pd.ArrowDtype):
+        return pd.Series([value.hex() for value in values], index=getattr(values, "index", None), dtype=object)
+    return values
+
+
+def _downcast(values):
+    """``values`` in the narrowest integer or float dtype that holds every value exactly."""
+    if pd.api.types.is_integer_dtype(values.dtype):
+        return pd.to_numeric(values, downcast="integer")
+    if values.dtype == "float64":
+        narrow = values.astype("float32")
+        if np.array_equal(narrow.to_numpy(dtype="float64"), values.to_numpy(), equal_nan=True):
+            return narrow
+    return values
+
+
+def compact(frame, spec):
+    """Compact form of a parsed dataset: packed ids, categoricals and downcast numbers."""
+    columns = {}
+    for column, values in frame.items():
+        if column in spec.get("keys", ()):
+            packed = pack_ids(values)
+            columns[column] = values if packed is None else pd.Series(packed, index=values.index)
+        elif column in spec.get("categories", {}):
+            order = spec["categories"][column]
+            columns[column] = pd.Categorical(values, categories=order or sorted(values.dropna().unique()))
+        else:
+            columns[column] = _downcast(values)
+    return pd.DataFrame(columns, index=frame.index)
+
+
+def _artifact_path(path):
+    suffix = ".parquet" if ARTIFACT_FORMAT == "parquet" else ".feather"
+    return path.with_suffix(suffix)
+
+
+def _read_artifact(path, signature):
+    """Return the columnar copy of ``path`` if it was built from ``signature``."""
+    if ARTIFACT_FORMAT not in ("feather", "parquet"):
+        return None
+    artifact = _artifact_path(path)
+    if not artifact.exists():
+        return None
+    try:
+        if ARTIFACT_FORMAT == "parquet":
+            import pyarrow.parquet as pq
+            table = pq.read_table(artifact, memory_map=True)
+        else:
+            import pyarrow.feather as feather
+            table = feather.read_table(artifact, memory_map=True)
+    except (ImportError, OSError, ValueError):
+        return None
+    metadata = table.schema.metadata or {}
+    if metadata.get(b"source_signature") != repr((ARTIFACT_VERSION, signature)).encode():
+        return None
+    if ARTIFACT_FORMAT == "feather" and SHARED_MMAP:
+        return _views(table)
+    return table.to_pandas(types_mapper=_binary_dtype)
+
+
+def _binary_dtype(arrow_type):
+    # Packed ids stay Arrow-backed instead of becoming Python bytes objects
+    import pyarrow as pa
+    return pd.ArrowDtype(arrow_type) if pa.types.is_fixed_size_binary(arrow_type) else None
+
+
+def _string_dtype(pa):
+    """Arrow-backed string dtype that wraps the column's buffers.
+
+    pandas >= 2.1 has the NaN-semantics ``str`` dtype, like the CSV reader's
+    strings; older versions (the pinned 2.0) use ``ArrowDtype``, whose
+    missing value is ``pd.NA``.
+    """
+    try:
+        return pd.StringDtype("pyarrow", na_value=np.nan)
+    except TypeError:
+        return pd.ArrowDtype(pa.large_string())
+
+
+def _views(table):
+    """DataFrame over the buffers of a memory-mapped ``table``, without copying.
+
+    Columns that cannot be viewed (several chunks, or numbers with nulls) are
+    converted (copied) as usual. Categoricals copy only their codes.
+    """
+    import pyarrow as pa
+
+    columns = {}
+    for name, column in zip(table.column_names, table.columns):
+        numeric = pa.types.is_integer(column.type) or pa.types.is_floating(column.type)
+        if numeric and column.num_chunks == 1 and column.null_count == 0:
+            columns[name] = column.chunk(0).to_numpy(zero_copy_only=True)
+        elif pa.types.is_string(column.type) or pa.types.is_large_string(column.type):
+            columns[name] = pd.array(column, dtype=_string_dtype(pa))
+        elif pa.types.is_fixed_size_binary(column.type):
+            columns[name] = pd.arrays.ArrowExtensionArray(column)
+        elif pa.types.is_dictionary(column.type) and column.num_chunks == 1 and column.null_count == 0:
+            chunk = column.chunk(0)
+            columns[name] = pd.Categorical.from_codes(
+                chunk.indices.to_numpy(zero_copy_only=True), categories=chunk.dictionary.to_pandas(),
+                ordered=column.type.ordered,
+            )
+        else:
+            columns[name] = column.to_pandas()
+    return pd.DataFrame(columns, columns=table.column_names, copy=False)
+
+
+def _write_artifact(path, signature, frame):
+    if ARTIFACT_FORMAT not in ("feather", "parquet"):
+        return
+    try:
+        import pyarrow as pa
+    except ImportError:
+        return
+    # One chunk per column, 64-bit string offsets (what pandas' Arrow-backed
+    # strings use) and NaN rather than null in float columns, so every column
+    # can be viewed in place (see _views)
+    import pyarrow.compute as pc
+    table = pa.Table.from_pandas(frame, preserve_index=False).combine_chunks()
+    for index, field in enumerate(table.schema):
+        if pa.types.is_string(field.type):
+            table = table.set_column(index, field.with_type(pa.large_string()), table[index].cast(pa.large_string()))
+        elif pa.types.is_floating(field.type) and table[index].null_count:
+            table = table.set_column(index, field, pc.fill_null(table[index], float("nan")))
+    table = table.replace_schema_metadata(
+        {**(table.schema.metadata or {}), b"source_signature": repr((ARTIFACT_VERSION, signature)).encode()}
+    )
+    artifact = _artifact_path(path)
+    tmp = artifact.with_name(artifact.name + ".tmp")
+    try:
+        if ARTIFACT_FORMAT == "parquet":
+            import pyarrow.parquet as pq
+            pq.write_table(table, tmp)
+        else:
+            import pyarrow.feather as feather
+            # Uncompressed so the file can be memory-mapped without decoding
+            feather.write_feather(table, tmp, compression="uncompressed", chunksize=max(len(table), 1))
+        os.replace(tmp, artifact)
+    except OSError:
+        # Read-only deployments simply keep parsing the CSV
+        if tmp.exists():
+            tmp.unlink()
+
+
+def load(name):
+    """Return the dataset ``name`` as a typed DataFrame, cached per process."""
+    spec = DATASETS[name]
+    path = csv_path(name)
+    signature = _signature(path)
+
+    with _lock:
+        cached = _cache.get(name)
+        if cached is not None and cached[0] == signature:
+            return cached[1]
+
+        with tracing.span(f"load:{name}"):
+            frame = _read_artifact(path, signature)
+            if frame is None:
+                frame = compact(_read_csv(path, spec), spec)
+                _write_artifact(path, signature, frame)
+                if SHARED_MMAP:
+                    # Swap the parsed copy for the shared mapping once the artifact is written
+                    shared = _read_artifact(path, signature)
+                    frame = frame if shared is None else shared
+
+        _cache[name] = (signature, frame)
+        return frame
+
+
+def clear_cache(name=None):
+    """Drop one cached dataset, or all of them when ``name`` is None."""
+    with _lock:
+        if name is None:
+            _cache.clear()
+        else:
+            _cache.pop(name, None)
+
+
+def _frame_bytes(frame):
+    return int(frame.memory_usage(deep=True, index=False).sum())
+
+
+def memory_report():
+    """Bytes of every built dataset as parsed from the CSV and in its compact form."""
+    rows = []
+    for name, spec in DATASETS.items():
+        path = csv_path(name)
+        if not path.exists():
+            continue
+        parsed = _read_csv(path, spec)
+        rows.append({
+            "dataset": name,
+            "rows": len(parsed),
+            "bytes_before": _frame_bytes(parsed),
+            "bytes_after": _frame_bytes(load(name)),
+        })
+    report = pd.DataFrame(rows, columns=["dataset", "rows", "bytes_before", "bytes_after"])
+    report.loc[len(report)] = {"dataset": "total", **report[["rows", "bytes_before", "bytes_after"]].sum().to_dict()}
+    report["ratio"] = (report["bytes_after"] / report["bytes_before"]).round(3)
+    return report
+
+
+if __name__ == "__main__":
+    print(memory_report().to_string(index=False))
@@ -0,0 +1,160 @@
+"""Process-wide cache of rendered Matplotlib figures.
+
+``render(name, draw, *args)`` returns the PNG bytes of ``draw(*args)``. The
+key is a hash of the figure name, the source of the module ``draw`` is
+defined in (so its helpers and constants count too), the contents of its
+arguments (DataFrames are hashed by value), the Matplotlib version,
+``CACHE_VERSION`` and whatever ``draw`` declared with ``depends_on`` (e.g. the
+state of the basemap tile store for the maps). A figure is rasterized once
+per distinct input and shared by every session of the server process.
+
+The in-memory cache is an LRU bounded by ``DASHBOARD_FIGURE_CACHE_MB``
+(default 64 MB). When ``DASHBOARD_FIGURE_CACHE_DIR`` is set, rendered images
+are also written there so restarts start warm.
+"""
+import hashlib
+import importlib.metadata
+import io
+import os
+import sys
+import threading
+from collections import OrderedDict
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+import tracing
+
+MAX_BYTES = int(float(os.environ.get("DASHBOARD_FIGURE_CACHE_MB", "64")) * 1024 * 1024)
+CACHE_DIR = os.environ.get("DASHBOARD_FIGURE_CACHE_DIR")
+# Read from the package metadata: importing Matplotlib is left to the first figure actually drawn
+MATPLOTLIB_VERSION = importlib.metadata.version("matplotlib")
+
+# Bumped when drawing code outside the module of the ``draw`` functions changes
+# (SAVEFIG_KWARGS, shared palettes), so images in DASHBOARD_FIGURE_CACHE_DIR are redrawn
+CACHE_VERSION = 3
+
+# Same settings st.pyplot uses, so cached images look identical
+SAVEFIG_KWARGS = {"format": "png", "dpi": 200, "bbox_inches": "tight"}
+
+_images = OrderedDict()
+_size = 0
+_sources = {}
+_lock = threading.Lock()
+
+
+def _update(digest, value):
+    if isinstance(value, (pd.DataFrame, pd.Series)):
+        digest.update(type(value).__name__.encode())
+        if isinstance(value, pd.DataFrame):
+            digest.update(repr(list(value.columns)).encode())
+        digest.update(repr(value.dtypes.tolist() if isinstance(value, pd.DataFrame) else value.dtype).encode())
+        digest.update(pd.util.hash_pandas_object(value, index=True).values.tobytes())
+    elif isinstance(value, np.ndarray):
+        digest.update(repr((value.dtype, value.shape)).encode())
+        digest.update(np.ascontiguousarray(value).tobytes())
+    elif isinstance(value, (list, tuple)):
+        digest.update(f"{type(value).__name__}{len(value)}".encode())
+        for item in value:
+            _update(digest, item)
+    elif isinstance(value, dict):
+        digest.update(f"dict{len(value)}".encode())
+        for key in sorted(value, key=repr):
+            _update(digest, key)
+            _update(digest, value[key])
+    else:
+        digest.update(repr(value).encode())
+
+
+def fingerprint(*parts):
+    """Stable hex digest of ``parts`` (DataFrames, arrays and plain values)."""
+    digest = hashlib.sha256()
+    for part in parts:
+        _update(digest, part)
+    return digest.hexdigest()
+
+
+def _source(draw):
+    """Digest of the source file of the module ``draw`` is defined in, read once per process."""
+    module = draw.__module__
+    with _lock:
+        if module not in _sources:
+            _sources[module] = hashlib.sha256(Path(sys.modules[module].__file__).read_bytes()).hexdigest()
+        return _sources[module]
+
+
+def depends_on(*states):
+    """Decorator: the figure also depends on ``state()`` of every callable in ``states``."""
+    def decorate(draw):
+        draw.cache_states = states
+        return draw
+    return decorate
+
+
+def _remember(key, png):
+    global _size
+    with _lock:
+        if key in _images:
+            _images.move_to_end(key)
+            return
+        _images[key] = png
+        _size += len(png)
+        while _size > MAX_BYTES and len(_images) > 1:
+            _, evicted = _images.popitem(last=False)
+            _size -= len(evicted)
+
+
+def _lookup(key):
+    with _lock:
+        png = _images.get(key)
+        if png is not None:
+            _images.move_to_end(key)
+            return png
+
+    if CACHE_DIR:
+        path = Path(CACHE_DIR) / f"{key}.png"
+        if path.exists():
+            png = path.read_bytes()
+            _remember(key, png)
+            return png
+    return None
+
+
+def figure_to_png(fig):
+    import matplotlib.pyplot as plt
+    buffer = io.BytesIO()
+    fig.savefig(buffer, **SAVEFIG_KWARGS)
+    plt.close(fig)
+    return buffer.getvalue()
+
+
+def render(name, draw, *args, **kwargs):
+    """PNG bytes of the figure returned by ``draw(*args, **kwargs)``, cached."""
+    with tracing.span(f"figure:{name}"):
+        states = [state() for state in getattr(draw, "cache_states", ())]
+        key = fingerprint(CACHE_VERSION, MATPLOTLIB_VERSION, name, _source(draw), states, args, kwargs)
+        png = _lookup(key)
+        if png is not None:
+            return png
+
+        with tracing.span("draw"):
+            fig = draw(*args, **kwargs)
+        with tracing.span("savefig"):
+            png = figure_to_png(fig)
+        _remember(key, png)
+
+        if CACHE_DIR:
+            directory = Path(CACHE_DIR)
+            directory.mkdir(parents=True, exist_ok=True)
+            tmp = directory / f"{key}.png.tmp"
+            tmp.write_bytes(png)
+            os.replace(tmp, directory / f"{key}.png")
+        return png
+
+
+def clear():
+    global _size
+    with _lock:
+        _images.clear()
+        _size = 0
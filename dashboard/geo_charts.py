@@ -0,0 +1,77 @@
+"""Map figures for the Geographics section.
+
+Coordinates are projected to Web Mercator (EPSG:3857) with plain numpy, so
+drawing a map needs neither geopandas nor shapely. The background comes from
+the offline tile store.
+"""
+import numpy as np
+from matplotlib.collections import PolyCollection
+from matplotlib.colors import LogNorm
+
+import charts
+import figure_cache
+import tile_store
+
+
+def to_mercator(lat, lng):
+    """WGS 84 lat/lng arrays -> EPSG:3857 x/y arrays."""
+    lat = np.clip(np.asarray(lat, dtype="float64"), -85.0511, 85.0511)
+    x = np.asarray(lng, dtype="float64") * tile_store.EARTH_HALF_CIRCUMFERENCE / 180.0
+    y = np.log(np.tan(np.radians(90.0 + lat) / 2.0)) * tile_store.EARTH_HALF_CIRCUMFERENCE / np.pi
+    return x, y
+
+
+@figure_cache.depends_on(tile_store.state)
+def points_map_fig(points, title, markersize):
+    """Scatter of ``points`` (geolocation_lat/geolocation_lng) over the offline OSM basemap."""
+    plt, _ = charts.pyplot()
+    x, y = to_mercator(points["geolocation_lat"], points["geolocation_lng"])
+
+    # Plot the locations, shaded along the row order like GeoDataFrame.plot(cmap=...)
+    fig, ax = plt.subplots(figsize=(10, 6))
+    ax.scatter(x, y, s=markersize, c=np.arange(len(x)), cmap="Reds", alpha=0.5)
+
+    # Add basemap from the local tile store
+    tile_store.add_basemap(ax)
+    # Add title
+    ax.set_title(title)
+    return fig
+
+
+@figure_cache.depends_on(tile_store.state)
+def grid_map_fig(cells, resolution, weight, title):
+    """Grid cells (from geo_grid.select_cells) shaded by ``weight`` over the offline OSM basemap."""
+    plt, _ = charts.pyplot()
+    # Cell corners in Web Mercator
+    x0, y0 = to_mercator(cells["cell_lat"], cells["cell_lng"])
+    x1, y1 = to_mercator(cells["cell_lat"] + resolution, cells["cell_lng"] + resolution)
+    polygons = np.stack([
+        np.column_stack([x0, y0]), np.column_stack([x1, y0]),
+        np.column_stack([x1, y1]), np.column_stack([x0, y1]),
+    ], axis=1)
+
+    # Plot the cells, the darker the red the higher the count
+    fig, ax = plt.subplots(figsize=(10, 6))
+    values = cells[weight].to_numpy()
+    low, high = (values.min(), values.max()) if len(values) else (1.0, 1.0)
+    collection = PolyCollection(
+        polygons, array=values, cmap="Reds", alpha=0.7, edgecolors="none",
+        norm=LogNorm(vmin=max(low, 1e-3), vmax=max(high, 1e-3)),
+    )
+    ax.add_collection(collection)
+    if len(values):
+        ax.set_xlim(x0.min(), x1.max())
+        ax.set_ylim(y0.min(), y1.max())
+    else:
+        # No cells: show the empty basemap of Brazil
+        west, south, east, north = tile_store.BRAZIL_BOUNDS
+        (left, right), (bottom, top) = to_mercator([south, north], [west, east])
+        ax.set_xlim(left, right)
+        ax.set_ylim(bottom, top)
+    fig.colorbar(collection, ax=ax, label=weight.replace("_", " ").capitalize())
+
+    # Add basemap from the local tile store
+    tile_store.add_basemap(ax)
+    # Add title
+    ax.set_title(title)
+    return fig
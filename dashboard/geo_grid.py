@@ -0,0 +1,66 @@
+"""Multi-resolution lat/lng grid counts for the Geographics maps.
+
+Points are binned once, at build time, into square cells of every size in
+``RESOLUTIONS`` (degrees). The dashboard then draws cells instead of raw
+points: ``select_cells`` picks the finest resolution that keeps the current
+extent under ``MAX_CELLS_ACROSS`` cells and sums the counts per cell, so the
+work per request depends on the number of cells, not on the number of rows.
+"""
+import numpy as np
+import pandas as pd
+
+RESOLUTIONS = (1.0, 0.5, 0.2, 0.1, 0.05, 0.02)
+MAX_CELLS_ACROSS = 120
+
+
+def grid_counts(points, weight, by=(), resolutions=RESOLUTIONS):
+    """Sum ``weight`` per grid cell for every resolution.
+
+    ``points`` has geolocation_lat/geolocation_lng, the ``weight`` column and
+    the optional ``by`` columns to keep (e.g. customer_city). The result has
+    one row per (resolution, *by, cell) with the cell's south-west corner in
+    cell_lat/cell_lng.
+    """
+    lat = points["geolocation_lat"].to_numpy()
+    lng = points["geolocation_lng"].to_numpy()
+    by = list(by)
+
+    frames = []
+    for resolution in resolutions:
+        cells = points[by + [weight]].copy()
+        cells["cell_row"] = np.floor(lat / resolution).astype("int32")
+        cells["cell_col"] = np.floor(lng / resolution).astype("int32")
+        cells = cells.groupby(by + ["cell_row", "cell_col"], sort=False)[weight].sum().reset_index()
+        cells.insert(0, "resolution", resolution)
+        cells["cell_lat"] = (cells.pop("cell_row") * resolution).round(6)
+        cells["cell_lng"] = (cells.pop("cell_col") * resolution).round(6)
+        frames.append(cells)
+
+    return pd.concat(frames, ignore_index=True)[["resolution"] + by + ["cell_lat", "cell_lng", weight]]
+
+
+def pick_resolution(cells, max_cells_across=MAX_CELLS_ACROSS):
+    """Finest resolution whose cells span the extent of ``cells`` in at most
+    ``max_cells_across`` columns and rows."""
+    coarsest = cells[cells["resolution"] == max(RESOLUTIONS)]
+    if coarsest.empty:
+        return max(RESOLUTIONS)
+    lat_span = coarsest["cell_lat"].max() - coarsest["cell_lat"].min() + max(RESOLUTIONS)
+    lng_span = coarsest["cell_lng"].max() - coarsest["cell_lng"].min() + max(RESOLUTIONS)
+    for resolution in sorted(RESOLUTIONS):
+        if max(lat_span, lng_span) / resolution <= max_cells_across:
+            return resolution
+    return max(RESOLUTIONS)
+
+
+def select_cells(cells, weight, resolution=None):
+    """Cells of one resolution with ``weight`` summed over the other columns.
+
+    Returns (cells, resolution); the resolution is picked from the extent of
+    ``cells`` when not given.
+    """
+    if resolution is None:
+        resolution = pick_resolution(cells)
+    selected = cells[cells["resolution"] == resolution]
+    selected = selected.groupby(["cell_lat", "cell_lng"], as_index=False)[weight].sum()
+    return selected, resolution
@@ -0,0 +1,7 @@
+"""Artifact build pipeline for the dashboard.
+
+Run from the ``dashboard`` directory::
+
+    python -m pipeline            # build everything that is out of date
+    python -m pipeline geo --force
+"""
@@ -0,0 +1,379 @@
+"""Incremental, parallel build of the dashboard artifacts.
+
+Each stage gets a fingerprint from the content hash of its raw input files,
+the source code of its function (with the helpers and project modules it uses,
+see ``code_digest``) and the fingerprints of the stages it depends on. A stage
+is skipped when its fingerprint matches the one recorded in the build manifest
+and its outputs still exist. The manifest also maps every output to the
+fingerprint it was last written with, which identifies the published data by
+content (snapshot.py keys its snapshots on it).
+
+Stale stages run in a process pool. A stage is submitted as soon as the stages
+it depends on have finished, so the product, store and geo stages build
+concurrently and no stage waits for unrelated ones.
+"""
+import argparse
+import contextlib
+import hashlib
+import inspect
+import json
+import os
+import sys
+import time
+import types
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from pathlib import Path
+
+import pandas as pd
+
+import tracing
+
+from .profile import REPORT_NAME, QualityError, check, profile, write_report
+from .raw import RAW_DIR, RAW_TABLES, raw_path, read_raw
+from .stages import STAGES
+
+OUT_DIR = Path(__file__).resolve().parent.parent
+# Modules under the dashboard directory (the dashboard and the pipeline) count as stage code
+PROJECT_DIR = OUT_DIR
+BUILD_DIR_NAME = ".build"
+MANIFEST_NAME = "manifest.json"
+
+
+def _build_dir(out_dir):
+    return Path(out_dir) / BUILD_DIR_NAME
+
+
+def load_manifest(out_dir=OUT_DIR):
+    path = _build_dir(out_dir) / MANIFEST_NAME
+    if not path.exists():
+        return {"files": {}, "stages": {}, "outputs": {}}
+    with open(path) as f:
+        manifest = json.load(f)
+    manifest.setdefault("outputs", {})
+    return manifest
+
+
+def save_manifest(manifest, out_dir=OUT_DIR):
+    build_dir = _build_dir(out_dir)
+    build_dir.mkdir(parents=True, exist_ok=True)
+    tmp = build_dir / (MANIFEST_NAME + ".tmp")
+    with open(tmp, "w") as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    os.replace(tmp, build_dir / MANIFEST_NAME)
+
+
+def file_digest(path, manifest):
+    """sha256 of ``path``, re-hashed only when its size or mtime changed."""
+    stat = os.stat(path)
+    key = str(Path(path).resolve())
+    cached = manifest["files"].get(key)
+    if cached and cached["size"] == stat.st_size and cached["mtime_ns"] == stat.st_mtime_ns:
+        return cached["sha256"]
+
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    manifest["files"][key] = {
+        "size": stat.st_size,
+        "mtime_ns": stat.st_mtime_ns,
+        "sha256": digest.hexdigest(),
+    }
+    return digest.hexdigest()
+
+
+def topological_order(names=None):
+    """Stage names in dependency order, limited to ``names`` and their deps."""
+    wanted = set(names or STAGES)
+    order, seen = [], set()
+
+    def visit(name):
+        if name in seen:
+            return
+        if name not in STAGES:
+            raise KeyError(f"unknown stage {name!r}")
+        seen.add(name)
+        for dep in STAGES[name]["deps"]:
+            visit(dep)
+        order.append(name)
+
+    for name in STAGES:
+        if name in wanted:
+            visit(name)
+    for name in wanted - seen:
+        visit(name)
+    return order
+
+
+def _names(code):
+    """Global names used by ``code`` and the functions and comprehensions nested in it."""
+    names = set(code.co_names)
+    for const in code.co_consts:
+        if isinstance(const, types.CodeType):
+            names |= _names(const)
+    return names
+
+
+def _project_module(value, name):
+    """The project module ``value`` comes from, or None for library and builtin values."""
+    module = value if inspect.ismodule(value) else inspect.getmodule(value)
+    if module is None:
+        # Imported constants (``from star_buckets import STAR_BANDS``) do not know their module
+        module = next((candidate for candidate in list(sys.modules.values())
+                       if getattr(candidate, name, None) is value and _is_project(candidate)), None)
+    return module if module is not None and _is_project(module) else None
+
+
+def _is_project(module):
+    file = getattr(module, "__file__", None)
+    return file is not None and PROJECT_DIR in Path(file).resolve().parents
+
+
+def _stage_code(func):
+    """(functions, modules) of a stage: ``func`` and the functions of its module
+    it calls, and every other project module they use, with the project modules
+    those import."""
+    home = inspect.getmodule(func)
+    functions, modules = set(), {}
+    pending_functions, pending_modules = [func], []
+    while pending_functions:
+        function = pending_functions.pop()
+        if function in functions:
+            continue
+        functions.add(function)
+        for name in _names(function.__code__) & function.__globals__.keys():
+            value = function.__globals__[name]
+            module = _project_module(value, name)
+            if module is home and inspect.isfunction(value):
+                pending_functions.append(value)
+            elif module is not None and module is not home:
+                pending_modules.append(module)
+
+    while pending_modules:
+        module = pending_modules.pop()
+        if module.__name__ in modules:
+            continue
+        modules[module.__name__] = module
+        for name, value in vars(module).items():
+            if inspect.ismodule(value) or callable(value):
+                dependency = _project_module(value, name)
+                if dependency is not None and dependency is not home:
+                    pending_modules.append(dependency)
+    return functions, modules
+
+
+def code_digest(func):
+    """Digest of the code a stage runs (see ``_stage_code``); library code is left out."""
+    functions, modules = _stage_code(func)
+    digest = hashlib.sha256()
+    for function in sorted(functions, key=lambda function: function.__qualname__):
+        digest.update(inspect.getsource(function).encode())
+    for name in sorted(modules):
+        digest.update(name.encode())
+        digest.update(Path(modules[name].__file__).read_bytes())
+    return digest.hexdigest()
+
+
+def fingerprints(order, manifest, raw_dir=None):
+    result = {}
+    for name in order:
+        stage = STAGES[name]
+        digest = hashlib.sha256()
+        digest.update(name.encode())
+        digest.update(code_digest(stage["func"]).encode())
+        for table in stage["raw"]:
+            digest.update(repr(RAW_TABLES[table]).encode())
+            digest.update(file_digest(raw_path(table, raw_dir), manifest).encode())
+        for dep in stage["deps"]:
+            digest.update(result[dep].encode())
+        result[name] = digest.hexdigest()
+    return result
+
+
+def output_paths(output, publish, out_dir=OUT_DIR):
+    """Where an output is written: always a pickle in the build directory (read
+    by downstream stages), plus ``<output>.csv`` next to the dashboard when the
+    stage publishes it."""
+    paths = [_build_dir(out_dir) / f"{output}.pkl"]
+    if publish:
+        paths.append(Path(out_dir) / f"{output}.csv")
+    return paths
+
+
+def _is_fresh(name, fingerprint, manifest, out_dir):
+    stage = STAGES[name]
+    recorded = manifest["stages"].get(name, {})
+    if recorded.get("fingerprint") != fingerprint:
+        return False
+    return all(
+        path.exists()
+        for output in stage["outputs"]
+        for path in output_paths(output, stage["publish"], out_dir)
+    )
+
+
+def write_outputs(results, publish, out_dir=OUT_DIR):
+    """Write every frame of ``results`` to its output paths (atomically); returns rows per output."""
+    rows = {}
+    for output, frame in results.items():
+        for path in output_paths(output, publish, out_dir):
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = path.with_name(path.name + ".tmp")
+            if path.suffix == ".csv":
+                frame.to_csv(tmp, index=False)
+            else:
+                frame.to_pickle(tmp)
+            os.replace(tmp, path)
+        rows[output] = len(frame)
+    return rows
+
+
+def check_raw(tables, manifest, raw_dir=None, out_dir=OUT_DIR, jobs=None, log=print):
+    """Profile the raw ``tables`` (pipeline/profile.py) and check them against
+    their thresholds; raises QualityError when any check fails.
+
+    The report is kept in the build directory, and a table whose file did not
+    change keeps its profile from there.
+    """
+    path = _build_dir(out_dir) / REPORT_NAME
+    report = json.loads(path.read_text()) if path.exists() else {}
+    digests = {table: file_digest(raw_path(table, raw_dir), manifest) for table in tables}
+    changed = [table for table in tables if report.get(table, {}).get("sha256") != digests[table]]
+    if changed:
+        for table, stats in profile(changed, raw_dir, jobs or os.cpu_count()).items():
+            report[table] = dict(stats, sha256=digests[table])
+            log(f"[profile] {table} in {stats['seconds']:.2f}s")
+        write_report(report, path)
+
+    failures = check({table: report[table] for table in tables})
+    for failure in failures:
+        log(f"[quality] {failure}")
+    if failures:
+        raise QualityError(f"{len(failures)} data-quality checks failed, see {path}")
+
+
+def run_stage(name, raw_dir=None, out_dir=OUT_DIR, trace=False):
+    """Run one stage in the current process and write its outputs.
+
+    With ``trace`` the stage is timed in spans (see tracing.py), returned
+    last; otherwise that is an empty list.
+    """
+    stage = STAGES[name]
+    start = time.perf_counter()
+    stage_trace = tracing.Trace(f"stage:{name}") if trace else None
+
+    with stage_trace or contextlib.nullcontext():
+        with tracing.span("read"):
+            if stage.get("stream"):
+                tables = {table: raw_path(table, raw_dir) for table in stage["raw"]}
+            else:
+                tables = {table: read_raw(table, raw_dir) for table in stage["raw"]}
+            for dep in stage["deps"]:
+                for output in STAGES[dep]["outputs"]:
+                    tables[output] = pd.read_pickle(_build_dir(out_dir) / f"{output}.pkl")
+
+        with tracing.span("compute"):
+            results = stage["func"](tables)
+        with tracing.span("write"):
+            rows = write_outputs({output: results[output] for output in stage["outputs"]}, stage["publish"], out_dir)
+
+    return name, time.perf_counter() - start, rows, stage_trace.spans if trace else []
+
+
+def build(stages=None, force=False, jobs=None, dry_run=False, raw_dir=None, out_dir=OUT_DIR, log=print,
+          trace=None, checks=True, snapshots=False):
+    """Bring the requested stages (default: all) up to date.
+
+    With ``checks`` the raw tables of the stale stages are profiled and
+    checked first (see check_raw), so nothing is published from data that
+    fails them. With ``snapshots`` every dashboard section is then pre-rendered
+    from the published files into ``<out_dir>/.snapshots`` (see snapshot.py).
+    ``trace`` is a path the spans of the stages that ran are written to, in
+    Chrome trace format for ``.json`` and as JSON lines otherwise.
+    Returns the list of stage names that were run.
+    """
+    manifest = load_manifest(out_dir)
+    order = topological_order(stages)
+    prints = fingerprints(order, manifest, raw_dir)
+
+    stale = [name for name in order if force or not _is_fresh(name, prints[name], manifest, out_dir)]
+    for name in order:
+        if name not in stale:
+            log(f"[skip] {name}")
+            # Manifests written before outputs were recorded
+            for output in STAGES[name]["outputs"]:
+                manifest["outputs"].setdefault(output, prints[name])
+    save_manifest(manifest, out_dir)
+
+    if dry_run:
+        for name in stale:
+            log(f"[stale] {name}")
+        return stale
+
+    if checks and stale:
+        raw_tables = sorted({table for name in stale for table in STAGES[name]["raw"]})
+        try:
+            check_raw(raw_tables, manifest, raw_dir, out_dir, jobs, log)
+        finally:
+            save_manifest(manifest, out_dir)
+
+    pending = list(stale)
+    done = set(order) - set(stale)
+    spans = []
+    with ProcessPoolExecutor(max_workers=jobs) as pool:
+        running = set()
+        while pending or running:
+            # Submit every stage whose dependencies are done, as soon as they are
+            ready = [name for name in pending if all(dep in done for dep in STAGES[name]["deps"])]
+            for name in ready:
+                running.add(pool.submit(run_stage, name, raw_dir, out_dir, bool(trace)))
+                pending.remove(name)
+            finished, running = wait(running, return_when=FIRST_COMPLETED)
+            for future in finished:
+                name, elapsed, rows, stage_spans = future.result()
+                spans.extend(stage_spans)
+                manifest["stages"][name] = {"fingerprint": prints[name], "rows": rows}
+                manifest["outputs"].update(dict.fromkeys(rows, prints[name]))
+                save_manifest(manifest, out_dir)
+                log(f"[done] {name} in {elapsed:.2f}s {rows}")
+                done.add(name)
+
+    if trace:
+        tracing.write(spans, trace)
+        log(f"[trace] {trace}")
+
+    if snapshots:
+        import data_loader
+        import snapshot
+        data_loader.DATA_DIR = Path(out_dir)
+        snapshot.build(Path(out_dir) / snapshot.SNAPSHOT_DIR.name, log)
+    return stale
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m pipeline", description="Build the dashboard artifacts.")
+    parser.add_argument("stages", nargs="*", help=f"stages to build (default: all of {', '.join(STAGES)})")
+    parser.add_argument("--force", action="store_true", help="rebuild even when inputs are unchanged")
+    parser.add_argument("--jobs", "-j", type=int, default=None, help="worker processes (default: CPU count)")
+    parser.add_argument("--dry-run", action="store_true", help="only list the stages that would run")
+    parser.add_argument("--raw-dir", default=str(RAW_DIR), help="directory with the raw dataset CSVs")
+    parser.add_argument("--out-dir", default=str(OUT_DIR), help="directory the artifacts are written to")
+    parser.add_argument("--trace", help="write stage timings here (.json: Chrome trace format, else JSON lines)")
+    parser.add_argument("--skip-checks", action="store_true", help="do not profile and check the raw tables")
+    parser.add_argument("--snapshots", action="store_true", help="pre-render the dashboard sections afterwards")
+    args = parser.parse_args(argv)
+
+    try:
+        build(
+            stages=args.stages or None,
+            force=args.force,
+            jobs=args.jobs,
+            dry_run=args.dry_run,
+            raw_dir=args.raw_dir,
+            out_dir=args.out_dir,
+            trace=args.trace,
+            checks=not args.skip_checks,
+            snapshots=args.snapshots,
+        )
+    except QualityError as error:
+        parser.exit(1, f"{error}\n")
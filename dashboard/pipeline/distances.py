@@ -0,0 +1,61 @@
+"""Great-circle distances between sellers and customers.
+
+Distances are computed with the haversine formula over whole coordinate
+arrays. Nearest-seller and sellers-within-radius queries go through a KD-tree
+(``scipy.spatial.cKDTree``) of the sellers' positions as 3-D unit vectors, in
+which the straight-line (chord) distance grows with the great-circle distance,
+so Euclidean tree queries answer great-circle ones.
+"""
+import numpy as np
+from scipy.spatial import cKDTree
+
+EARTH_RADIUS_KM = 6371.0088
+
+# Distance bands of the shipped items, in km
+BAND_EDGES = (0, 50, 200, 500, 1000, 2000)
+BAND_LABELS = ("< 50 km", "50-200 km", "200-500 km", "500-1000 km", "1000-2000 km", "2000+ km")
+
+# Radii of the sellers-within-radius counts, in km
+RADII_KM = (100, 500)
+
+
+def haversine_km(lat1, lng1, lat2, lng2):
+    """Great-circle distance in km between arrays of points given in degrees."""
+    lat1, lng1, lat2, lng2 = (np.radians(np.asarray(values, dtype="float64")) for values in (lat1, lng1, lat2, lng2))
+    a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lng2 - lng1) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.clip(a, 0, 1)))
+
+
+def unit_vectors(lat, lng):
+    """(n, 3) unit vectors of points given in degrees."""
+    lat, lng = np.radians(np.asarray(lat, dtype="float64")), np.radians(np.asarray(lng, dtype="float64"))
+    return np.column_stack([np.cos(lat) * np.cos(lng), np.cos(lat) * np.sin(lng), np.sin(lat)])
+
+
+def _chord(km):
+    return 2 * np.sin(np.asarray(km, dtype="float64") / (2 * EARTH_RADIUS_KM))
+
+
+def _arc_km(chord):
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.clip(np.asarray(chord) / 2, 0, 1))
+
+
+def band_codes(km):
+    """Index of each distance in BAND_LABELS."""
+    return np.searchsorted(BAND_EDGES, km, side="right") - 1
+
+
+class SellerTree:
+    """KD-tree of seller positions for nearest and within-radius queries by great-circle distance."""
+
+    def __init__(self, lat, lng):
+        self.tree = cKDTree(unit_vectors(lat, lng))
+
+    def nearest_km(self, lat, lng):
+        """Distance in km from every point to its nearest seller."""
+        chord, _ = self.tree.query(unit_vectors(lat, lng), k=1)
+        return _arc_km(chord)
+
+    def count_within(self, lat, lng, km):
+        """Number of sellers within ``km`` of every point."""
+        return self.tree.query_ball_point(unit_vectors(lat, lng), _chord(km), return_length=True)
@@ -0,0 +1,304 @@
+"""Incremental refresh of the dashboard aggregates from batches of new rows.
+
+The aggregate state lives in a SQLite database (``.build/state.sqlite`` by
+default): the orders, items and reviews seen so far, indexed by order, the
+review summary of every order, per-product and per-seller items / review
+count / sum / min / max, and orders per city. ``ingest`` applies one batch of
+new customer, order, item, review and product rows, using only indexed
+lookups on the keys in the batch, and re-emits the artifacts from the state:
+
+    cd dashboard
+    python -m pipeline.incremental init                 # state from the full raw dataset
+    python -m pipeline.incremental ingest path/to/batch # apply a batch of new rows
+
+A batch is a directory with any subset of the raw CSV files (same names and
+columns as the raw dataset). Rows already in the state are skipped. Rows may
+arrive in any order: an item counts once its order is known, an order counts
+for its city once its customer is known, and a late review is added to every
+item of its order that was already counted.
+"""
+import argparse
+import hashlib
+import sqlite3
+import time
+from pathlib import Path
+
+import pandas as pd
+
+from .build import OUT_DIR, _build_dir, load_manifest, save_manifest, write_outputs
+from .joins import is_detailed, scores_frame
+from .raw import RAW_DIR, RAW_TABLES, raw_path, read_raw
+from .stages import build_review_sketches
+
+STATE_NAME = "state.sqlite"
+
+# batch table -> (raw columns read, primary key)
+BATCH_TABLES = {
+    "customers": (["customer_id", "customer_city"], ["customer_id"]),
+    "orders": (["order_id", "customer_id"], ["order_id"]),
+    "order_items": (["order_id", "order_item_id", "product_id", "seller_id"], ["order_id", "order_item_id"]),
+    "order_reviews": (["review_id", "order_id", "review_score"], ["review_id", "order_id"]),
+    "products": (["product_id", "detailed"], ["product_id"]),
+}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS customers (customer_id TEXT PRIMARY KEY, customer_city TEXT);
+CREATE TABLE IF NOT EXISTS orders (order_id TEXT PRIMARY KEY, customer_id TEXT);
+CREATE INDEX IF NOT EXISTS orders_customer ON orders (customer_id);
+CREATE TABLE IF NOT EXISTS order_items (
+    order_id TEXT, order_item_id INTEGER, product_id TEXT, seller_id TEXT,
+    PRIMARY KEY (order_id, order_item_id)
+);
+CREATE TABLE IF NOT EXISTS order_reviews (
+    review_id TEXT, order_id TEXT, review_score REAL,
+    PRIMARY KEY (review_id, order_id)
+);
+CREATE TABLE IF NOT EXISTS products (product_id TEXT PRIMARY KEY, detailed INTEGER);
+CREATE TABLE IF NOT EXISTS review_summary (
+    order_id TEXT PRIMARY KEY, review_count INTEGER, review_sum REAL, review_min REAL, review_max REAL
+);
+CREATE TABLE IF NOT EXISTS city_orders (customer_city TEXT PRIMARY KEY, orders INTEGER);
+CREATE TABLE IF NOT EXISTS product_scores (
+    product_id TEXT PRIMARY KEY, items INTEGER, review_count INTEGER, review_sum REAL, review_min REAL, review_max REAL
+);
+CREATE TABLE IF NOT EXISTS seller_scores (
+    seller_id TEXT PRIMARY KEY, items INTEGER, review_count INTEGER, review_sum REAL, review_min REAL, review_max REAL
+);
+"""
+
+# Contributions of a batch to the per-key scores, evaluated after the new rows
+# are inserted (new_* tables hold the rows that were not in the state before)
+CONTRIBUTIONS = """
+CREATE TEMP TABLE contributions AS
+-- items counted for the first time: new items of known orders ...
+SELECT i.product_id, i.seller_id, 1 AS items,
+       COALESCE(r.review_count, 0) AS review_count, COALESCE(r.review_sum, 0) AS review_sum,
+       r.review_min, r.review_max
+FROM new_order_items i
+JOIN orders o ON o.order_id = i.order_id
+LEFT JOIN review_summary r ON r.order_id = i.order_id
+UNION ALL
+-- ... and known items of new orders
+SELECT i.product_id, i.seller_id, 1, COALESCE(r.review_count, 0), COALESCE(r.review_sum, 0), r.review_min, r.review_max
+FROM new_orders o
+JOIN order_items i ON i.order_id = o.order_id
+LEFT JOIN review_summary r ON r.order_id = i.order_id
+WHERE NOT EXISTS (
+    SELECT 1 FROM new_order_items n WHERE n.order_id = i.order_id AND n.order_item_id = i.order_item_id
+)
+UNION ALL
+-- items counted before that get new (possibly late) reviews
+SELECT i.product_id, i.seller_id, 0, r.review_count, r.review_sum, r.review_min, r.review_max
+FROM new_review_summary r
+JOIN orders o ON o.order_id = r.order_id
+JOIN order_items i ON i.order_id = r.order_id
+WHERE NOT EXISTS (SELECT 1 FROM new_orders n WHERE n.order_id = r.order_id)
+  AND NOT EXISTS (
+    SELECT 1 FROM new_order_items n WHERE n.order_id = i.order_id AND n.order_item_id = i.order_item_id
+);
+"""
+
+# Orders that count for a city for the first time
+CITY_CONTRIBUTIONS = """
+CREATE TEMP TABLE city_contributions AS
+SELECT c.customer_city
+FROM new_orders o
+JOIN customers c ON c.customer_id = o.customer_id
+UNION ALL
+SELECT c.customer_city
+FROM new_customers c
+JOIN orders o ON o.customer_id = c.customer_id
+WHERE NOT EXISTS (SELECT 1 FROM new_orders n WHERE n.order_id = o.order_id);
+"""
+
+MERGE_SCORES = """
+INSERT INTO {table}
+SELECT {key}, SUM(items), SUM(review_count), SUM(review_sum), MIN(review_min), MAX(review_max)
+FROM contributions WHERE {key} IS NOT NULL GROUP BY {key}
+ON CONFLICT ({key}) DO UPDATE SET
+    items = items + excluded.items,
+    review_count = review_count + excluded.review_count,
+    review_sum = review_sum + excluded.review_sum,
+    review_min = MIN(COALESCE(review_min, excluded.review_min), COALESCE(excluded.review_min, review_min)),
+    review_max = MAX(COALESCE(review_max, excluded.review_max), COALESCE(excluded.review_max, review_max))
+"""
+
+# output -> (state table, key)
+SCORE_TABLES = {"score_per_product": ("product_scores", "product_id"), "score_per_store": ("seller_scores", "seller_id")}
+
+
+def state_path(out_dir=OUT_DIR):
+    return _build_dir(out_dir) / STATE_NAME
+
+
+def connect(path):
+    Path(path).parent.mkdir(parents=True, exist_ok=True)
+    connection = sqlite3.connect(path)
+    connection.executescript(SCHEMA)
+    return connection
+
+
+def read_batch(batch_dir):
+    """The batch tables present in ``batch_dir``, reduced to the columns the state keeps."""
+    batch = {}
+    for name, (columns, _) in BATCH_TABLES.items():
+        if not raw_path(name, batch_dir).exists():
+            continue
+        if name == "products":
+            products = read_raw(name, batch_dir)
+            # Same rule as build_product_detail
+            frame = pd.DataFrame({
+                "product_id": products["product_id"],
+                "detailed": is_detailed(products).astype("int64"),
+            })
+        else:
+            frame = read_raw(name, batch_dir, usecols=columns)[columns]
+        batch[name] = frame
+    return batch
+
+
+def _load_new_rows(connection, name, frame):
+    """Put the rows of ``frame`` that are not in the state yet into temp table new_<name>."""
+    columns, key = BATCH_TABLES[name]
+    column_list = ", ".join(columns)
+    connection.execute(f"CREATE TEMP TABLE batch_{name} ({column_list})")
+    connection.executemany(
+        f"INSERT INTO batch_{name} VALUES ({', '.join('?' * len(columns))})",
+        frame.astype(object).where(frame.notna(), None).itertuples(index=False, name=None),
+    )
+    matches = " AND ".join(f"s.{column} = b.{column}" for column in key)
+    connection.execute(f"CREATE TEMP TABLE new_{name} ({column_list}, PRIMARY KEY ({', '.join(key)}))")
+    # OR IGNORE keeps the first of duplicate rows within the batch
+    connection.execute(
+        f"INSERT OR IGNORE INTO new_{name} SELECT * FROM batch_{name} b "
+        f"WHERE NOT EXISTS (SELECT 1 FROM {name} s WHERE {matches})"
+    )
+    connection.execute(f"INSERT INTO {name} SELECT * FROM new_{name}")
+
+
+def ingest(connection, batch):
+    """Apply one batch (table name -> DataFrame) to the state; returns new rows per table."""
+    with connection:
+        for name in BATCH_TABLES:
+            frame = batch.get(name, pd.DataFrame(columns=BATCH_TABLES[name][0]))
+            _load_new_rows(connection, name, frame)
+
+        connection.executescript("""
+            CREATE TEMP TABLE new_review_summary (
+                order_id TEXT PRIMARY KEY, review_count INTEGER, review_sum REAL, review_min REAL, review_max REAL
+            );
+            INSERT INTO new_review_summary
+            SELECT order_id, COUNT(*), SUM(review_score), MIN(review_score), MAX(review_score)
+            FROM new_order_reviews WHERE review_score IS NOT NULL GROUP BY order_id;
+
+            INSERT INTO review_summary SELECT * FROM new_review_summary WHERE true
+            ON CONFLICT (order_id) DO UPDATE SET
+                review_count = review_count + excluded.review_count,
+                review_sum = review_sum + excluded.review_sum,
+                review_min = MIN(review_min, excluded.review_min),
+                review_max = MAX(review_max, excluded.review_max);
+        """)
+
+        connection.executescript(CONTRIBUTIONS)
+        for table, key in SCORE_TABLES.values():
+            connection.execute(MERGE_SCORES.format(table=table, key=key))
+
+        connection.executescript(CITY_CONTRIBUTIONS + """
+            -- Cities whose customers have no order yet still show up with 0, like the left merge
+            INSERT INTO city_orders SELECT customer_city, 0 FROM new_customers WHERE customer_city IS NOT NULL
+            ON CONFLICT (customer_city) DO NOTHING;
+            INSERT INTO city_orders
+            SELECT customer_city, COUNT(*) FROM city_contributions WHERE customer_city IS NOT NULL GROUP BY customer_city
+            ON CONFLICT (customer_city) DO UPDATE SET orders = orders + excluded.orders;
+        """)
+
+        counts = {
+            name: connection.execute(f"SELECT COUNT(*) FROM new_{name}").fetchone()[0]
+            for name in BATCH_TABLES
+        }
+        for table in ["contributions", "city_contributions", "new_review_summary"] + [
+            f"{prefix}_{name}" for name in BATCH_TABLES for prefix in ("batch", "new")
+        ]:
+            connection.execute(f"DROP TABLE temp.{table}")
+    return counts
+
+
+def _score_state(connection, query, key):
+    return pd.read_sql_query(query, connection).set_index(key)
+
+
+def artifacts(connection):
+    """The dashboard artifacts as of the current state."""
+    outputs = {
+        "order_per_city": pd.read_sql_query(
+            "SELECT customer_city, orders AS order_id FROM city_orders ORDER BY orders DESC, customer_city",
+            connection,
+        ),
+    }
+    for output, (table, key) in SCORE_TABLES.items():
+        outputs[output] = scores_frame(_score_state(
+            connection, f"SELECT * FROM {table} WHERE items > 0 ORDER BY {key}", key
+        ))
+
+    # Items of products missing from the products table count as non-detailed,
+    # like the NaN columns of the notebook's left merge
+    for prefix, condition in (("detailed", "p.detailed = 1"), ("non_detailed", "COALESCE(p.detailed, 0) = 0")):
+        state = _score_state(connection, (
+            "SELECT s.* FROM product_scores s LEFT JOIN products p ON p.product_id = s.product_id "
+            f"WHERE s.items > 0 AND {condition} ORDER BY s.product_id"
+        ), "product_id")
+        outputs[f"{prefix}_product_review"] = scores_frame(state, count=False)
+        outputs[f"{prefix}_product_sales"] = pd.DataFrame({
+            "product_id": state.index.to_numpy(),
+            "order_id": state["items"].to_numpy(),
+        })
+    outputs.update(build_review_sketches(outputs))
+    return outputs
+
+
+def _content_digest(frame):
+    digest = hashlib.sha256(repr(list(frame.columns)).encode())
+    digest.update(pd.util.hash_pandas_object(frame, index=False).to_numpy().tobytes())
+    return digest.hexdigest()
+
+
+def refresh(batch_dir, out_dir=OUT_DIR, state=None, log=print):
+    """Ingest ``batch_dir`` into the state and re-emit the artifacts to ``out_dir``."""
+    start = time.perf_counter()
+    connection = connect(state or state_path(out_dir))
+    try:
+        counts = ingest(connection, read_batch(batch_dir))
+        log(f"[ingest] {batch_dir} {counts} in {time.perf_counter() - start:.2f}s")
+        outputs = artifacts(connection)
+        rows = write_outputs(outputs, publish=True, out_dir=out_dir)
+        # Outputs are fingerprinted by content here: there is no stage fingerprint for them
+        manifest = load_manifest(out_dir)
+        manifest["outputs"].update({output: _content_digest(frame) for output, frame in outputs.items()})
+        save_manifest(manifest, out_dir)
+        log(f"[emit] {rows} in {time.perf_counter() - start:.2f}s")
+    finally:
+        connection.close()
+    return counts
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m pipeline.incremental", description=__doc__.splitlines()[0])
+    parser.add_argument("--out-dir", default=str(OUT_DIR), help="directory the artifacts are written to")
+    parser.add_argument("--state", help=f"state database (default: <out-dir>/.build/{STATE_NAME})")
+    commands = parser.add_subparsers(dest="command", required=True)
+    init = commands.add_parser("init", help="rebuild the state from the full raw dataset")
+    init.add_argument("--raw-dir", default=str(RAW_DIR), help="directory with the raw dataset CSVs")
+    ingest_parser = commands.add_parser("ingest", help="apply a batch of new rows")
+    ingest_parser.add_argument("batch_dir", help=f"directory with any of {', '.join(RAW_TABLES[name][0] for name in BATCH_TABLES)}")
+    args = parser.parse_args(argv)
+
+    state = Path(args.state or state_path(args.out_dir))
+    if args.command == "init":
+        state.unlink(missing_ok=True)
+        refresh(args.raw_dir, args.out_dir, state)
+    else:
+        refresh(args.batch_dir, args.out_dir, state)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,143 @@
+"""Integer-keyed joins for the orders -> reviews -> items -> products chain.
+
+The notebook chained left merges on the hex ids, so an order with ``r``
+reviews and ``k`` items became ``r * k`` rows. Here the ids are dictionary
+encoded once, reviews are summarised per order (count, sum, min, max) and
+attached to the items by array lookup on the order code, so the joined table
+has exactly one row per order item.
+
+The per-key review max, min and mean come out the same as over the fanned-out
+rows (every review still counts once per item of its order); only the
+``order_id`` count changes, from items x reviews to items.
+"""
+import numpy as np
+import pandas as pd
+
+REVIEW_STATS = ["review_count", "review_sum", "review_min", "review_max"]
+
+
+def encode(keys, *columns):
+    """Codes of ``columns`` in the distinct values of ``keys``, -1 when missing.
+
+    Everything is factorized in one hash pass; ids first seen in ``keys`` get
+    the lowest codes, so anything above them is not a key. Returns the code
+    arrays and the distinct keys (code -> id).
+    """
+    lengths = [len(keys)] + [len(column) for column in columns]
+    codes, uniques = pd.factorize(np.concatenate([np.asarray(keys, dtype=object)]
+                                                 + [np.asarray(column, dtype=object) for column in columns]))
+    parts = np.split(codes, np.cumsum(lengths)[:-1])
+    n_keys = int(parts[0].max()) + 1 if len(parts[0]) else 0
+    for part in parts[1:]:
+        part[part >= n_keys] = -1
+    return parts[1:], pd.Index(uniques[:n_keys])
+
+
+def review_summary(order_codes, scores, n_orders):
+    """Per-order review count, sum, min and max as arrays indexed by order code.
+
+    ``order_codes`` are the review rows' order codes (-1 rows are dropped);
+    orders without a review get count 0 and NaN for the rest. The arrays have
+    one extra empty slot at the end, so looking up code -1 gives "no review".
+    """
+    scores = np.asarray(scores, dtype="float64")
+    keep = (order_codes >= 0) & ~np.isnan(scores)
+    stats = pd.DataFrame({"order": order_codes[keep], "score": scores[keep]})\
+        .groupby("order")["score"].agg(["count", "sum", "min", "max"])
+
+    summary = {
+        "review_count": np.zeros(n_orders + 1, dtype="int64"),
+        "review_sum": np.full(n_orders + 1, np.nan),
+        "review_min": np.full(n_orders + 1, np.nan),
+        "review_max": np.full(n_orders + 1, np.nan),
+    }
+    for column, stat in zip(REVIEW_STATS, ["count", "sum", "min", "max"]):
+        summary[column][stats.index.to_numpy()] = stats[stat].to_numpy()
+    return summary
+
+
+def is_detailed(products):
+    """Whether every column of each products row is filled (the detailed / non-detailed split).
+
+    Items of products missing from the products table count as non-detailed.
+    """
+    return products.notna().all(axis=1).to_numpy()
+
+
+def item_details(order_items, order_reviews, orders=None, keys=("product_id", "seller_id")):
+    """One row per order item with dictionary-encoded ids and its order's review summary.
+
+    ``order_id`` and the ``keys`` columns are categoricals, i.e. int codes into
+    one copy of each distinct id (the ``keys`` ids sorted).
+    Rows keep the order of ``order_items``. When ``orders`` is given, items of
+    orders missing from it are dropped, like the notebook's
+    ``orders.merge(...)`` chain did.
+    """
+    order_source = orders["order_id"] if orders is not None else order_items["order_id"]
+    (item_orders, review_orders), order_keys = encode(order_source, order_items["order_id"], order_reviews["order_id"])
+    summary = review_summary(review_orders, order_reviews["review_score"], len(order_keys))
+
+    keep = item_orders >= 0 if orders is not None else np.ones(len(item_orders), dtype=bool)
+    item_orders = item_orders[keep]
+    details = pd.DataFrame({"order_id": pd.Categorical.from_codes(item_orders, categories=order_keys)})
+    for key in keys:
+        details[key] = pd.Categorical(order_items[key].to_numpy()[keep])
+    for column in REVIEW_STATS:
+        details[column] = summary[column][item_orders]
+    return details
+
+
+# How each column of a score state combines with the same key in another state
+SCORE_STATE = {
+    "items": "sum",
+    "review_count": "sum",
+    "review_sum": "sum",
+    "review_min": "min",
+    "review_max": "max",
+}
+
+
+def score_state(details, key):
+    """Mergeable per-key state of ``item_details`` rows: items, review count, sum, min and max.
+
+    Indexed by the (decoded, sorted) ``key`` ids.
+    """
+    state = details.groupby(key, observed=True, sort=True).agg(
+        items=("order_id", "count"),
+        review_count=("review_count", "sum"),
+        review_sum=("review_sum", "sum"),
+        review_min=("review_min", "min"),
+        review_max=("review_max", "max"),
+    )
+    state.index = pd.Index(state.index.astype(object), name=key)
+    return state
+
+
+def merge_states(states):
+    """Combine score states computed over disjoint sets of items."""
+    states = list(states)
+    key = states[0].index.name
+    merged = pd.concat(states).groupby(level=0, sort=True).agg(SCORE_STATE)
+    merged.index.name = key
+    return merged
+
+
+def scores_frame(state, count=True):
+    """A score state as the notebook laid it out: ``groupby(key).agg({"order_id":
+    "count", "review_score": ["max", "min", "mean"]}).reset_index()``."""
+    columns = {}
+    if count:
+        columns[("order_id", "count")] = state["items"].to_numpy()
+    columns[("review_score", "max")] = state["review_max"].to_numpy()
+    columns[("review_score", "min")] = state["review_min"].to_numpy()
+    columns[("review_score", "mean")] = (state["review_sum"] / state["review_count"].replace(0, np.nan)).to_numpy()
+
+    result = pd.DataFrame(columns)
+    result.insert(0, (state.index.name, ""), state.index.to_numpy())
+    result.columns = pd.MultiIndex.from_tuples(result.columns)
+    return result
+
+
+def review_scores_by(details, key, count=True):
+    """Per-key (order_id count and) review_score max, min, mean of ``item_details`` rows."""
+    return scores_frame(score_state(details, key), count)
@@ -0,0 +1,216 @@
+"""Single-pass data-quality profile of the raw tables.
+
+The notebook's assessment ran ``.info()``, ``.isna().sum()``, ``.describe()``
+and ``.duplicated().sum()`` on every raw table, each a full scan. Here each
+table is read once, in chunks of ``CHUNK_ROWS`` rows. Every column is hashed
+once per chunk, and the hashes feed both a HyperLogLog distinct-count sketch
+of the column (sketches.py) and a combined hash of each row. Duplicate rows
+are then counted from the row hashes alone. The same pass keeps null counts,
+the dtype pandas infers for the column, and min / max / mean of numeric
+columns. Tables are profiled in parallel with ``jobs`` > 1.
+
+The report is written as compact JSON (``.build/profile.json`` by default).
+Before running stages, the build checks it against ``THRESHOLDS`` (see
+build.py); unchanged raw files keep their profile from the previous report:
+
+    cd dashboard
+    python -m pipeline.profile                      # profile and check every raw table
+    python -m pipeline.profile geolocation --jobs 4
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from sketches import HyperLogLog
+
+from .raw import RAW_DIR, RAW_TABLES, raw_path
+
+CHUNK_ROWS = int(os.environ.get("DASHBOARD_PROFILE_CHUNK_ROWS", 250_000))
+REPORT_NAME = "profile.json"
+
+# Inferred dtypes from the narrowest to the widest; a column is the widest of its chunks
+DTYPES = ["bool", "int64", "float64", "object"]
+
+# Checks applied before publishing, per table ("*" for every table / column):
+#   min_rows:               fewest rows
+#   max_duplicate_fraction: largest share of rows that repeat an earlier row
+#   max_null_fraction:      largest share of nulls per column
+#   unique:                 key columns whose distinct estimate must be at
+#                           least ``unique_fraction`` of the rows
+# Every column's inferred dtype must also fit the dtype raw.py reads it with.
+THRESHOLDS = {
+    "*": {"min_rows": 1, "max_duplicate_fraction": 0.0, "max_null_fraction": {"*": 0.1}},
+    # Many rows per zip prefix, a quarter of them repeated
+    "geolocation": {"max_duplicate_fraction": 0.5},
+    "customers": {"unique": ["customer_id"], "max_null_fraction": {"*": 0.0}},
+    "sellers": {"unique": ["seller_id"], "max_null_fraction": {"*": 0.0}},
+    "orders": {"unique": ["order_id"], "max_null_fraction": {"order_id": 0.0, "customer_id": 0.0}},
+    "order_items": {"max_null_fraction": {"*": 0.0}},
+    "order_reviews": {
+        "max_null_fraction": {"review_comment_title": 1.0, "review_comment_message": 1.0, "*": 0.0},
+    },
+    "products": {"unique": ["product_id"], "max_null_fraction": {"product_id": 0.0}},
+    "product_category": {"unique": ["product_category_name"], "max_null_fraction": {"*": 0.0}},
+}
+UNIQUE_FRACTION = 0.95
+
+
+class QualityError(Exception):
+    """Raised when a profile fails its thresholds."""
+
+
+def _dtype(series):
+    if pd.api.types.is_bool_dtype(series.dtype):
+        return "bool"
+    if pd.api.types.is_integer_dtype(series.dtype):
+        return "int64"
+    if pd.api.types.is_float_dtype(series.dtype):
+        return "float64"
+    return "object"
+
+
+def _hashes(series, dtype):
+    # Numbers hash as float64, so 5 and 5.0 in chunks of different dtypes match
+    if dtype in ("int64", "float64"):
+        return pd.util.hash_array(series.to_numpy(dtype="float64"))
+    return pd.util.hash_array(series.to_numpy(dtype=object))
+
+
+def profile_table(name, raw_dir=None, chunk_rows=CHUNK_ROWS):
+    """Profile of one raw table, read once in chunks."""
+    start = time.perf_counter()
+    columns, row_hashes, rows = {}, [], 0
+    reader = pd.read_csv(raw_path(name, raw_dir), chunksize=chunk_rows, encoding="utf-8-sig")
+    for chunk in reader:
+        rows += len(chunk)
+        combined = np.zeros(len(chunk), dtype="uint64")
+        for column, series in chunk.items():
+            state = columns.setdefault(column, {
+                "dtype": None, "nulls": 0, "min": None, "max": None, "sum": 0.0, "hll": HyperLogLog(),
+            })
+            nulls = series.isna()
+            n_nulls = int(nulls.sum())
+            state["nulls"] += n_nulls
+            dtype = _dtype(series)
+            hashes = _hashes(series, dtype)
+            combined = combined * np.uint64(1_000_003) ^ hashes
+
+            if n_nulls == len(series):
+                # An all-null chunk is read as float64 whatever the column holds
+                continue
+            state["hll"].update_hashes(hashes[~nulls.to_numpy()])
+            state["dtype"] = dtype if state["dtype"] is None else max(state["dtype"], dtype, key=DTYPES.index)
+            if dtype in ("int64", "float64"):
+                values = series.to_numpy(dtype="float64")
+                low, high = float(np.nanmin(values)), float(np.nanmax(values))
+                state["min"] = low if state["min"] is None else min(state["min"], low)
+                state["max"] = high if state["max"] is None else max(state["max"], high)
+                state["sum"] += float(np.nansum(values))
+        row_hashes.append(combined)
+
+    # Distinct rows: sort the row hashes and count the changes
+    row_hashes = np.sort(np.concatenate(row_hashes)) if row_hashes else np.empty(0, dtype="uint64")
+    distinct_rows = int(len(row_hashes) > 0) + int(np.count_nonzero(row_hashes[1:] != row_hashes[:-1]))
+    declared = RAW_TABLES[name][1]
+    report = {"file": RAW_TABLES[name][0], "rows": rows, "duplicate_rows": rows - distinct_rows, "columns": {}}
+    for column, state in columns.items():
+        values = rows - state["nulls"]
+        numeric = state["dtype"] in ("int64", "float64") and values
+        report["columns"][column] = {
+            "dtype": state["dtype"],
+            "declared": declared.get(column),
+            "nulls": state["nulls"],
+            "null_fraction": state["nulls"] / rows if rows else 0.0,
+            "distinct": int(round(state["hll"].estimate())),
+            "min": state["min"] if numeric else None,
+            "max": state["max"] if numeric else None,
+            "mean": state["sum"] / values if numeric else None,
+        }
+    report["seconds"] = round(time.perf_counter() - start, 3)
+    return report
+
+
+def profile(tables=None, raw_dir=None, jobs=1, chunk_rows=CHUNK_ROWS):
+    """Profiles of ``tables`` (default: every raw table), ``jobs`` tables at a time."""
+    tables = list(tables or RAW_TABLES)
+    if jobs > 1 and len(tables) > 1:
+        with ProcessPoolExecutor(max_workers=min(jobs, len(tables))) as pool:
+            reports = pool.map(profile_table, tables, [raw_dir] * len(tables), [chunk_rows] * len(tables))
+            return dict(zip(tables, reports))
+    return {name: profile_table(name, raw_dir, chunk_rows) for name in tables}
+
+
+def _fits(dtype, declared):
+    """Whether a column inferred as ``dtype`` can be read as ``declared``."""
+    if dtype is None or declared is None or declared == "object":
+        return True
+    return DTYPES.index(dtype) <= DTYPES.index(declared)
+
+
+def _rule(thresholds, table, rule):
+    return thresholds.get(table, {}).get(rule, thresholds["*"].get(rule))
+
+
+def check(report, thresholds=THRESHOLDS):
+    """Messages for every threshold the profiles in ``report`` fail (empty when all pass)."""
+    failures = []
+    for table, stats in report.items():
+        rows = stats["rows"]
+        if rows < _rule(thresholds, table, "min_rows"):
+            failures.append(f"{table}: {rows} rows")
+            continue
+        duplicates = stats["duplicate_rows"] / rows
+        if duplicates > _rule(thresholds, table, "max_duplicate_fraction"):
+            failures.append(f"{table}: {duplicates:.1%} duplicate rows")
+
+        null_limits = {**thresholds["*"]["max_null_fraction"],
+                       **thresholds.get(table, {}).get("max_null_fraction", {})}
+        for column, column_stats in stats["columns"].items():
+            if not _fits(column_stats["dtype"], column_stats["declared"]):
+                failures.append(f"{table}.{column}: read as {column_stats['dtype']}, "
+                                f"declared {column_stats['declared']}")
+            if column_stats["null_fraction"] > null_limits.get(column, null_limits["*"]):
+                failures.append(f"{table}.{column}: {column_stats['null_fraction']:.1%} nulls")
+        for column in thresholds.get(table, {}).get("unique", []):
+            distinct = stats["columns"].get(column, {}).get("distinct", 0)
+            if distinct < UNIQUE_FRACTION * rows:
+                failures.append(f"{table}.{column}: about {distinct} distinct values in {rows} rows")
+    return failures
+
+
+def write_report(report, path):
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(path.name + ".tmp")
+    tmp.write_text(json.dumps(report, separators=(",", ":"), sort_keys=True))
+    os.replace(tmp, path)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m pipeline.profile", description="Profile the raw tables.")
+    parser.add_argument("tables", nargs="*", help=f"tables to profile (default: all of {', '.join(RAW_TABLES)})")
+    parser.add_argument("--raw-dir", default=str(RAW_DIR), help="directory with the raw dataset CSVs")
+    parser.add_argument("--jobs", "-j", type=int, default=1, help="tables profiled in parallel")
+    parser.add_argument("--output", help="write the JSON report here")
+    args = parser.parse_args(argv)
+
+    report = profile(args.tables or None, args.raw_dir, args.jobs)
+    for table, stats in report.items():
+        print(f"{table}: {stats['rows']} rows, {stats['duplicate_rows']} duplicates in {stats['seconds']:.2f}s")
+    if args.output:
+        write_report(report, args.output)
+    failures = check(report)
+    for failure in failures:
+        print(f"[quality] {failure}")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
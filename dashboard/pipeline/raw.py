@@ -0,0 +1,122 @@
+"""Typed readers for the raw tables in "E-Commerce Public Dataset"."""
+import os
+from pathlib import Path
+
+import pandas as pd
+
+RAW_DIR = Path(
+    os.environ.get(
+        "DASHBOARD_RAW_DIR",
+        Path(__file__).resolve().parent.parent.parent / "E-Commerce Public Dataset",
+    )
+)
+
+# name -> (file, dtypes). Nullable measures are read as float64 like the notebook did.
+RAW_TABLES = {
+    "customers": (
+        "customers_dataset.csv",
+        {
+            "customer_id": "object",
+            "customer_unique_id": "object",
+            "customer_zip_code_prefix": "int64",
+            "customer_city": "object",
+            "customer_state": "object",
+        },
+    ),
+    "geolocation": (
+        "geolocation_dataset.csv",
+        {
+            "geolocation_zip_code_prefix": "int64",
+            "geolocation_lat": "float64",
+            "geolocation_lng": "float64",
+            "geolocation_city": "object",
+            "geolocation_state": "object",
+        },
+    ),
+    "order_items": (
+        "order_items_dataset.csv",
+        {
+            "order_id": "object",
+            "order_item_id": "int64",
+            "product_id": "object",
+            "seller_id": "object",
+            "shipping_limit_date": "object",
+            "price": "float64",
+            "freight_value": "float64",
+        },
+    ),
+    "order_reviews": (
+        "order_reviews_dataset.csv",
+        {
+            "review_id": "object",
+            "order_id": "object",
+            "review_score": "int64",
+            "review_comment_title": "object",
+            "review_comment_message": "object",
+            "review_creation_date": "object",
+            "review_answer_timestamp": "object",
+        },
+    ),
+    "orders": (
+        "orders_dataset.csv",
+        {
+            "order_id": "object",
+            "customer_id": "object",
+            "order_status": "object",
+            "order_purchase_timestamp": "object",
+            "order_approved_at": "object",
+            "order_delivered_carrier_date": "object",
+            "order_delivered_customer_date": "object",
+            "order_estimated_delivery_date": "object",
+        },
+    ),
+    "products": (
+        "products_dataset.csv",
+        {
+            "product_id": "object",
+            "product_category_name": "object",
+            "product_name_lenght": "float64",
+            "product_description_lenght": "float64",
+            "product_photos_qty": "float64",
+            "product_weight_g": "float64",
+            "product_length_cm": "float64",
+            "product_height_cm": "float64",
+            "product_width_cm": "float64",
+        },
+    ),
+    "sellers": (
+        "sellers_dataset.csv",
+        {
+            "seller_id": "object",
+            "seller_zip_code_prefix": "int64",
+            "seller_city": "object",
+            "seller_state": "object",
+        },
+    ),
+    "product_category": (
+        "product_category_name_translation.csv",
+        {
+            "product_category_name": "object",
+            "product_category_name_english": "object",
+        },
+    ),
+}
+
+
+def raw_path(name, raw_dir=None):
+    return Path(raw_dir or RAW_DIR) / RAW_TABLES[name][0]
+
+
+def read_raw(name, raw_dir=None, usecols=None, **kwargs):
+    """Read one raw table with its declared dtypes."""
+    dtypes = RAW_TABLES[name][1]
+    if usecols is not None:
+        dtypes = {col: dtypes[col] for col in usecols}
+    return pd.read_csv(
+        raw_path(name, raw_dir),
+        usecols=usecols,
+        dtype=dtypes,
+        # product_category_name_translation.csv starts with a BOM
+        encoding="utf-8-sig",
+        **kwargs,
+    )
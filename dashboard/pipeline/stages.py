@@ -0,0 +1,324 @@
+"""Build stages that turn the raw tables into the dashboard artifacts.
+
+Every stage is a plain function ``func(tables) -> {output name: DataFrame}``
+where ``tables`` holds the raw tables listed in ``raw`` and the outputs of the
+stages listed in ``deps``. The transformations are the ones from the
+"Data Wrangling" and "Exploratory Data Analysis" parts of notebook.ipynb.
+"""
+import os
+
+import numpy as np
+import pandas as pd
+
+from geo_grid import grid_counts
+from sketches import sketch_rows
+from star_buckets import STAR_BANDS
+
+from .distances import BAND_LABELS, RADII_KM, SellerTree, band_codes, haversine_km
+from .joins import is_detailed, item_details, review_scores_by
+from .streaming import build_scores
+from .zip_index import ZipIndex
+
+
+def build_geo(tables):
+    # One centroid per zip prefix; customers and sellers are geocoded by array
+    # lookup instead of a merge that repeats them once per geolocation row
+    index = ZipIndex.from_geolocation(tables["geolocation"])
+    return {
+        "geolocation_df": index.to_frame(),
+        "customers_geo_count": index.counts(tables["customers"]["customer_zip_code_prefix"], "customer_count"),
+        "sellers_geo_count": index.counts(tables["sellers"]["seller_zip_code_prefix"], "seller_count"),
+    }
+
+
+def _geocoded(frame, zip_column, index, columns=()):
+    """``columns`` of ``frame`` with the centroid of each row's zip prefix; unknown prefixes are dropped."""
+    lat, lng = index.lookup(frame[zip_column].to_numpy())
+    points = frame[list(columns)].copy()
+    points["geolocation_lat"], points["geolocation_lng"] = lat, lng
+    return points[~np.isnan(lat)]
+
+
+def build_geo_grid(tables):
+    index = ZipIndex.from_frame(tables["geolocation_df"])
+
+    customers_geo_df = _geocoded(tables["customers"], "customer_zip_code_prefix", index, ["customer_city"])
+    customers_geo_df["customer_count"] = 1.0
+    return {"customers_geo_grid": grid_counts(customers_geo_df, "customer_count", by=["customer_city"])}
+
+
+def build_order_per_city(tables):
+    # customers + orders
+    customer_order_df = tables["customers"].merge(tables["orders"], on="customer_id", how="left")
+    order_per_city = customer_order_df.groupby(by="customer_city").order_id.count()\
+        .sort_values(ascending=False).reset_index()
+    return {"order_per_city": order_per_city}
+
+
+def build_order_details(tables):
+    # orders + reviews + items, one row per order item (see joins.py)
+    order_details_df = item_details(tables["order_items"], tables["order_reviews"], orders=tables["orders"])
+    return {"order_details": order_details_df}
+
+
+def build_score_per_product(tables):
+    # The notebook also left-merged products here; product_id is unique in
+    # products_dataset so that merge never changed the grouped result.
+    score_per_product = review_scores_by(tables["order_details"], "product_id")
+    return {"score_per_product": score_per_product}
+
+
+def build_score_per_store(tables):
+    # Same as above for the sellers merge
+    score_per_store = review_scores_by(tables["order_details"], "seller_id")
+    return {"score_per_store": score_per_store}
+
+
+def build_product_detail(tables):
+    # order_items + whether their product has every detail filled (joins.is_detailed)
+    products = tables["products"]
+    product_order_df = tables["order_items"].merge(
+        pd.DataFrame({"product_id": products["product_id"], "detailed": is_detailed(products)}),
+        on="product_id", how="left",
+    )
+    # order_items + reviews, encoded once for both splits
+    review_df = item_details(tables["order_items"], tables["order_reviews"], keys=["product_id"])
+
+    # Products with any missing detail vs. products with every detail filled
+    non_detailed = ~product_order_df["detailed"].eq(True).to_numpy()
+
+    outputs = {}
+    for prefix, rows in (("non_detailed", non_detailed), ("detailed", ~non_detailed)):
+        outputs[f"{prefix}_product_review"] = review_scores_by(review_df[rows], "product_id", count=False)
+        outputs[f"{prefix}_product_sales"] = product_order_df[rows].groupby(by="product_id").agg({
+            "order_id": "count"
+        }).reset_index()
+    return outputs
+
+
+def build_sales_cube(tables):
+    # One row per order item with its order's review summary (joins.py)
+    details = item_details(tables["order_items"], tables["order_reviews"], orders=tables["orders"])
+    orders = tables["orders"].merge(tables["customers"], on="customer_id", how="left")\
+        .drop_duplicates("order_id").set_index("order_id")\
+        .reindex(details["order_id"].cat.categories)
+    order_codes = details["order_id"].cat.codes.to_numpy()
+
+    # Translated category of every product, "unknown" when missing
+    translation = tables["product_category"].set_index("product_category_name")["product_category_name_english"]
+    category = tables["products"].set_index("product_id")["product_category_name"].map(translation)
+    seller_state = tables["sellers"].set_index("seller_id")["seller_state"]
+
+    # Star bucket of the order's average review score
+    review_mean = details["review_sum"] / details["review_count"].replace(0, np.nan)
+    star_bucket = pd.cut(review_mean, bins=STAR_BANDS["edges"], labels=STAR_BANDS["labels"],
+                         right=True, include_lowest=True)
+
+    cells = pd.DataFrame({
+        "month": pd.to_datetime(orders["order_purchase_timestamp"]).dt.strftime("%Y-%m").to_numpy()[order_codes],
+        "customer_state": orders["customer_state"].to_numpy()[order_codes],
+        "product_category": details["product_id"].astype(object).map(category).to_numpy(),
+        "seller_state": details["seller_id"].astype(object).map(seller_state).to_numpy(),
+        "star_bucket": star_bucket.astype(object).to_numpy(),
+        "order_id": order_codes,
+        # Each item carries an equal share of its order, so orders add up across cells
+        "order_share": 1.0 / np.bincount(order_codes)[order_codes],
+        "review_sum": details["review_sum"].fillna(0).to_numpy(),
+        "review_count": details["review_count"].to_numpy(),
+    })
+    cells = cells.fillna({"product_category": "unknown", "customer_state": "unknown",
+                          "seller_state": "unknown", "star_bucket": "No review", "month": "unknown"})
+    sales_cube = cells.groupby(["month", "customer_state", "product_category", "seller_state", "star_bucket"])\
+        .agg(
+            orders=("order_share", "sum"),
+            items=("order_id", "size"),
+            review_sum=("review_sum", "sum"),
+            review_count=("review_count", "sum"),
+        ).reset_index()
+    return {"sales_cube": sales_cube}
+
+
+def build_seller_distances(tables):
+    # One row per order item with its order's review summary (joins.py)
+    details = item_details(tables["order_items"], tables["order_reviews"], orders=tables["orders"],
+                           keys=("seller_id",))
+    orders = tables["orders"].merge(tables["customers"], on="customer_id", how="left")\
+        .drop_duplicates("order_id").set_index("order_id")\
+        .reindex(details["order_id"].cat.categories)
+    order_codes = details["order_id"].cat.codes.to_numpy()
+    sellers = tables["sellers"].drop_duplicates("seller_id").set_index("seller_id")
+    seller_codes = details["seller_id"].cat.codes.to_numpy()
+
+    # Zip-prefix centroids of every order's customer and every item's seller
+    index = ZipIndex.from_frame(tables["geolocation_df"])
+    customer_lat, customer_lng = index.lookup(orders["customer_zip_code_prefix"].fillna(-1).to_numpy())
+    seller_lat, seller_lng = index.lookup(
+        sellers["seller_zip_code_prefix"].reindex(details["seller_id"].cat.categories).fillna(-1).to_numpy()
+    )
+    km = haversine_km(customer_lat[order_codes], customer_lng[order_codes],
+                      seller_lat[seller_codes], seller_lng[seller_codes])
+    shipped = ~np.isnan(km)
+    km = km[shipped]
+
+    # Items, mean distance and review score per distance band
+    bands = band_codes(km)
+    n_bands = len(BAND_LABELS)
+    items = np.bincount(bands, minlength=n_bands)
+    review_count = np.bincount(bands, weights=details["review_count"].to_numpy()[shipped], minlength=n_bands)
+    review_sum = np.bincount(bands, weights=np.nan_to_num(details["review_sum"].to_numpy()[shipped]),
+                             minlength=n_bands)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        distance_bands = pd.DataFrame({
+            "distance_band": BAND_LABELS,
+            "items": items,
+            "item_share": items / max(items.sum(), 1),
+            "mean_km": np.bincount(bands, weights=km, minlength=n_bands) / items,
+            "review_count": review_count.astype("int64"),
+            "review_mean": review_sum / review_count,
+        })
+
+    # Per customer city: distance of its items, and the nearest sellers to
+    # the centroid of its customers
+    item_cities = pd.DataFrame({
+        "customer_city": orders["customer_city"].to_numpy()[order_codes][shipped], "km": km,
+    })
+    city_items = item_cities.groupby("customer_city").agg(
+        items=("km", "size"), median_km=("km", "median"), mean_km=("km", "mean"),
+    )
+    customers = tables["customers"]
+    customer_lat, customer_lng = index.lookup(customers["customer_zip_code_prefix"].to_numpy())
+    cities = pd.DataFrame({
+        "customer_city": customers["customer_city"].to_numpy(), "lat": customer_lat, "lng": customer_lng,
+    }).dropna().groupby("customer_city")[["lat", "lng"]].mean()
+
+    located = ~np.isnan(seller_lat)
+    tree = SellerTree(seller_lat[located], seller_lng[located])
+    city_seller_distances = city_items.reindex(cities.index)
+    city_seller_distances["items"] = city_seller_distances["items"].fillna(0).astype("int64")
+    city_seller_distances["nearest_seller_km"] = tree.nearest_km(cities["lat"], cities["lng"])
+    for radius in RADII_KM:
+        city_seller_distances[f"sellers_within_{radius}km"] = tree.count_within(cities["lat"], cities["lng"], radius)
+    city_seller_distances = city_seller_distances.reset_index()\
+        .sort_values("items", ascending=False, kind="stable", ignore_index=True)
+
+    return {"distance_bands": distance_bands, "city_seller_distances": city_seller_distances}
+
+
+def _flat(frame):
+    # ("review_score", "mean") -> "review_score_mean", ("product_id", "") -> "product_id"
+    return frame.set_axis(["_".join(filter(None, column)) for column in frame.columns], axis=1)
+
+
+def build_review_sketches(tables):
+    # ("order_id", "count") is the number of items sold, like in the dashboard
+    score_frames = {
+        "score_per_product": (_flat(tables["score_per_product"]).rename(columns={"order_id_count": "order_id"}),
+                              "product_id"),
+        "score_per_store": (_flat(tables["score_per_store"]).rename(columns={"order_id_count": "order_id"}),
+                            "seller_id"),
+    }
+    review_frames = {
+        name: _flat(tables[name]) for name in ("detailed_product_review", "non_detailed_product_review")
+    }
+    return {"review_sketches": sketch_rows(score_frames, review_frames)}
+
+
+# name -> stage spec
+#   raw:     raw tables read from RAW_DIR
+#   deps:    stages whose outputs are passed in
+#   outputs: output names; every output is kept in the build directory for
+#            downstream stages, published ones are also written as <name>.csv
+#            next to the dashboard
+#   stream:  the function gets the raw file paths instead of loaded tables
+STAGES = {
+    "geo": {
+        "func": build_geo,
+        "raw": ["geolocation", "customers", "sellers"],
+        "deps": [],
+        "outputs": ["geolocation_df", "customers_geo_count", "sellers_geo_count"],
+        "publish": True,
+    },
+    "geo_grid": {
+        "func": build_geo_grid,
+        "raw": ["customers"],
+        "deps": ["geo"],
+        "outputs": ["customers_geo_grid"],
+        "publish": True,
+    },
+    "order_per_city": {
+        "func": build_order_per_city,
+        "raw": ["customers", "orders"],
+        "deps": [],
+        "outputs": ["order_per_city"],
+        "publish": True,
+    },
+    "order_details": {
+        "func": build_order_details,
+        "raw": ["orders", "order_reviews", "order_items"],
+        "deps": [],
+        "outputs": ["order_details"],
+        "publish": False,
+    },
+    "score_per_product": {
+        "func": build_score_per_product,
+        "raw": [],
+        "deps": ["order_details"],
+        "outputs": ["score_per_product"],
+        "publish": True,
+    },
+    "score_per_store": {
+        "func": build_score_per_store,
+        "raw": [],
+        "deps": ["order_details"],
+        "outputs": ["score_per_store"],
+        "publish": True,
+    },
+    "product_detail": {
+        "func": build_product_detail,
+        "raw": ["order_items", "products", "order_reviews"],
+        "deps": [],
+        "outputs": [
+            "detailed_product_review",
+            "non_detailed_product_review",
+            "detailed_product_sales",
+            "non_detailed_product_sales",
+        ],
+        "publish": True,
+    },
+    "sales_cube": {
+        "func": build_sales_cube,
+        "raw": ["order_items", "order_reviews", "orders", "customers", "products", "product_category", "sellers"],
+        "deps": [],
+        "outputs": ["sales_cube"],
+        "publish": True,
+    },
+    "seller_distances": {
+        "func": build_seller_distances,
+        "raw": ["order_items", "order_reviews", "orders", "customers", "sellers"],
+        "deps": ["geo"],
+        "outputs": ["distance_bands", "city_seller_distances"],
+        "publish": True,
+    },
+    "review_sketches": {
+        "func": build_review_sketches,
+        "raw": [],
+        "deps": ["score_per_product", "score_per_store", "product_detail"],
+        "outputs": ["review_sketches"],
+        "publish": True,
+    },
+}
+
+# DASHBOARD_STREAMING=1 computes the review scores out of core, in chunks and
+# in parallel (streaming.py), instead of joining the full tables in memory
+if os.environ.get("DASHBOARD_STREAMING") == "1":
+    for name in ("order_details", "score_per_product", "score_per_store"):
+        del STAGES[name]
+    STAGES["scores"] = {
+        "func": build_scores,
+        "raw": ["orders", "order_items", "order_reviews"],
+        "deps": [],
+        "outputs": ["score_per_product", "score_per_store"],
+        "publish": True,
+        "stream": True,
+    }
+    STAGES["review_sketches"]["deps"] = ["scores", "product_detail"]
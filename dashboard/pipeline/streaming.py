@@ -0,0 +1,83 @@
+"""Out-of-core computation of score_per_product and score_per_store.
+
+The raw orders, order_items and order_reviews are read in chunks of
+``CHUNK_ROWS`` rows and spilled to disk, hash-partitioned on ``order_id`` so
+every order lands in one partition together with its items and reviews. A
+process pool then joins each partition (see joins.py) into mergeable per-key
+states (items, review count, sum, min, max), and the states of all partitions
+are merged into the same tables the in-memory stages produce.
+
+Peak memory is one chunk while scanning and one partition per worker while
+reducing, whatever the size of the history; the reduce scales with cores.
+Enable it with ``DASHBOARD_STREAMING=1`` (see stages.py).
+"""
+import math
+import os
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import pandas as pd
+
+from .joins import item_details, merge_states, score_state, scores_frame
+from .raw import read_raw
+
+CHUNK_ROWS = int(os.environ.get("DASHBOARD_STREAM_CHUNK_ROWS", 500_000))
+# Raw CSV bytes per partition; there are at least as many partitions as workers
+PARTITION_BYTES = int(os.environ.get("DASHBOARD_STREAM_PARTITION_MB", 128)) << 20
+JOBS = int(os.environ.get("DASHBOARD_STREAM_JOBS", 0)) or os.cpu_count()
+
+# raw table -> columns needed for the review scores
+COLUMNS = {
+    "orders": ["order_id"],
+    "order_items": ["order_id", "product_id", "seller_id"],
+    "order_reviews": ["order_id", "review_score"],
+}
+
+# output -> key column
+SCORES = {"score_per_product": "product_id", "score_per_store": "seller_id"}
+
+
+def partition_count(paths, jobs=JOBS):
+    total = sum(os.path.getsize(path) for path in paths.values())
+    return max(jobs, math.ceil(total / PARTITION_BYTES))
+
+
+def spill(name, path, spill_dir, partitions, chunk_rows=CHUNK_ROWS):
+    """Split one raw table into ``partitions`` pickles per chunk, by hash of order_id."""
+    reader = read_raw(name, Path(path).parent, usecols=COLUMNS[name], chunksize=chunk_rows)
+    for number, chunk in enumerate(reader):
+        part = pd.util.hash_array(chunk["order_id"].to_numpy(dtype=object)) % partitions
+        for partition, rows in chunk.groupby(part):
+            rows.to_pickle(Path(spill_dir) / f"{name}.{partition}.{number}.pkl")
+
+
+def _read_partition(spill_dir, name, partition):
+    files = sorted(Path(spill_dir).glob(f"{name}.{partition}.*.pkl"))
+    if not files:
+        return pd.DataFrame({column: pd.Series(dtype="object") for column in COLUMNS[name]})
+    return pd.concat([pd.read_pickle(file) for file in files], ignore_index=True)
+
+
+def reduce_partition(spill_dir, partition):
+    """Score states of one partition, per output."""
+    tables = {name: _read_partition(spill_dir, name, partition) for name in COLUMNS}
+    details = item_details(tables["order_items"], tables["order_reviews"], orders=tables["orders"],
+                           keys=list(SCORES.values()))
+    return {output: score_state(details, key) for output, key in SCORES.items()}
+
+
+def build_scores(tables, jobs=JOBS, chunk_rows=CHUNK_ROWS, partitions=None):
+    """score_per_product and score_per_store from the raw file paths in ``tables``."""
+    partitions = partitions or partition_count(tables, jobs)
+    with tempfile.TemporaryDirectory(prefix="scores-") as spill_dir:
+        for name in COLUMNS:
+            spill(name, tables[name], spill_dir, partitions, chunk_rows)
+
+        with ProcessPoolExecutor(max_workers=min(jobs, partitions)) as pool:
+            states = list(pool.map(reduce_partition, [spill_dir] * partitions, range(partitions)))
+
+    return {
+        output: scores_frame(merge_states(state[output] for state in states))
+        for output in SCORES
+    }
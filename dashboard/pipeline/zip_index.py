@@ -0,0 +1,91 @@
+"""Zip-prefix centroid index for geocoding customers and sellers.
+
+The notebook merged customers and sellers with the geolocation table on the
+zip code prefix. That table has hundreds of lat/lng rows per prefix, so every
+customer became hundreds of rows before being counted. Here the geolocation
+rows are reduced once to one centroid per prefix, kept as sorted arrays, and
+a zip prefix is geocoded by binary search (``np.searchsorted``): one output
+row per input row, no join.
+"""
+import numpy as np
+import pandas as pd
+
+COLUMNS = ["geolocation_zip_code_prefix", "geolocation_lat", "geolocation_lng",
+           "geolocation_city", "geolocation_state", "geolocation_points"]
+
+
+class ZipIndex:
+    """Sorted zip prefixes with the centroid, city, state and number of distinct points of each."""
+
+    def __init__(self, prefixes, lat, lng, city, state, points):
+        self.prefixes = np.asarray(prefixes, dtype="int64")
+        self.lat = np.asarray(lat, dtype="float64")
+        self.lng = np.asarray(lng, dtype="float64")
+        self.city = np.asarray(city, dtype=object)
+        self.state = np.asarray(state, dtype=object)
+        self.points = np.asarray(points, dtype="int64")
+
+    @classmethod
+    def from_geolocation(cls, geolocation):
+        """Index of the raw geolocation table.
+
+        The centroid is the median of the distinct points of a prefix, which
+        ignores the few points geocoded far outside their prefix. City and
+        state are taken from the prefix's first row.
+        """
+        points = geolocation[["geolocation_zip_code_prefix", "geolocation_lat", "geolocation_lng"]]\
+            .drop_duplicates()
+        groups = points.groupby("geolocation_zip_code_prefix", sort=True)
+        centroids = groups[["geolocation_lat", "geolocation_lng"]].median()
+        places = geolocation.groupby("geolocation_zip_code_prefix", sort=True)[
+            ["geolocation_city", "geolocation_state"]
+        ].first()
+        return cls(
+            centroids.index.to_numpy(), centroids["geolocation_lat"].to_numpy(),
+            centroids["geolocation_lng"].to_numpy(), places["geolocation_city"].to_numpy(),
+            places["geolocation_state"].to_numpy(), groups.size().to_numpy(),
+        )
+
+    @classmethod
+    def from_frame(cls, frame):
+        """Index of a frame written by ``to_frame`` (geolocation_df.csv)."""
+        frame = frame.sort_values("geolocation_zip_code_prefix")
+        return cls(*(frame[column].to_numpy() for column in COLUMNS))
+
+    def to_frame(self):
+        return pd.DataFrame(dict(zip(COLUMNS, (self.prefixes, self.lat, self.lng, self.city, self.state,
+                                               self.points))))
+
+    def __len__(self):
+        return len(self.prefixes)
+
+    def positions(self, zip_prefixes):
+        """Position of every zip prefix in the index, -1 when it is not there."""
+        zip_prefixes = np.asarray(zip_prefixes, dtype="int64")
+        positions = np.searchsorted(self.prefixes, zip_prefixes)
+        positions[positions == len(self.prefixes)] = 0
+        found = len(self.prefixes) > 0
+        if found:
+            found = self.prefixes[positions] == zip_prefixes
+        return np.where(found, positions, -1)
+
+    def lookup(self, zip_prefixes):
+        """(lat, lng) of every zip prefix, NaN when it is not in the index."""
+        positions = self.positions(zip_prefixes)
+        found = positions >= 0
+        lat, lng = np.full(len(positions), np.nan), np.full(len(positions), np.nan)
+        lat[found], lng[found] = self.lat[positions[found]], self.lng[positions[found]]
+        return lat, lng
+
+    def counts(self, zip_prefixes, name):
+        """Rows per centroid, like grouping the notebook's merge by lat/lng, most rows first."""
+        positions = self.positions(zip_prefixes)
+        counts = np.bincount(positions[positions >= 0], minlength=len(self))
+        used = np.flatnonzero(counts)
+        frame = pd.DataFrame({
+            "geolocation_zip_code_prefix": self.prefixes[used],
+            "geolocation_lat": self.lat[used],
+            "geolocation_lng": self.lng[used],
+            name: counts[used],
+        })
+        return frame.sort_values(name, ascending=False, kind="stable", ignore_index=True)
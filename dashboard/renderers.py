@@ -0,0 +1,68 @@
+"""Per-section choice between server-rendered PNGs and client-side charts.
+
+``matplotlib`` (the default) draws each figure on the server and sends it as
+a cached PNG (figure_cache). ``client`` sends the aggregated values as a
+Vega-Lite spec or a pydeck (WebGL) map from client_charts.py and lets the
+browser draw it; if that fails (e.g. pydeck is not installed) the section
+falls back to Matplotlib.
+
+``DASHBOARD_RENDERER`` sets the backend: one name for every section, or
+comma-separated ``section=backend`` pairs with an optional default, e.g.
+``geographics=client,matplotlib``. ``?renderer=client`` overrides it for a
+session.
+"""
+import os
+
+import streamlit as st
+
+import figure_cache
+import tracing
+
+BACKENDS = ("matplotlib", "client")
+QUERY_PARAM = "renderer"
+
+
+def parse(setting):
+    """``"geographics=client,matplotlib"`` -> ({"geographics": "client"}, "matplotlib")."""
+    per_section, default = {}, "matplotlib"
+    for part in filter(None, (part.strip() for part in setting.split(","))):
+        section, _, backend = part.rpartition("=")
+        if backend not in BACKENDS:
+            raise ValueError(f"unknown renderer {backend!r}, expected one of {BACKENDS}")
+        if section:
+            per_section[section] = backend
+        else:
+            default = backend
+    return per_section, default
+
+
+SECTION_BACKENDS, DEFAULT_BACKEND = parse(os.environ.get("DASHBOARD_RENDERER", ""))
+
+
+def backend(section):
+    """Backend of ``section`` (the section module name, e.g. "geographics")."""
+    requested = st.query_params.get(QUERY_PARAM)
+    if requested:
+        try:
+            per_section, default = parse(requested)
+            return per_section.get(section, default)
+        except ValueError:
+            pass
+    return SECTION_BACKENDS.get(section, DEFAULT_BACKEND)
+
+
+def show(section, name, draw, spec, *args):
+    """Show figure ``name``: ``spec(*args)`` in the browser or ``draw(*args)`` as a PNG."""
+    if backend(section) == "client":
+        try:
+            with tracing.span(f"chart:{name}"):
+                chart = spec(*args)
+        except ImportError:
+            chart = None
+        if isinstance(chart, dict):
+            st.vega_lite_chart(chart, use_container_width=True)
+            return
+        if chart is not None:
+            st.pydeck_chart(chart, use_container_width=True)
+            return
+    st.image(figure_cache.render(name, draw, *args), use_container_width=True)
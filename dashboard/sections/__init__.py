@@ -0,0 +1,49 @@
+"""Dashboard sections, imported only when first selected.
+
+Each section module has ``render()`` to draw it and ``load_data()`` to load
+(and cache) the data it reads. Heavy dependencies and datasets of a section
+are therefore paid for the first time the section is picked in the sidebar,
+not at cold start. ``warm_up_in_background`` can pre-import the remaining
+sections after the first page has been sent.
+"""
+import importlib
+import os
+import threading
+
+# sidebar label -> module, in display order
+SECTIONS = {
+    "Reviews Impact": "sections.reviews",
+    "Product Detail Impact": "sections.product_detail",
+    "Geographics": "sections.geographics",
+    "Sales Explorer": "sections.explorer",
+}
+
+WARM_UP = os.environ.get("DASHBOARD_WARM_UP", "1") == "1"
+
+_warm_up_started = False
+_warm_up_lock = threading.Lock()
+
+
+def load(label):
+    return importlib.import_module(SECTIONS[label])
+
+
+def _warm_up():
+    for label in SECTIONS:
+        try:
+            load(label).load_data()
+        except (ImportError, OSError):
+            # Missing artifacts surface when the section is actually selected
+            pass
+
+
+def warm_up_in_background():
+    """Import every section and load its data once per process, off the script thread."""
+    global _warm_up_started
+    if not WARM_UP:
+        return
+    with _warm_up_lock:
+        if _warm_up_started:
+            return
+        _warm_up_started = True
+    threading.Thread(target=_warm_up, name="dashboard-warm-up", daemon=True).start()
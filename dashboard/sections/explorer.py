@@ -0,0 +1,74 @@
+"""Sales Explorer section: orders, items and review scores for the sidebar filters."""
+import streamlit as st
+
+import cube
+import data_loader
+
+# cube dimension -> sidebar widget label (the widgets live in dashboard.py,
+# keyed "filter_<dimension>")
+FILTERS = {
+    "month": "Purchase Month:",
+    "customer_state": "Customer State:",
+    "product_category": "Product Category:",
+    "seller_state": "Seller State:",
+    "star_bucket": "Review Score:",
+}
+
+
+def load_data():
+    cube.options("month")
+
+
+def default_state():
+    """Sidebar filter values before any is changed: every month, nothing picked."""
+    months = cube.options("month")
+    return {"filter_month": (months[0], months[-1]),
+            **{f"filter_{dimension}": [] for dimension in FILTERS if dimension != "month"}}
+
+
+def filters():
+    """The current sidebar selection as cube filters."""
+    return {dimension: st.session_state.get(f"filter_{dimension}") for dimension in FILTERS}
+
+
+def render():
+    st.title('Sales Explorer')
+    st.write("Orders, items and review scores for the purchase months, states, categories and review scores picked in the sidebar.")
+
+    if not data_loader.available("sales_cube"):
+        st.warning("sales_cube.csv has not been built yet. Run `python -m pipeline sales_cube` in `dashboard/`.")
+        return
+
+    selection = filters()
+    totals = cube.query(selection)
+
+    col1, col2, col3 = st.columns(3)
+    col1.metric("Orders", f"{totals['orders']:,.0f}")
+    col2.metric("Items Sold", f"{totals['items']:,.0f}")
+    col3.metric("Average Review Score", f"{totals['average_review']:.2f}")
+
+    tab1, tab2, tab3 = st.tabs(["Per Month", "Per Review Score", "Per Category"])
+
+    with tab1:
+        per_month = cube.query(selection, by="month")
+        st.line_chart(per_month[["orders", "items"]])
+
+    with tab2:
+        per_star = cube.query(selection, by="star_bucket")
+        st.bar_chart(per_star[["items"]])
+
+    with tab3:
+        per_category = cube.query(selection, by="product_category")
+        top_categories = per_category.sort_values("items", ascending=False).head(15)
+        st.bar_chart(top_categories[["items"]])
+        st.dataframe(top_categories[["orders", "items", "average_review"]])
+
+    with st.expander("See explanation"):
+        st.markdown(
+            '''
+            The numbers are summed from a precomputed sales cube (month x customer state x product category x
+            seller state x review score), so changing the filters does not recompute anything from the raw orders.
+            An order with items from several categories or sellers is split between them by number of items, so
+            the orders always add up to the number of distinct orders.
+            '''
+        )
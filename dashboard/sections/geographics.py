@@ -0,0 +1,123 @@
+"""Geographics section: customer density, top seller locations and seller-customer distances."""
+import streamlit as st
+
+import charts
+import client_charts
+import data_loader
+import geo_charts
+import geo_grid
+import renderers
+
+
+def load_data():
+    data_loader.load("order_per_city")
+    data_loader.load("customers_geo_grid")
+    data_loader.load("sellers_geo_count")
+    data_loader.load("distance_bands")
+    data_loader.load("city_seller_distances")
+
+
+def render():
+    st.title('Geographics Analysis')
+    st.write("This section analyzes geographics data.")
+
+    # Import data
+    order_per_city = data_loader.load("order_per_city")
+    customers_geo_grid = data_loader.load("customers_geo_grid")
+    sellers_geo_count = data_loader.load("sellers_geo_count")
+    distance_bands = data_loader.load("distance_bands")
+    city_seller_distances = data_loader.load("city_seller_distances")
+
+    # Create tabs for seller and costumer geographics
+    tab1, tab2, tab3 = st.tabs(["Customers", "Sellers", "Distances"])
+
+    with tab1:
+        # ==== Top 20 Customers ==== #
+        top_20_cities = order_per_city.head(20)
+
+        # Customer density per grid cell, at a resolution that fits the extent
+        top_20_cities_cells, resolution = geo_grid.select_cells(
+            customers_geo_grid[customers_geo_grid["customer_city"].isin(top_20_cities["customer_city"])],
+            weight="customer_count"
+        )
+
+        renderers.show(
+            "geographics", "top_cities_map_fig", geo_charts.grid_map_fig, client_charts.grid_map_deck,
+            top_20_cities_cells, resolution, "customer_count", "Geolocation of Top 20 Orders"
+        )
+
+        # Add Explanation
+        with st.expander("See explanation"):
+            st.markdown(
+                '''
+                It can be seen that most customers are located near the coast.
+                The darker the red color, the higher the number of buyers in that area.
+                '''
+            )
+    with tab2:
+        # ==== Top 20 Sellers ==== #
+        top_20_sellers = sellers_geo_count.head(20)
+
+        renderers.show(
+            "geographics", "top_sellers_map_fig", geo_charts.points_map_fig, client_charts.points_map_deck,
+            top_20_sellers[["geolocation_lat", "geolocation_lng"]], "Geolocation of Top 20 Sellers", 20
+        )
+
+        # Add Explanation
+        with st.expander("See explanation"):
+            st.markdown(
+                '''
+                It can be seen that the top 20 sellers are located near Ibitinga, which is a city in the state of São Paulo, 
+                Brazil and pretty far from the coast.
+                '''
+            )
+    with tab3:
+        # ==== Seller-Customer Distances ==== #
+        # Great-circle distance from seller to customer of every order item
+        mean_km = (distance_bands["mean_km"] * distance_bands["item_share"]).sum()
+        far = distance_bands.loc[distance_bands["distance_band"].isin(["1000-2000 km", "2000+ km"]), "item_share"]
+        col1, col2 = st.columns(2)
+        with col1:
+            st.metric("Average distance per item", f"{mean_km:,.0f} km")
+        with col2:
+            st.metric("Items shipped over 1000 km", f"{far.sum():.0%}")
+
+        renderers.show(
+            "geographics", "distance_bands_fig", charts.distance_bands_fig, client_charts.distance_bands_spec,
+            distance_bands
+        )
+
+        # Distances of the top 20 cities by orders
+        st.subheader("Top 20 Cities: Distance to Sellers")
+        top_20_distances = top_20_cities[["customer_city"]].merge(city_seller_distances, on="customer_city", how="left")
+        st.dataframe(
+            top_20_distances.rename(columns={
+                "customer_city": "City",
+                "items": "Items",
+                "median_km": "Median distance (km)",
+                "nearest_seller_km": "Nearest seller (km)",
+                "sellers_within_100km": "Sellers within 100 km",
+                "sellers_within_500km": "Sellers within 500 km",
+            }).drop(columns="mean_km").round(1),
+            hide_index=True, use_container_width=True,
+        )
+
+        # Add Explanation
+        with st.expander("See explanation"):
+            st.markdown(
+                '''
+                Distances are measured between the zip-prefix centroids of the seller and the customer of each
+                sold item. The bars show how many items were sold, and how they were reviewed, for each distance
+                band. The table shows, for the top 20 cities by orders, how far their items traveled, how far the
+                nearest seller is, and how many sellers are close to them.
+                '''
+            )
+    
+    # Add Conclusion
+    st.subheader("Conclusion")
+    st.markdown(
+        '''
+        It can be seen that most top 20 cities located near the coast, while the 20 top sellers located pretty far from the top cities.
+        The reason why those top 20 cities have more order may be caused by the lack of resources near their area.
+        '''
+    )
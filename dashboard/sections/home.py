@@ -0,0 +1,39 @@
+"""Landing section shown on every page: intro and the top 5 cities by orders."""
+import streamlit as st
+
+import charts
+import client_charts
+import data_loader
+import renderers
+
+
+def load_data():
+    data_loader.load("order_per_city")
+
+
+def render():
+    # made-up name and description
+    st.title('ShopEase')
+    st.markdown('''ShopEase is your go-to online marketplace for a seamless and enjoyable shopping experience.
+            We offer a wide range of high-quality products, from electronics and fashion to home essentials and beauty products. 
+            With fast delivery, secure payment options, and excellent customer service, ShopEase ensures that your shopping journey is convenient, affordable, and hassle-free.''')
+
+    st.subheader('Sales Level')
+    st.markdown(
+        '''
+        Our sellers usually from South America while the customers may vary. The city with the most sales order is Sao Paulo.
+        '''
+    )
+
+    # Import data
+    order_per_city = data_loader.load("order_per_city")
+
+    colors = ["#72BCD4", "#D3D3D3", "#D3D3D3", "#D3D3D3", "#D3D3D3"]
+
+    renderers.show("home", "home_fig", charts.home_fig, client_charts.home_spec, order_per_city.head(5), colors)
+
+    st.markdown(
+        '''
+        For the other sales information, you can pick which data you want to display by checking the multibox on the sidebar.
+        '''
+    )
@@ -0,0 +1,81 @@
+"""Product Detail Impact section: review score and sales of detailed vs non-detailed products."""
+import streamlit as st
+
+import charts
+import client_charts
+import data_loader
+import renderers
+import sketches
+
+
+def load_data():
+    sketches.box_stats("detailed_product_review")
+    for name in ("detailed_product_sales", "non_detailed_product_sales"):
+        data_loader.load(name)
+
+
+def render():
+    st.title('Product Detail Impact Analysis')
+    st.write("This section explores how product details influence purchases.")
+
+    st.markdown(
+            '''
+            The impact of product details are analyzed based on it's impact on review score and sales level.
+            The review score impact is analyzed using box plot to give a better insight of the min, max, mean, or even outlier.
+            The sales level is analyzed using bar plot to show a better comparison.
+            '''
+        )
+
+    tab1, tab2 = st.tabs(["Review Score", "Sales Level"])
+
+    with tab1:
+        # ============= Product Detail to Review Score ========== #
+        # Quartiles and whiskers from the review score sketches
+        detailed_stats = sketches.box_stats("detailed_product_review")
+        non_detailed_stats = sketches.box_stats("non_detailed_product_review")
+
+        renderers.show(
+            "product_detail", "detail_to_review_fig", charts.detail_to_review_fig, client_charts.detail_to_review_spec,
+            detailed_stats, non_detailed_stats
+        )
+
+        # Add Explanation
+        with st.expander("See explanation"):
+            st.markdown(
+                '''
+                The products with detailed information have a better review score than the one with non-detailed information.
+                Its review scores mostly spread from 5-star to approximately 3.6-star, while the non-detailed products spread
+                from 5-star to approximately 3-star. The average review score of the detailed products also better for approximatelly 4.65%.
+                '''
+            )
+    
+    with tab2:
+        # ============= Product Detail to Sales Level ========== #
+        # import data
+        detailed_product_sales = data_loader.load("detailed_product_sales")
+        non_detailed_product_sales = data_loader.load("non_detailed_product_sales")
+
+        # Compute mean sales
+        detailed_product_mean_sales = detailed_product_sales["order_id"].mean()
+        non_detailed_product_mean_sales = non_detailed_product_sales["order_id"].mean()
+
+        renderers.show(
+            "product_detail", "detail_to_sales_fig", charts.detail_to_sales_fig, client_charts.detail_to_sales_spec,
+            detailed_product_mean_sales, non_detailed_product_mean_sales
+        )
+
+        with st.expander("See explanation"):
+            st.markdown(
+                '''
+                The products with detailed information have a better average sales than the one with non-detailed information
+                for approximately 37.2%.
+                '''
+            )
+        
+    # Add conclusion
+    st.subheader("Conclusion")
+    st.markdown(
+        '''
+        The detail information about each product significantly affects the total sales but slightly affects review score.
+        '''
+    )
@@ -0,0 +1,117 @@
+"""Reviews Impact section: sales per review-score band for products and sellers."""
+import streamlit as st
+
+import charts
+import client_charts
+import renderers
+import sketches
+
+
+def load_data():
+    sketches.bucket_sales("score_per_product", "star_bands")
+
+
+def render():
+    st.title('Reviews Impact Analysis')
+    st.write("This section evaluates how reviews impact sales in two ways.")
+    st.markdown(
+        '''
+        The first one is based on the good and bad products:
+        - Good products: review score > 3
+        - Bad products: review score <= 3
+        
+
+        The second way is by separating the products based on their average review score:
+        - One-star products: review score between 1.0 to 1.5
+        - Two-star products: review score between 1.5 to 2.5
+        - Three-star products: review score between 2.5 to 3.5
+        - Four-star products: review score between 3.5 to 4.5
+        - Five-star products: review score between 4.5 to 5.0
+        '''
+    )
+
+    # tabs to seperate the good vs bad product and each review score product
+    tab1, tab2 = st.tabs(["Good vs Bad Review", "Each Review Score"])
+
+    #============ Good vs Bad Product =================#
+    with tab1:
+        # Calculation
+        good_bad_product = sketches.bucket_sales("score_per_product", "good_bad").loc[["Good Review", "Bad Review"]]
+
+        # Show the plot
+        renderers.show(
+            "reviews", "good_bad_product_sales_fig", charts.good_bad_product_sales_fig,
+            client_charts.good_bad_product_sales_spec, good_bad_product
+        )
+
+        # Add explanation
+        with st.expander("See explanation"):
+            st.markdown(
+            '''
+            The product with a good review (i.e., higher than 3) surpass the ones with bad review by a significant amount.
+            '''
+            )
+
+    #============ Each Star Product =================#
+    with tab2:
+        # Calculation
+        each_star_product = sketches.bucket_sales("score_per_product", "star_bands")
+
+        # Show the plot
+        renderers.show(
+            "reviews", "each_product_sales_fig", charts.each_review_sales_fig, client_charts.each_review_sales_spec,
+            each_star_product, "Product Review", "Comparison of Sales for Each Review Score of Products"
+        )
+
+        # Add explanation
+        with st.expander("See explanation"):
+            st.markdown(
+            '''
+            The product with more than 3-star review surpass the 1-star, 2-star, and 3-star review in both total and average sales.
+            However, the most sales for both total and average is in the 4-star product. The 5-star product surprisingly has less sales than the
+            4-star and 3-star product, but still better than the low star (i.e., 1-star and 2-star) product.
+            '''
+            )
+    
+    st.markdown(
+        '''
+        Review score also impacts the sales level of each seller.
+        We only use the second way to analyze it to give a better insight.
+        
+        
+        The sellers are separated based on their average review score:
+        - One-star sellers: review score between 1.0 to 1.5
+        - Two-star sellers: review score between 1.5 to 2.5
+        - Three-star sellers: review score between 2.5 to 3.5
+        - Four-star sellers: review score between 3.5 to 4.5
+        - Five-star sellers: review score between 4.5 to 5.0
+        '''
+    )
+
+    #========= Each Review Seller ===========#
+    each_star_store = sketches.bucket_sales("score_per_store", "star_bands")
+
+    # Show the plot
+    renderers.show(
+        "reviews", "each_store_sales_fig", charts.each_review_sales_fig, client_charts.each_review_sales_spec,
+        each_star_store, "Store Review", "Comparison of Sales for Good and Bad Reviewed Store"
+    )
+
+    # Add Explanation
+    with st.expander("See explanation"):
+        st.markdown(
+            '''
+            The store with more than 3-star review surpass the 1-star, 2-star, and 3-star review in both total and average sales.
+            However, the most sales for both total and average is in the 4-star store. The 5-star store surprisingly has less sales than the
+            4-star and 3-star store, but still better than the low star (i.e., 1-star and 2-star) store.
+            '''
+        )
+
+    # Add Conclusion
+    st.subheader("Conclusion")
+    st.markdown(
+        '''
+        From the above figures, we can see that the review score is mostly directly proportional to the total sales and average sales.
+        This fact is true for both product review and store review.
+        '''
+    )
@@ -0,0 +1,276 @@
+"""Mergeable sketches of the review distributions.
+
+``KLLSketch`` keeps a few hundred sampled values of a distribution (a KLL
+quantile sketch) and answers quantiles within about 1% rank error.
+``HyperLogLog`` estimates distinct counts from 4096 one-byte registers (about
+1.6% error). Both have a fixed size whatever the number of values, and two
+sketches of the same kind merge into the sketch of the combined data, so they
+can be built per partition or per time window and combined later.
+
+The ``review_sketches`` pipeline stage stores them in review_sketches.csv:
+quantile sketches of ``review_score_mean`` for detailed and non-detailed
+products, and for every review band of products and sellers the total sales
+and a distinct-count sketch of the ids in it.
+"""
+import base64
+import json
+import threading
+
+import numpy as np
+import pandas as pd
+
+import data_loader
+import tracing
+from star_buckets import GOOD_BAD, STAR_BANDS, add_average, bucket_codes, by_bucket
+
+# bin name in review_sketches.csv -> bin specification
+BINS = {"star_bands": STAR_BANDS, "good_bad": GOOD_BAD}
+
+_sketches = {}
+_lock = threading.Lock()
+
+
+class KLLSketch:
+    """Quantile sketch: values sampled into levels, a value at level h stands for 2**h values."""
+
+    def __init__(self, k=200, seed=0):
+        self.k = k
+        self.levels = [np.empty(0)]
+        self.count = 0
+        self.min = np.inf
+        self.max = -np.inf
+        self._rng = np.random.default_rng(seed)
+
+    def _capacity(self, level):
+        depth = len(self.levels) - level - 1
+        return max(2, int(np.ceil(self.k * (2 / 3) ** depth)))
+
+    def _compress(self):
+        level = 0
+        while level < len(self.levels):
+            items = self.levels[level]
+            if len(items) > self._capacity(level):
+                if level + 1 == len(self.levels):
+                    self.levels.append(np.empty(0))
+                # Keep every other sorted value (random phase) at twice the weight
+                items = np.sort(items)
+                odd = len(items) % 2
+                promoted = items[odd:][self._rng.integers(2)::2]
+                self.levels[level + 1] = np.concatenate([self.levels[level + 1], promoted])
+                self.levels[level] = items[:odd]
+            level += 1
+
+    def update(self, values):
+        values = np.asarray(values, dtype="float64")
+        values = values[~np.isnan(values)]
+        if len(values):
+            self.count += len(values)
+            self.min = min(self.min, values.min())
+            self.max = max(self.max, values.max())
+            self.levels[0] = np.concatenate([self.levels[0], values])
+            self._compress()
+        return self
+
+    def merge(self, other):
+        while len(self.levels) < len(other.levels):
+            self.levels.append(np.empty(0))
+        for level, items in enumerate(other.levels):
+            self.levels[level] = np.concatenate([self.levels[level], items])
+        self.count += other.count
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        self._compress()
+        return self
+
+    def _weighted(self):
+        items = np.concatenate(self.levels)
+        weights = np.concatenate([np.full(len(values), 2.0 ** level) for level, values in enumerate(self.levels)])
+        order = np.argsort(items, kind="stable")
+        return items[order], weights[order]
+
+    def quantile(self, q):
+        """Approximate ``q`` quantile(s); the exact min and max at 0 and 1."""
+        if not self.count:
+            return np.full(np.shape(q), np.nan) if np.ndim(q) else np.nan
+        items, weights = self._weighted()
+        cumulative = np.cumsum(weights)
+        index = np.searchsorted(cumulative, np.asarray(q) * cumulative[-1], side="left")
+        result = items[np.clip(index, 0, len(items) - 1)]
+        result = np.where(np.asarray(q) <= 0, self.min, np.where(np.asarray(q) >= 1, self.max, result))
+        return result if np.ndim(q) else float(result)
+
+    def box_stats(self, label=None):
+        """Quartiles, 1.5 IQR whiskers and outliers in the form of ``Axes.bxp`` input.
+
+        Whiskers and outliers are values retained by the sketch, so they are
+        real data points, but not every outlier of the data is drawn.
+        """
+        q1, median, q3 = self.quantile([0.25, 0.5, 0.75])
+        low, high = q1 - 1.5 * (q3 - q1), q3 + 1.5 * (q3 - q1)
+        items = np.unique(np.concatenate(self.levels + [[self.min, self.max]]))
+        inside = items[(items >= low) & (items <= high)]
+        return {
+            "label": label,
+            "med": median,
+            "q1": q1,
+            "q3": q3,
+            "whislo": inside.min() if len(inside) else q1,
+            "whishi": inside.max() if len(inside) else q3,
+            "fliers": items[(items < low) | (items > high)],
+        }
+
+    def state(self):
+        return json.dumps({
+            "k": self.k,
+            "count": self.count,
+            "min": self.min if self.count else None,
+            "max": self.max if self.count else None,
+            "levels": [items.tolist() for items in self.levels],
+        })
+
+    @classmethod
+    def from_state(cls, state):
+        data = json.loads(state)
+        sketch = cls(data["k"])
+        sketch.count = data["count"]
+        if sketch.count:
+            sketch.min, sketch.max = data["min"], data["max"]
+        sketch.levels = [np.asarray(items, dtype="float64") for items in data["levels"]]
+        return sketch
+
+
+class HyperLogLog:
+    """Distinct-count sketch over the 64-bit pandas hash of the values."""
+
+    def __init__(self, p=12):
+        self.p = p
+        self.registers = np.zeros(1 << p, dtype="uint8")
+
+    @staticmethod
+    def hash(values):
+        """uint64 hashes of ``values``, as ``update`` adds them."""
+        return pd.util.hash_array(np.asarray(values, dtype=object))
+
+    def update(self, values):
+        return self.update_hashes(self.hash(values))
+
+    def update_hashes(self, hashes):
+        """Add values by their uint64 hashes."""
+        index, rank = self.ranks(hashes)
+        np.maximum.at(self.registers, index, rank)
+        return self
+
+    def ranks(self, hashes):
+        """(register, rank) of every uint64 hash."""
+        index = (hashes >> np.uint64(64 - self.p)).astype("int64")
+        # Remaining bits, with a stop bit so the rank is at most 64 - p + 1
+        rest = (hashes << np.uint64(self.p)) | np.uint64(1 << (self.p - 1))
+        # Position of the highest set bit; frexp is exact below 2**53
+        top = rest >> np.uint64(11)
+        highest = np.where(
+            top > 0,
+            np.frexp(top.astype("float64"))[1] - 1 + 11,
+            np.frexp(rest.astype("float64"))[1] - 1,
+        )
+        return index, (64 - highest).astype("uint8")
+
+    def merge(self, other):
+        np.maximum(self.registers, other.registers, out=self.registers)
+        return self
+
+    def estimate(self):
+        m = len(self.registers)
+        alpha = 0.7213 / (1 + 1.079 / m)
+        estimate = alpha * m * m / np.sum(2.0 ** -self.registers.astype("float64"))
+        zeros = np.count_nonzero(self.registers == 0)
+        if estimate <= 2.5 * m and zeros:
+            # Linear counting is more accurate for small cardinalities
+            estimate = m * np.log(m / zeros)
+        return estimate
+
+    def state(self):
+        return json.dumps({"p": self.p, "registers": base64.b64encode(self.registers.tobytes()).decode()})
+
+    @classmethod
+    def from_state(cls, state):
+        data = json.loads(state)
+        sketch = cls(data["p"])
+        sketch.registers = np.frombuffer(base64.b64decode(data["registers"]), dtype="uint8").copy()
+        return sketch
+
+
+KINDS = {"kll": KLLSketch, "hll": HyperLogLog}
+
+
+def sketch_rows(score_frames, review_frames):
+    """Rows of review_sketches.csv.
+
+    ``score_frames`` maps a table name to (frame, entity) for score tables
+    with ``order_id`` sales and ``review_score_mean``; ``review_frames`` maps
+    a table name to a frame with ``review_score_mean``.
+    """
+    rows = []
+    for name, frame in review_frames.items():
+        scores = frame["review_score_mean"]
+        rows.append({"name": name, "bins": "", "bucket": "", "kind": "kll",
+                     "total": scores.count(), "state": KLLSketch().update(scores).state()})
+
+    for name, (frame, entity) in score_frames.items():
+        # Every id is hashed once; the sketch of a bucket keeps the top rank per register
+        index, rank = HyperLogLog().ranks(HyperLogLog.hash(frame[entity]))
+        for bins_name, bins in BINS.items():
+            codes = bucket_codes(frame["review_score_mean"], bins)
+            totals = by_bucket(frame["order_id"].groupby(codes).sum(), bins)
+            inside = codes >= 0
+            registers = np.zeros((len(bins["labels"]), 1 << HyperLogLog().p), dtype="uint8")
+            np.maximum.at(registers, (codes[inside], index[inside]), rank[inside])
+            for code, label in enumerate(bins["labels"]):
+                sketch = HyperLogLog()
+                sketch.registers = registers[code]
+                rows.append({"name": name, "bins": bins_name, "bucket": label, "kind": "hll",
+                             "total": totals[label], "state": sketch.state()})
+    return pd.DataFrame(rows, columns=["name", "bins", "bucket", "kind", "total", "state"])
+
+
+def read(frame):
+    """{(name, bins, bucket): (total, sketch)} from a review_sketches frame."""
+    # Empty bins/bucket (quantile sketches) are read back as NaN
+    rows = frame.fillna({"bins": "", "bucket": ""})
+    return {
+        (row.name, row.bins, row.bucket): (row.total, KINDS[row.kind].from_state(row.state))
+        for row in rows.itertuples(index=False)
+    }
+
+
+def _load():
+    # Signature taken before loading: a CSV replaced in between is read again on the next call
+    signature = data_loader._signature(data_loader.csv_path("review_sketches"))
+    frame = data_loader.load("review_sketches")
+    with _lock:
+        cached = _sketches.get("current")
+        if cached is None or cached[0] != signature:
+            with tracing.span("sketches:read"):
+                cached = _sketches["current"] = (signature, read(frame))
+        return cached[1]
+
+
+def box_stats(name, label=None, sketches=None):
+    """``Axes.bxp`` statistics of the review_score_mean sketch of table ``name``.
+
+    ``sketches`` defaults to the published review_sketches.csv (see ``read``).
+    """
+    sketches = sketches or _load()
+    return sketches[(name, "", "")][1].box_stats(label)
+
+
+def bucket_sales(name, bins_name, sketches=None):
+    """Like ``star_buckets.bucket_sales`` of table ``name``, read from its sketches.
+
+    ``entities`` is the distinct-count estimate of the bucket.
+    """
+    sketches = sketches or _load()
+    labels = BINS[bins_name]["labels"]
+    return add_average(pd.DataFrame({
+        "total_sales": [sketches[(name, bins_name, label)][0] for label in labels],
+        "entities": [round(sketches[(name, bins_name, label)][1].estimate()) for label in labels],
+    }, index=pd.Index(labels, name="bucket")))
@@ -0,0 +1,411 @@
+"""Pre-rendered snapshots of the dashboard sections.
+
+The data only changes when the artifacts are rebuilt, so every section can be
+rendered once, at build time, instead of once per visitor. ``build`` renders
+the home page and every section with the default widget state while
+recording the Streamlit calls it makes, and writes them to ``SNAPSHOT_DIR``:
+
+- ``<section>.json``: the element calls (titles, markdown, metrics, chart
+  specs, tables) and layout (tabs, columns, expanders) of one section
+- ``assets/<hash>.png``: the rendered figures, stored once by content
+- ``manifest.json``: the fingerprint of the data files and code the
+  snapshots were rendered from, for every combination of the "Data Shown"
+  multiselect the sections its page is made of, and the options of the Sales
+  Explorer filters
+
+Data files are identified by the fingerprints the pipeline recorded for them
+in its build manifest, so a copied or rebuilt data directory with the same
+contents keeps its snapshots; files the pipeline did not write are
+identified by size and mtime.
+
+With ``DASHBOARD_SNAPSHOT=1``, dashboard.py replays the snapshots: no data is
+loaded (the sidebar filters read their options from the manifest), nothing is computed and no chart is drawn. A section falls back to
+live rendering when its snapshot is missing, when the data files or the
+rendering code changed after it was rendered, or when the widget values and
+query parameters it read differ from the ones it was rendered with (e.g.
+Sales Explorer filters, ``?renderer=``). ``?snapshot=0`` renders live for a
+session.
+
+    cd dashboard
+    python snapshot.py                      # or python -m pipeline --snapshots
+"""
+import argparse
+import contextlib
+import hashlib
+import importlib
+import importlib.util
+import io
+import itertools
+import json
+import os
+import threading
+from pathlib import Path
+
+import streamlit as st
+
+import data_loader
+import sections
+import tracing
+
+ENABLED = os.environ.get("DASHBOARD_SNAPSHOT") == "1"
+SNAPSHOT_DIR = Path(os.environ.get("DASHBOARD_SNAPSHOT_DIR", Path(__file__).resolve().parent / ".snapshots"))
+QUERY_PARAM = "snapshot"
+MANIFEST_NAME = "manifest.json"
+# Build manifest of the pipeline (pipeline/build.py), relative to the data directory
+PIPELINE_MANIFEST = Path(".build") / "manifest.json"
+# Bumped when the recorded format changes; older snapshots are then rendered live
+FORMAT_VERSION = 2
+
+# Section label -> module, the home page first
+PAGES = {"Home": "sections.home", **sections.SECTIONS}
+
+# Modules whose code shapes the recorded pages, besides the sections themselves
+SOURCES = (
+    "charts", "client_charts", "geo_charts", "renderers", "figure_cache", "tile_store", "cube", "geo_grid",
+    "sketches", "star_buckets", "data_loader",
+)
+
+# Sales Explorer filters whose options the sidebar shows
+FILTERS = ("month", "customer_state", "product_category", "seller_state", "star_bucket")
+
+# Element calls recorded as they are; tabs, columns and expanders are recorded with their children
+ELEMENTS = (
+    "title", "subheader", "markdown", "write", "metric", "image", "vega_lite_chart", "pydeck_chart",
+    "dataframe", "line_chart", "bar_chart",
+)
+
+_manifest = {}
+_pipeline = {}
+_sections = {}
+_source_digest = []
+_lock = threading.Lock()
+
+
+# ============= Recording ============= #
+class _Reads(dict):
+    """Widget state or query parameters; remembers every key a section reads.
+
+    Reads that do not name a key (iteration, ``keys()``, ``len()`` ...) raise
+    TypeError, so a section that makes them is rendered live.
+    """
+
+    def __init__(self, values):
+        super().__init__(values)
+        self.read = {}
+
+    def _record(self, key):
+        # Missing keys are recorded as None, which is what ``get`` reads back live
+        self.read[key] = _plain(super().get(key))
+
+    def get(self, key, default=None):
+        self._record(key)
+        return super().get(key, default)
+
+    def __getitem__(self, key):
+        self._record(key)
+        return super().__getitem__(key)
+
+    def __contains__(self, key):
+        self._record(key)
+        return super().__contains__(key)
+
+    def __getattr__(self, key):
+        if key.startswith("__"):
+            raise AttributeError(key)
+        self._record(key)
+        try:
+            return super().__getitem__(key)
+        except KeyError:
+            raise AttributeError(key) from None
+
+    def _untracked(self, *args, **kwargs):
+        raise TypeError("snapshots only support reading widget state and query parameters by key")
+
+    __iter__ = __len__ = keys = values = items = to_dict = _untracked
+
+
+class _Container:
+    """Records the calls made on one container (the page, a tab, a column or an expander)."""
+
+    def __init__(self, recorder):
+        self.recorder = recorder
+        self.ops = []
+
+    def __getattr__(self, name):
+        if name not in ELEMENTS:
+            raise AttributeError(f"snapshots do not support st.{name}")
+
+        def element(*args, **kwargs):
+            self.ops.append({"op": name, "args": self.recorder.encode(list(args)),
+                             "kwargs": self.recorder.encode(kwargs)})
+        return element
+
+    def _children(self, op, args, count):
+        children = [_Container(self.recorder) for _ in range(count)]
+        self.ops.append({"op": op, "args": self.recorder.encode(list(args)),
+                         "children": [child.ops for child in children]})
+        return children
+
+    def tabs(self, labels):
+        return self._children("tabs", [labels], len(labels))
+
+    def columns(self, spec):
+        return self._children("columns", [spec], spec if isinstance(spec, int) else len(spec))
+
+    def expander(self, label, expanded=False):
+        return self._children("expander", [label, expanded], 1)[0]
+
+    def __enter__(self):
+        self.recorder.stack.append(self)
+        return self
+
+    def __exit__(self, *exc):
+        self.recorder.stack.pop()
+
+
+class _Recorder:
+    """Stand-in for the ``streamlit`` module while a section renders."""
+
+    def __init__(self, session_state):
+        self.assets = {}
+        self.page = _Container(self)
+        self.stack = [self.page]
+        self.session_state = _Reads(session_state)
+        self.query_params = _Reads({})
+
+    def __getattr__(self, name):
+        return getattr(self.stack[-1], name)
+
+    def encode(self, value):
+        import pandas as pd
+        if isinstance(value, bytes):
+            name = hashlib.sha256(value).hexdigest()[:20] + ".png"
+            self.assets[name] = value
+            return {"$asset": name}
+        if isinstance(value, pd.DataFrame):
+            # The table schema keeps index names and dtypes, so "2017-01" months stay strings
+            return {"$frame": value.to_json(orient="table", date_format="iso")}
+        if hasattr(value, "to_json") and hasattr(value, "layers"):
+            # pydeck Deck
+            return {"$deck": value.to_json(), "tooltip": getattr(value, "_tooltip", None)}
+        if isinstance(value, dict):
+            return {key: self.encode(item) for key, item in value.items()}
+        if isinstance(value, (list, tuple)):
+            return [self.encode(item) for item in value]
+        if value is None or isinstance(value, (str, int, float, bool)):
+            return value
+        raise TypeError(f"cannot snapshot a {type(value).__name__}")
+
+
+def _plain(value):
+    """``value`` as it reads back from JSON (tuples become lists)."""
+    return json.loads(json.dumps(value, default=str))
+
+
+@contextlib.contextmanager
+def _recording(modules, recorder):
+    # The sections and renderers.py call ``st.<element>`` on their module global
+    saved = {module: module.st for module in modules}
+    try:
+        for module in modules:
+            module.st = recorder
+        yield recorder
+    finally:
+        for module, original in saved.items():
+            module.st = original
+
+
+def _sources():
+    """Digest of the source of the sections and of the modules in SOURCES, read once per process."""
+    with _lock:
+        if not _source_digest:
+            digest = hashlib.sha256()
+            for name in [*PAGES.values(), *SOURCES]:
+                digest.update(name.encode())
+                digest.update(Path(importlib.util.find_spec(name).origin).read_bytes())
+            _source_digest.append(digest.hexdigest())
+        return _source_digest[0]
+
+
+def _pipeline_outputs():
+    """Output name -> fingerprint it was last written with, from the pipeline build manifest."""
+    path = data_loader.DATA_DIR / PIPELINE_MANIFEST
+    try:
+        signature = data_loader._signature(path)
+    except OSError:
+        return {}
+    with _lock:
+        if _pipeline.get("signature") != signature:
+            _pipeline.update(signature=signature, outputs=json.loads(path.read_text()).get("outputs", {}))
+        return _pipeline["outputs"]
+
+
+def fingerprint():
+    """Digest of the data files, the rendering code, the snapshot format and the renderer setting."""
+    digest = hashlib.sha256(repr((FORMAT_VERSION, _sources(), os.environ.get("DASHBOARD_RENDERER", ""))).encode())
+    outputs = _pipeline_outputs()
+    for name in data_loader.DATASETS:
+        path = data_loader.csv_path(name)
+        if path.exists():
+            digest.update(repr((name, outputs.get(name) or data_loader._signature(path))).encode())
+    return digest.hexdigest()
+
+
+def _write(path, data):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(path.name + ".tmp")
+    tmp.write_bytes(data)
+    os.replace(tmp, path)
+
+
+def render(label):
+    """(element calls, assets, state read) of section ``label`` rendered with its default widget state."""
+    import renderers
+    module = importlib.import_module(PAGES[label])
+    recorder = _Recorder(getattr(module, "default_state", dict)())
+    with _recording([module, renderers], recorder):
+        module.render()
+    state = {"session_state": recorder.session_state.read, "query_params": recorder.query_params.read}
+    return recorder.page.ops, recorder.assets, state
+
+
+def build(output=SNAPSHOT_DIR, log=print):
+    """Render every section to ``output`` and write the manifest; returns the labels snapshotted."""
+    output = Path(output)
+    manifest = {"fingerprint": fingerprint(), "sections": {}, "pages": {}, "options": {}}
+    for label in PAGES:
+        try:
+            ops, assets, state = render(label)
+        except (OSError, KeyError, TypeError, AttributeError) as error:
+            # Missing artifacts or elements that cannot be recorded: rendered live
+            log(f"[live] {label}: {error}")
+            continue
+        for name, data in assets.items():
+            if not (output / "assets" / name).exists():
+                _write(output / "assets" / name, data)
+        file = PAGES[label].rpartition(".")[2] + ".json"
+        _write(output / file, json.dumps({"state": state, "ops": ops}, separators=(",", ":")).encode())
+        manifest["sections"][label] = file
+        log(f"[snapshot] {label}: {len(assets)} figures")
+
+    # Every combination of the "Data Shown" multiselect; sections render in SECTIONS order
+    for count in range(len(sections.SECTIONS) + 1):
+        for shown in itertools.combinations(sections.SECTIONS, count):
+            manifest["pages"][" + ".join(shown)] = ["Home", *shown]
+    if data_loader.available("sales_cube"):
+        import cube
+        manifest["options"] = {dimension: _plain(cube.options(dimension)) for dimension in FILTERS}
+    _write(output / MANIFEST_NAME, json.dumps(manifest, indent=2).encode())
+    return list(manifest["sections"])
+
+
+# ============= Serving ============= #
+def _load_manifest():
+    path = SNAPSHOT_DIR / MANIFEST_NAME
+    try:
+        signature = data_loader._signature(path)
+    except OSError:
+        return None
+    with _lock:
+        if _manifest.get("signature") != signature:
+            _manifest.update(signature=signature, data=json.loads(path.read_text()))
+            _sections.clear()
+        return _manifest["data"]
+
+
+def _load_section(label, file):
+    with _lock:
+        if label not in _sections:
+            _sections[label] = json.loads((SNAPSHOT_DIR / file).read_text())
+        return _sections[label]
+
+
+def _decode(value):
+    if isinstance(value, dict):
+        if "$asset" in value:
+            return str(SNAPSHOT_DIR / "assets" / value["$asset"])
+        if "$frame" in value:
+            import pandas as pd
+            return pd.read_json(io.StringIO(value["$frame"]), orient="table",
+                                convert_axes=False, convert_dates=False)
+        if "$deck" in value:
+            return _StoredDeck(value["$deck"], value["tooltip"])
+        return {key: _decode(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return [_decode(item) for item in value]
+    return value
+
+
+class _StoredDeck:
+    """A recorded pydeck Deck, as much of it as st.pydeck_chart reads."""
+
+    layers = ()
+    deck_widget = None
+
+    def __init__(self, spec, tooltip):
+        self.spec = spec
+        self._tooltip = tooltip
+
+    def to_json(self):
+        return self.spec
+
+
+def _replay(ops, container):
+    for op in ops:
+        args = _decode(op["args"])
+        if op["op"] == "tabs":
+            children = container.tabs(*args)
+        elif op["op"] == "columns":
+            children = container.columns(*args)
+        elif op["op"] == "expander":
+            children = [container.expander(*args)]
+        else:
+            getattr(container, op["op"])(*args, **_decode(op["kwargs"]))
+            continue
+        for child, child_ops in zip(children, op["children"]):
+            _replay(child_ops, child)
+
+
+def _matches(read, live):
+    return all(_plain(live.get(key)) == value for key, value in read.items())
+
+
+def _current_manifest():
+    """The manifest when snapshots are replayed and still match the data and code, else None."""
+    if not ENABLED or st.query_params.get(QUERY_PARAM) == "0":
+        return None
+    manifest = _load_manifest()
+    if manifest is None or manifest["fingerprint"] != fingerprint():
+        return None
+    return manifest
+
+
+def options(dimension):
+    """Recorded options of the Sales Explorer filter on ``dimension``; None when they have to be read live."""
+    manifest = _current_manifest()
+    return None if manifest is None else manifest.get("options", {}).get(dimension)
+
+
+def replay(label):
+    """Draw the snapshot of section ``label``; False (nothing drawn) when it has to be rendered live."""
+    manifest = _current_manifest()
+    if manifest is None or label not in manifest["sections"]:
+        return False
+    snapshot = _load_section(label, manifest["sections"][label])
+    if not (_matches(snapshot["state"]["session_state"], st.session_state)
+            and _matches(snapshot["state"]["query_params"], st.query_params)):
+        return False
+    with tracing.span("snapshot"):
+        _replay(snapshot["ops"], st)
+    return True
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Pre-render the dashboard sections.")
+    parser.add_argument("--output", default=str(SNAPSHOT_DIR), help="snapshot directory")
+    args = parser.parse_args(argv)
+    build(Path(args.output))
+
+
+if __name__ == "__main__":
+    main()
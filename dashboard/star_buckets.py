@@ -0,0 +1,64 @@
+"""Review-score bucketing of per-product / per-seller sales.
+
+A bin specification is a dict with ``edges`` and ``labels``. Buckets are
+right-closed like the original filters (``lower < score <= upper``), and the
+first bucket also includes its lower edge, so ``STAR_BANDS`` reproduces the
+1.0-1.5 / 1.5-2.5 / ... / 4.5-5.0 bands and ``GOOD_BAD`` the split at 3.0.
+Scores outside every bucket (or missing) are ignored.
+"""
+import numpy as np
+import pandas as pd
+
+STAR_BANDS = {
+    "edges": [1.0, 1.5, 2.5, 3.5, 4.5, 5.0],
+    "labels": ["One-star", "Two-star", "Three-star", "Four_star", "Five_star"],
+}
+
+# Bar colors of the STAR_BANDS buckets
+STAR_PALETTE = ["red", "red", "yellow", "green", "green"]
+
+GOOD_BAD = {
+    "edges": [-np.inf, 3.0, np.inf],
+    "labels": ["Bad Review", "Good Review"],
+}
+
+
+def bucket_codes(scores, bins):
+    """Bucket index of every score in ``bins``, -1 outside every bucket (or missing)."""
+    codes = pd.cut(
+        scores,
+        bins=bins["edges"],
+        labels=False,
+        right=True,
+        include_lowest=True,
+    )
+    return np.nan_to_num(np.asarray(codes, dtype="float64"), nan=-1).astype("int64")
+
+
+def by_bucket(grouped, bins):
+    """``grouped`` (indexed by bucket code) indexed by the labels of ``bins``; empty buckets are 0."""
+    result = grouped.reindex(range(len(bins["labels"])), fill_value=0)
+    result.index = pd.Index(bins["labels"], name="bucket")
+    return result
+
+
+def add_average(result):
+    """Adds ``average_sales`` (total_sales / entities, NaN for empty buckets) to ``result``."""
+    result["average_sales"] = result["total_sales"] / result["entities"].replace(0, np.nan)
+    return result
+
+
+def bucket_sales(frame, bins, entity, score="review_score_mean", sales="order_id"):
+    """Total and per-entity sales for every bucket of ``bins``.
+
+    ``frame`` has one or more rows per ``entity`` (e.g. product_id or
+    seller_id) with a ``score`` to bucket on and a ``sales`` count. Returns a
+    frame indexed by bucket label with ``total_sales``, ``entities`` (distinct
+    entities in the bucket) and ``average_sales`` (total_sales / entities).
+    Empty buckets are kept with zero sales and NaN average.
+    """
+    grouped = frame.groupby(bucket_codes(frame[score], bins)).agg(
+        total_sales=(sales, "sum"),
+        entities=(entity, "nunique"),
+    )
+    return add_average(by_bucket(grouped, bins))
@@ -0,0 +1,331 @@
+"""Offline basemap tiles for the Geographics maps.
+
+Tiles are read from a local store instead of the live OpenStreetMap server:
+either a ``{z}/{x}/{y}.png`` directory (``DASHBOARD_TILE_DIR``, default
+``dashboard/tiles``) or an MBTiles file (``DASHBOARD_TILE_MBTILES``). The store
+is seeded once for the Brazil extent, where network access is available::
+
+    cd dashboard
+    python tile_store.py seed                    # zoom 3-8 into dashboard/tiles
+    python tile_store.py seed --zoom 9 --mbtiles brazil.mbtiles
+
+``add_basemap(ax)`` is a drop-in for ``ctx.add_basemap(ax)`` on EPSG:3857
+axes. The stitched raster for a tile range is cached in memory, so only the
+point layer is drawn per request. The automatic zoom is moved to the nearest
+lower zoom the store has tiles for (or the lowest stored one, if that is
+within ``MAX_TILES``). Tiles that are not 256 px (e.g. 512 px "retina" tiles)
+are resized to fit. Tiles missing from the store are drawn as a
+blank background; set ``DASHBOARD_TILE_FETCH=1`` to download (and store) them
+on demand instead.
+"""
+import argparse
+import contextlib
+import hashlib
+import io
+import math
+import os
+import sqlite3
+import threading
+import time
+import urllib.request
+from collections import OrderedDict
+from pathlib import Path
+
+import numpy as np
+from PIL import Image
+
+import tracing
+
+TILE_DIR = Path(os.environ.get("DASHBOARD_TILE_DIR", Path(__file__).resolve().parent / "tiles"))
+MBTILES = os.environ.get("DASHBOARD_TILE_MBTILES")
+FETCH_MISSING = os.environ.get("DASHBOARD_TILE_FETCH") == "1"
+
+TILE_URL = "https://tile.openstreetmap.org/{z}/{x}/{y}.png"
+ATTRIBUTION = "(C) OpenStreetMap contributors"
+USER_AGENT = "ShopEase-dashboard tile seeder"
+
+# lon/lat bounding box of Brazil (west, south, east, north)
+BRAZIL_BOUNDS = (-74.0, -34.0, -34.0, 5.5)
+DEFAULT_ZOOMS = range(3, 9)
+MAX_ZOOM = 19
+
+TILE_SIZE = 256
+EARTH_HALF_CIRCUMFERENCE = 20037508.342789244
+BLANK_COLOR = (242, 239, 233)
+
+MAX_COMPOSITES = 16
+# Most tiles stitched into one basemap; the zoom is lowered until the extent fits
+MAX_TILES = 64
+# Seconds a store state is reused for, so one script run scans the store once
+STATE_TTL = 2.0
+
+_composites = OrderedDict()
+_state = {}
+_lock = threading.Lock()
+
+
+# ============= Tile math (Web Mercator / XYZ scheme) ============= #
+def lonlat_to_tile(lon, lat, zoom):
+    n = 2 ** zoom
+    lat = max(min(lat, 85.0511), -85.0511)
+    x = int((lon + 180.0) / 360.0 * n)
+    y = int((1.0 - math.asinh(math.tan(math.radians(lat))) / math.pi) / 2.0 * n)
+    return min(max(x, 0), n - 1), min(max(y, 0), n - 1)
+
+
+def mercator_to_lonlat(x, y):
+    lon = x / EARTH_HALF_CIRCUMFERENCE * 180.0
+    lat = math.degrees(math.atan(math.sinh(y / EARTH_HALF_CIRCUMFERENCE * math.pi)))
+    return lon, lat
+
+
+def tile_bounds(x, y, zoom):
+    """EPSG:3857 bounds (left, bottom, right, top) of one tile."""
+    size = 2 * EARTH_HALF_CIRCUMFERENCE / 2 ** zoom
+    left = -EARTH_HALF_CIRCUMFERENCE + x * size
+    top = EARTH_HALF_CIRCUMFERENCE - y * size
+    return left, top - size, left + size, top
+
+
+def tile_range(west, south, east, north, zoom):
+    x0, y0 = lonlat_to_tile(west, north, zoom)
+    x1, y1 = lonlat_to_tile(east, south, zoom)
+    return x0, x1, y0, y1
+
+
+def auto_zoom(west, south, east, north):
+    """Same rule contextily uses for ``zoom="auto"``."""
+    zoom_lon = math.ceil(math.log2(360 * 2.0 / max(east - west, 1e-9)))
+    zoom_lat = math.ceil(math.log2(360 * 2.0 / max(north - south, 1e-9)))
+    return int(min(zoom_lon, zoom_lat, MAX_ZOOM))
+
+
+# ============= Tile storage ============= #
+def _mbtiles_connect(path):
+    connection = sqlite3.connect(path)
+    connection.execute(
+        "CREATE TABLE IF NOT EXISTS tiles "
+        "(zoom_level INTEGER, tile_column INTEGER, tile_row INTEGER, tile_data BLOB, "
+        "PRIMARY KEY (zoom_level, tile_column, tile_row))"
+    )
+    connection.execute("CREATE TABLE IF NOT EXISTS metadata (name TEXT PRIMARY KEY, value TEXT)")
+    connection.execute(
+        "INSERT OR IGNORE INTO metadata VALUES ('name', 'ShopEase basemap'), ('format', 'png'), (?, ?)",
+        ("attribution", ATTRIBUTION),
+    )
+    return connection
+
+
+def read_tile(z, x, y, mbtiles=None, tile_dir=None):
+    """PNG bytes of tile z/x/y from the local store, or None."""
+    mbtiles = mbtiles or MBTILES
+    if mbtiles:
+        if not Path(mbtiles).exists():
+            return None
+        with contextlib.closing(sqlite3.connect(mbtiles)) as connection:
+            # MBTiles rows are numbered from the south (TMS)
+            row = connection.execute(
+                "SELECT tile_data FROM tiles WHERE zoom_level=? AND tile_column=? AND tile_row=?",
+                (z, x, 2 ** z - 1 - y),
+            ).fetchone()
+        return row[0] if row else None
+
+    path = Path(tile_dir or TILE_DIR) / str(z) / str(x) / f"{y}.png"
+    return path.read_bytes() if path.exists() else None
+
+
+def write_tile(z, x, y, data, mbtiles=None, tile_dir=None):
+    mbtiles = mbtiles or MBTILES
+    if mbtiles:
+        # The inner ``with`` commits, ``closing`` closes the connection
+        with contextlib.closing(_mbtiles_connect(mbtiles)) as connection, connection:
+            connection.execute(
+                "INSERT OR REPLACE INTO tiles VALUES (?, ?, ?, ?)",
+                (z, x, 2 ** z - 1 - y, sqlite3.Binary(data)),
+            )
+        _state.clear()
+        return
+
+    path = Path(tile_dir or TILE_DIR) / str(z) / str(x) / f"{y}.png"
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(path.name + ".tmp")
+    tmp.write_bytes(data)
+    os.replace(tmp, path)
+    _state.clear()
+
+
+def stored_zooms(mbtiles=None, tile_dir=None):
+    """Sorted zoom levels the local store has tiles for."""
+    mbtiles = mbtiles or MBTILES
+    if mbtiles:
+        if not Path(mbtiles).exists():
+            return []
+        with contextlib.closing(sqlite3.connect(mbtiles)) as connection:
+            rows = connection.execute("SELECT DISTINCT zoom_level FROM tiles").fetchall()
+        return sorted(row[0] for row in rows)
+
+    tile_dir = Path(tile_dir or TILE_DIR)
+    if not tile_dir.is_dir():
+        return []
+    return sorted(int(entry.name) for entry in os.scandir(tile_dir) if entry.is_dir() and entry.name.isdigit())
+
+
+def fetch_tile(z, x, y, timeout=30):
+    request = urllib.request.Request(TILE_URL.format(z=z, x=x, y=y), headers={"User-Agent": USER_AGENT})
+    with urllib.request.urlopen(request, timeout=timeout) as response:
+        return response.read()
+
+
+def seed(bounds=BRAZIL_BOUNDS, zooms=DEFAULT_ZOOMS, mbtiles=None, tile_dir=None, log=print):
+    """Download every tile of ``bounds`` at ``zooms`` that is not stored yet."""
+    west, south, east, north = bounds
+    for z in zooms:
+        x0, x1, y0, y1 = tile_range(west, south, east, north, z)
+        fetched = 0
+        for x in range(x0, x1 + 1):
+            for y in range(y0, y1 + 1):
+                if read_tile(z, x, y, mbtiles, tile_dir) is None:
+                    write_tile(z, x, y, fetch_tile(z, x, y), mbtiles, tile_dir)
+                    fetched += 1
+        log(f"zoom {z}: {(x1 - x0 + 1) * (y1 - y0 + 1)} tiles, {fetched} downloaded")
+
+
+def state():
+    """Signature of the tile store; changes when tiles are added or replaced.
+
+    Memoized for ``STATE_TTL`` seconds; tiles written by this process reset it.
+    """
+    with _lock:
+        cached = _state.get("current")
+        if cached is not None and time.monotonic() - cached[0] < STATE_TTL:
+            return cached[1]
+    current = _scan_state()
+    with _lock:
+        _state["current"] = (time.monotonic(), current)
+    return current
+
+
+def _scan_state():
+    if MBTILES:
+        try:
+            stat = os.stat(MBTILES)
+        except OSError:
+            return ("mbtiles", MBTILES, FETCH_MISSING, None)
+        return ("mbtiles", MBTILES, FETCH_MISSING, stat.st_size, stat.st_mtime_ns)
+
+    # Writing a tile replaces an entry of its z/x directory, which updates that directory's mtime
+    columns = []
+    if TILE_DIR.is_dir():
+        for zoom_dir in os.scandir(TILE_DIR):
+            if zoom_dir.is_dir():
+                columns.extend((zoom_dir.name, x_dir.name, x_dir.stat().st_mtime_ns) for x_dir in os.scandir(zoom_dir))
+    return ("dir", str(TILE_DIR), FETCH_MISSING, hashlib.sha256(repr(sorted(columns)).encode()).hexdigest())
+
+
+# ============= Basemap compositing ============= #
+def _tile_image(z, x, y):
+    data = read_tile(z, x, y)
+    if data is None and FETCH_MISSING:
+        try:
+            with tracing.span("tiles:fetch", tile=f"{z}/{x}/{y}"):
+                data = fetch_tile(z, x, y)
+            write_tile(z, x, y, data)
+        except OSError:
+            data = None
+    if data is None:
+        return None
+    image = Image.open(io.BytesIO(data)).convert("RGB")
+    if image.size != (TILE_SIZE, TILE_SIZE):
+        image = image.resize((TILE_SIZE, TILE_SIZE), Image.LANCZOS)
+    return np.asarray(image)
+
+
+def composite(zoom, x0, x1, y0, y1):
+    """Stitched RGB raster of tiles x0..x1, y0..y1 and its EPSG:3857 extent."""
+    key = (state(), zoom, x0, x1, y0, y1)
+    with _lock:
+        if key in _composites:
+            _composites.move_to_end(key)
+            return _composites[key]
+
+    with tracing.span("tiles:composite", zoom=zoom):
+        image = np.empty(((y1 - y0 + 1) * TILE_SIZE, (x1 - x0 + 1) * TILE_SIZE, 3), dtype=np.uint8)
+        image[:] = BLANK_COLOR
+        for x in range(x0, x1 + 1):
+            for y in range(y0, y1 + 1):
+                tile = _tile_image(zoom, x, y)
+                if tile is not None:
+                    row, col = (y - y0) * TILE_SIZE, (x - x0) * TILE_SIZE
+                    image[row:row + TILE_SIZE, col:col + TILE_SIZE] = tile
+
+    left, _, _, top = tile_bounds(x0, y0, zoom)
+    _, bottom, right, _ = tile_bounds(x1, y1, zoom)
+    result = (image, (left, right, bottom, top))
+
+    with _lock:
+        _composites[key] = result
+        while len(_composites) > MAX_COMPOSITES:
+            _composites.popitem(last=False)
+    return result
+
+
+def _tile_count(west, south, east, north, zoom):
+    x0, x1, y0, y1 = tile_range(west, south, east, north, zoom)
+    return (x1 - x0 + 1) * (y1 - y0 + 1)
+
+
+def stored_zoom(zoom, zooms, bounds):
+    """Stored zoom to draw ``bounds`` at instead of ``zoom``, None when none fits.
+
+    The nearest lower one (fewer, larger tiles), else the lowest higher one if
+    it needs at most ``MAX_TILES`` tiles.
+    """
+    lower = [stored for stored in zooms if stored <= zoom]
+    if lower:
+        return max(lower)
+    higher = min(zooms)
+    return higher if _tile_count(*bounds, higher) <= MAX_TILES else None
+
+
+def add_basemap(ax, zoom="auto", attribution=ATTRIBUTION, attribution_size=8):
+    """Draw the local basemap behind the data of an EPSG:3857 ``ax``."""
+    xmin, xmax = ax.get_xlim()
+    ymin, ymax = ax.get_ylim()
+    west, south = mercator_to_lonlat(xmin, ymin)
+    east, north = mercator_to_lonlat(xmax, ymax)
+    if zoom == "auto":
+        zoom = auto_zoom(west, south, east, north)
+        zooms = [] if FETCH_MISSING else stored_zooms()
+        if zooms:
+            # Only the seeded zooms have tiles: use one of them rather than a blank map
+            stored = stored_zoom(zoom, zooms, (west, south, east, north))
+            zoom = zoom if stored is None else stored
+    while zoom > 0 and _tile_count(west, south, east, north, zoom) > MAX_TILES:
+        zoom -= 1
+
+    image, extent = composite(zoom, *tile_range(west, south, east, north, zoom))
+    ax.imshow(image, extent=extent, interpolation="bilinear", zorder=0)
+    ax.axis((xmin, xmax, ymin, ymax))
+
+    if attribution:
+        ax.text(
+            0.005, 0.005, attribution, transform=ax.transAxes,
+            size=attribution_size, ha="left", va="bottom", wrap=True,
+        )
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Manage the offline basemap tile store.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    seed_parser = commands.add_parser("seed", help="download the Brazil tiles into the local store")
+    seed_parser.add_argument("--zoom", type=int, nargs="+", default=list(DEFAULT_ZOOMS), help="zoom levels")
+    seed_parser.add_argument("--mbtiles", default=None, help="write to this MBTiles file instead of a directory")
+    seed_parser.add_argument("--tile-dir", default=None, help=f"tile directory (default: {TILE_DIR})")
+    args = parser.parse_args(argv)
+
+    if args.command == "seed":
+        seed(zooms=args.zoom, mbtiles=args.mbtiles, tile_dir=args.tile_dir)
+
+
+if __name__ == "__main__":
+    main()
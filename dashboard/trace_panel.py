@@ -0,0 +1,27 @@
+"""Debug panel with the spans of the current run (shown with ``?trace=1`` or DASHBOARD_TRACE=1)."""
+import pandas as pd
+import streamlit as st
+
+COLUMNS = ["span", "wall_ms", "cpu_ms", "allocated_kb", "peak_kb"]
+
+
+def render(trace):
+    root = trace.spans[-1]
+    with st.expander("Performance trace", expanded=True):
+        metrics = st.columns(3)
+        metrics[0].metric("Wall time", f"{root['wall_ms']:.0f} ms")
+        metrics[1].metric("CPU time", f"{root['cpu_ms']:.0f} ms")
+        if "peak_kb" in root:
+            metrics[2].metric("Peak Python memory", f"{root['peak_kb'] / 1024:.1f} MB")
+
+        # Start order, indented by nesting depth
+        spans = pd.DataFrame(sorted(trace.spans, key=lambda record: record["start_ms"]))
+        spans["span"] = [" " * depth + name for depth, name in zip(spans["depth"], spans["name"])]
+        st.dataframe(
+            spans[[column for column in COLUMNS if column in spans]].round(1),
+            hide_index=True, use_container_width=True,
+        )
+
+        downloads = st.columns(2)
+        downloads[0].download_button("Download JSON lines", trace.to_jsonl(), "trace.jsonl", "application/jsonl")
+        downloads[1].download_button("Download Chrome trace", trace.to_chrome(), "trace.json", "application/json")
@@ -0,0 +1,237 @@
+"""Span timing and memory tracking for dashboard runs and pipeline stages.
+
+Code is instrumented with ``with tracing.span("name"):`` blocks. Spans are
+only recorded while a ``Trace`` is active in the current context (a Streamlit
+script run or a pipeline stage); otherwise ``span`` returns a shared no-op
+context manager, so instrumentation left in place costs a context-variable
+lookup.
+
+Every span records its wall time, the CPU time of its thread and, when
+memory tracking is on, the Python-heap bytes it allocated (net) and its peak
+above the start, measured with tracemalloc. tracemalloc is process-wide: it
+slows allocation-heavy code down while any trace with memory tracking is
+active, and peaks are approximate when several sessions are traced at once.
+
+Traces export as JSON lines (one span per line) or in the Chrome trace event
+format, which chrome://tracing and https://ui.perfetto.dev open.
+
+- ``DASHBOARD_TRACE=1`` traces every dashboard run; ``?trace=1`` in the URL
+  traces that session and shows the debug panel.
+- ``DASHBOARD_TRACE_MEMORY=0`` records time only.
+- ``DASHBOARD_TRACE_DIR`` appends every finished trace to
+  ``<dir>/traces.jsonl``.
+"""
+import contextlib
+import contextvars
+import json
+import os
+import threading
+import time
+import tracemalloc
+from pathlib import Path
+
+ENABLED = os.environ.get("DASHBOARD_TRACE") == "1"
+MEMORY = os.environ.get("DASHBOARD_TRACE_MEMORY", "1") == "1"
+TRACE_DIR = os.environ.get("DASHBOARD_TRACE_DIR")
+
+QUERY_PARAM = "trace"
+
+_current = contextvars.ContextVar("dashboard_trace", default=None)
+_null = contextlib.nullcontext()
+
+# Number of active traces tracking memory; tracemalloc runs while it is > 0
+_memory_users = 0
+_memory_started = False
+_memory_lock = threading.Lock()
+_write_lock = threading.Lock()
+# tracemalloc.reset_peak() is Python 3.9+. Before that the peak cannot be
+# reset, so the peak at the last "reset" is kept as a floor: a later peak above
+# it was reached since then, otherwise the current size is the best estimate.
+_HAS_RESET_PEAK = hasattr(tracemalloc, "reset_peak")
+_peak_floor = 0
+
+
+def _start_memory():
+    global _memory_users, _memory_started, _peak_floor
+    with _memory_lock:
+        if _memory_users == 0 and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            _peak_floor = 0
+            _memory_started = True
+        _memory_users += 1
+
+
+def _stop_memory():
+    global _memory_users, _memory_started
+    with _memory_lock:
+        _memory_users -= 1
+        # Leave tracemalloc alone if someone else started it
+        if _memory_users == 0 and _memory_started:
+            tracemalloc.stop()
+            _memory_started = False
+
+
+def _traced_memory():
+    """(current, peak since the last ``_reset_peak``) in bytes."""
+    current, peak = tracemalloc.get_traced_memory()
+    if _HAS_RESET_PEAK or peak > _peak_floor:
+        return current, peak
+    return current, current
+
+
+def _reset_peak():
+    global _peak_floor
+    if _HAS_RESET_PEAK:
+        tracemalloc.reset_peak()
+    else:
+        _peak_floor = tracemalloc.get_traced_memory()[1]
+
+
+class Trace:
+    """Spans of one run, in the order they finished."""
+
+    def __init__(self, name, memory=MEMORY, **attrs):
+        self.name = name
+        self.attrs = attrs
+        self.memory = memory
+        self.spans = []
+        self.pid = os.getpid()
+        self._origin = time.perf_counter_ns()
+        self._epoch_ms = time.time() * 1e3
+        self._stack = []
+        self._token = None
+        self._root = None
+
+    def __enter__(self):
+        if self.memory:
+            _start_memory()
+        self._token = _current.set(self)
+        self._root = _Span(self, self.name, self.attrs)
+        self._root.__enter__()
+        return self
+
+    def __exit__(self, *exc):
+        self._root.__exit__(*exc)
+        _current.reset(self._token)
+        if self.memory:
+            _stop_memory()
+        if TRACE_DIR:
+            self.write_jsonl(Path(TRACE_DIR) / "traces.jsonl")
+        return False
+
+    def to_jsonl(self):
+        return "".join(json.dumps(span) + "\n" for span in self.spans)
+
+    def write_jsonl(self, path):
+        """Append the spans to ``path``."""
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with _write_lock, open(path, "a") as f:
+            f.write(self.to_jsonl())
+
+    def to_chrome(self):
+        """Chrome trace event JSON ("X" complete events, microseconds)."""
+        return json.dumps({"traceEvents": chrome_events(self.spans), "displayTimeUnit": "ms"})
+
+
+class _Span:
+    __slots__ = ("trace", "name", "attrs", "depth", "start_ns", "cpu", "base", "peak")
+
+    def __init__(self, trace, name, attrs):
+        self.trace = trace
+        self.name = name
+        self.attrs = attrs
+
+    def __enter__(self):
+        trace = self.trace
+        self.depth = len(trace._stack)
+        if trace.memory:
+            current, peak = _traced_memory()
+            if trace._stack:
+                # The parent's peak so far, before the peak is reset for this span
+                parent = trace._stack[-1]
+                parent.peak = max(parent.peak, peak - parent.base)
+            _reset_peak()
+            self.base, self.peak = current, 0
+        trace._stack.append(self)
+        self.cpu = time.thread_time()
+        self.start_ns = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, *exc):
+        end_ns = time.perf_counter_ns()
+        cpu = time.thread_time() - self.cpu
+        trace = self.trace
+        trace._stack.pop()
+        record = {
+            "trace": trace.name,
+            "name": self.name,
+            "depth": self.depth,
+            "pid": trace.pid,
+            "tid": threading.get_ident(),
+            "start_ms": (self.start_ns - trace._origin) / 1e6,
+            # Unix time, to line up traces of several processes
+            "time_ms": trace._epoch_ms + (self.start_ns - trace._origin) / 1e6,
+            "wall_ms": (end_ns - self.start_ns) / 1e6,
+            "cpu_ms": cpu * 1e3,
+        }
+        if trace.memory:
+            current, peak = _traced_memory()
+            span_peak = max(self.peak, peak - self.base)
+            record["allocated_kb"] = (current - self.base) / 1024
+            record["peak_kb"] = span_peak / 1024
+            if trace._stack:
+                parent = trace._stack[-1]
+                parent.peak = max(parent.peak, span_peak + self.base - parent.base)
+            _reset_peak()
+        if self.attrs:
+            record["attrs"] = self.attrs
+        if exc[0] is not None:
+            record["error"] = exc[0].__name__
+        trace.spans.append(record)
+        return False
+
+
+def current():
+    """The trace active in this context, or None."""
+    return _current.get()
+
+
+def span(name, **attrs):
+    """Context manager timing the enclosed block as ``name`` in the active trace."""
+    trace = _current.get()
+    if trace is None:
+        return _null
+    return _Span(trace, name, attrs)
+
+
+def requested(query_params=None):
+    """Whether the run should be traced: DASHBOARD_TRACE=1 or ``?trace=1``."""
+    return ENABLED or (query_params is not None and query_params.get(QUERY_PARAM) == "1")
+
+
+def chrome_events(spans):
+    return [{
+        "name": record["name"],
+        "cat": record["trace"],
+        "ph": "X",
+        "ts": record["time_ms"] * 1e3,
+        "dur": record["wall_ms"] * 1e3,
+        "pid": record["pid"],
+        "tid": record["tid"],
+        "args": {key: value for key, value in record.items()
+                 if key in ("cpu_ms", "allocated_kb", "peak_kb", "attrs", "error")},
+    } for record in spans]
+
+
+def write(spans, path):
+    """Write ``spans`` to ``path``: Chrome trace format for .json, JSON lines otherwise."""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(path.name + ".tmp")
+    with open(tmp, "w") as f:
+        if path.suffix == ".json":
+            json.dump({"traceEvents": chrome_events(spans), "displayTimeUnit": "ms"}, f)
+        else:
+            f.writelines(json.dumps(record) + "\n" for record in spans)
+    os.replace(tmp, path)
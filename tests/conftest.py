@@ -0,0 +1,47 @@
+import sys
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT / "dashboard"))
+sys.path.insert(0, str(ROOT / "benchmarks"))
+
+import synthetic  # noqa: E402
+import data_loader  # noqa: E402
+from pipeline.build import build  # noqa: E402
+from pipeline.raw import RAW_TABLES, read_raw  # noqa: E402
+
+
+def quiet(message):
+    pass
+
+
+@pytest.fixture(scope="session")
+def raw_dir(tmp_path_factory):
+    """A small synthetic raw dataset (about 2k orders)."""
+    directory = tmp_path_factory.mktemp("raw")
+    synthetic.generate(directory, scale=0.02, seed=0)
+    return directory
+
+
+@pytest.fixture(scope="session")
+def raw_tables(raw_dir):
+    return {name: read_raw(name, raw_dir) for name in RAW_TABLES}
+
+
+@pytest.fixture(scope="session")
+def built(raw_dir, tmp_path_factory):
+    """Output directory of a full sequential build of ``raw_dir``; tests must not modify it."""
+    out_dir = tmp_path_factory.mktemp("out")
+    build(raw_dir=raw_dir, out_dir=out_dir, jobs=1, log=quiet)
+    return out_dir
+
+
+@pytest.fixture
+def data_dir(built, monkeypatch):
+    """The dashboard reading its datasets from ``built``."""
+    monkeypatch.setattr(data_loader, "DATA_DIR", built)
+    data_loader.clear_cache()
+    yield built
+    data_loader.clear_cache()
@@ -0,0 +1,51 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import cube
+
+
+@pytest.fixture
+def sales(data_dir, raw_tables):
+    """One row per order item with its order's month and customer state, from the raw tables."""
+    cube._cube.clear()
+    cube._results.clear()
+    orders = raw_tables["orders"].merge(raw_tables["customers"], on="customer_id", how="left")
+    orders["month"] = pd.to_datetime(orders["order_purchase_timestamp"]).dt.strftime("%Y-%m")
+    yield raw_tables["order_items"].merge(orders, on="order_id")
+    cube._cube.clear()
+    cube._results.clear()
+
+
+def test_totals_match_raw_tables(sales):
+    total = cube.query()
+    assert total["items"] == len(sales)
+    assert total["orders"] == pytest.approx(sales["order_id"].nunique())
+
+
+def test_grouped_query_matches_raw_tables(sales):
+    by_state = cube.query(by="customer_state")
+    expected = sales.groupby("customer_state")["order_id"].agg(["size", "nunique"])
+    np.testing.assert_array_equal(by_state.loc[expected.index, "items"], expected["size"])
+    np.testing.assert_allclose(by_state.loc[expected.index, "orders"], expected["nunique"])
+
+
+def test_filtered_query_matches_raw_tables(sales):
+    months = sorted(sales["month"].unique())
+    first, last = months[1], months[-2]
+    state = sales["customer_state"].mode()[0]
+    result = cube.query({"month": (first, last), "customer_state": [state]})
+    expected = sales[sales["month"].between(first, last) & (sales["customer_state"] == state)]
+    assert result["items"] == len(expected)
+    assert result["orders"] == pytest.approx(expected["order_id"].nunique())
+    # Empty selections do not filter
+    assert cube.query({"customer_state": [], "seller_state": None}) is cube.query()
+
+
+@pytest.mark.parametrize("by", cube.DIMENSIONS)
+def test_groups_add_up_to_total(sales, by):
+    total = cube.query()
+    grouped = cube.query(by=by)
+    for measure in cube.MEASURES:
+        assert grouped[measure].sum() == pytest.approx(total[measure])
+    assert list(grouped.index) == cube.options(by)
@@ -0,0 +1,47 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import data_loader
+
+
+def test_pack_ids_round_trip():
+    ids = pd.Series([f"{value:032x}" for value in np.random.default_rng(0).integers(0, 2 ** 62, 100)])
+    packed = data_loader.pack_ids(ids)
+    if packed is None:
+        pytest.skip("pyarrow is not installed")
+    assert packed.nbytes < ids.str.len().sum()
+    assert list(data_loader.unpack_ids(pd.Series(packed))) == list(ids)
+
+
+@pytest.mark.parametrize("values", [["0" * 32, None], ["0" * 31], ["z" * 32]])
+def test_pack_ids_keeps_other_values(values):
+    assert data_loader.pack_ids(values) is None
+
+
+@pytest.mark.parametrize("name", ["score_per_product", "geolocation_df", "sales_cube"])
+def test_load_matches_csv(data_dir, name):
+    spec = data_loader.DATASETS[name]
+    frame = data_loader.load(name)
+    assert data_loader.load(name) is frame
+    assert list(frame.columns) == list(spec["dtypes"])
+
+    expected = data_loader._read_csv(data_loader.csv_path(name), spec)
+    for column, values in frame.items():
+        values = data_loader.unpack_ids(values)
+        if isinstance(values.dtype, pd.CategoricalDtype):
+            values = values.astype(object)
+        if pd.api.types.is_numeric_dtype(values.dtype):
+            np.testing.assert_allclose(values.to_numpy(dtype="float64"), expected[column].to_numpy(dtype="float64"),
+                                       rtol=1e-6)
+        else:
+            assert list(values) == list(expected[column])
+
+
+def test_load_reads_replaced_csv(data_dir, tmp_path, monkeypatch):
+    monkeypatch.setattr(data_loader, "DATA_DIR", tmp_path)
+    path = data_loader.csv_path("order_per_city")
+    path.write_text("customer_city,order_id\nsao paulo,3\n")
+    assert data_loader.load("order_per_city")["order_id"].tolist() == [3]
+    path.write_text("customer_city,order_id\nsao paulo,3\nrio de janeiro,2\n")
+    assert data_loader.load("order_per_city")["order_id"].tolist() == [3, 2]
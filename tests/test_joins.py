@@ -0,0 +1,65 @@
+import numpy as np
+import pandas as pd
+import pandas.testing as tm
+
+from pipeline.joins import item_details, review_scores_by
+from pipeline.zip_index import ZipIndex
+
+
+def test_review_scores_match_fanned_out_merge(raw_tables):
+    orders, reviews, items = raw_tables["orders"], raw_tables["order_reviews"], raw_tables["order_items"]
+    # The notebook's chain: an order with r reviews and k items becomes r * k rows
+    fanned = orders.merge(reviews, on="order_id", how="left").merge(items, on="order_id")
+
+    for key in ("product_id", "seller_id"):
+        expected = fanned.groupby(key)["review_score"].agg(["max", "min", "mean"])
+        result = review_scores_by(item_details(items, reviews, orders=orders), key).set_index((key, ""))
+        result.index.name = key
+        tm.assert_series_equal(result[("review_score", "max")], expected["max"], check_names=False)
+        tm.assert_series_equal(result[("review_score", "min")], expected["min"], check_names=False)
+        tm.assert_series_equal(result[("review_score", "mean")], expected["mean"], check_names=False)
+        # One row per order item, not per item and review
+        known_items = items[items["order_id"].isin(orders["order_id"])]
+        tm.assert_series_equal(result[("order_id", "count")], known_items.groupby(key).size(),
+                               check_names=False, check_dtype=False)
+
+
+def test_item_details_has_one_row_per_item(raw_tables):
+    items, reviews = raw_tables["order_items"], raw_tables["order_reviews"]
+    details = item_details(items, reviews)
+    assert len(details) == len(items)
+    review_counts = reviews.groupby("order_id").size()
+    np.testing.assert_array_equal(
+        details["review_count"], items["order_id"].map(review_counts).fillna(0).astype("int64"),
+    )
+
+
+def test_zip_index_matches_per_prefix_median(raw_tables):
+    geolocation = raw_tables["geolocation"]
+    index = ZipIndex.from_geolocation(geolocation)
+    centroids = geolocation[["geolocation_zip_code_prefix", "geolocation_lat", "geolocation_lng"]]\
+        .drop_duplicates().groupby("geolocation_zip_code_prefix").median()
+
+    prefixes = np.concatenate([centroids.index.to_numpy(), [-1, 10 ** 9]])
+    lat, lng = index.lookup(prefixes)
+    np.testing.assert_array_equal(lat[:-2], centroids["geolocation_lat"].to_numpy())
+    np.testing.assert_array_equal(lng[:-2], centroids["geolocation_lng"].to_numpy())
+    # Unknown prefixes are not geocoded
+    assert np.isnan(lat[-2:]).all() and np.isnan(lng[-2:]).all()
+
+    # The index survives its round trip through geolocation_df.csv
+    restored = ZipIndex.from_frame(index.to_frame().sample(frac=1, random_state=0))
+    np.testing.assert_array_equal(restored.lookup(prefixes)[0], lat)
+
+
+def test_zip_index_counts_match_merge(raw_tables):
+    customers, geolocation = raw_tables["customers"], raw_tables["geolocation"]
+    index = ZipIndex.from_geolocation(geolocation)
+    counts = index.counts(customers["customer_zip_code_prefix"], "customer_count")
+
+    known = customers["customer_zip_code_prefix"][index.positions(customers["customer_zip_code_prefix"]) >= 0]
+    expected = known.value_counts()
+    result = counts.set_index("geolocation_zip_code_prefix")["customer_count"]
+    tm.assert_series_equal(result.sort_index(), expected.sort_index(), check_names=False, check_dtype=False)
+    assert counts["customer_count"].is_monotonic_decreasing
+    assert isinstance(counts, pd.DataFrame)
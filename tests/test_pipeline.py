@@ -0,0 +1,92 @@
+import numpy as np
+import pandas.testing as tm
+
+from pipeline import incremental, streaming
+from pipeline.build import load_manifest
+from pipeline.raw import raw_path
+from pipeline.stages import build_order_details, build_score_per_product, build_score_per_store
+
+from conftest import quiet
+
+
+def _by_key(frame):
+    """Rows sorted by the key (first) column, to compare tables built in a different order."""
+    return frame.sort_values(frame.columns[0], kind="stable").reset_index(drop=True)
+
+
+def test_streaming_matches_in_memory(raw_dir, raw_tables):
+    details = build_order_details(raw_tables)
+    expected = {**build_score_per_product(details), **build_score_per_store(details)}
+
+    paths = {name: raw_path(name, raw_dir) for name in streaming.COLUMNS}
+    # Small chunks and several partitions, so orders are split across both
+    result = streaming.build_scores(paths, jobs=2, chunk_rows=500, partitions=3)
+
+    for output in ("score_per_product", "score_per_store"):
+        tm.assert_frame_equal(_by_key(result[output]), _by_key(expected[output]), check_dtype=False)
+
+
+def _write_batch(directory, tables):
+    directory.mkdir()
+    for name, frame in tables.items():
+        frame.to_csv(raw_path(name, directory), index=False)
+    return directory
+
+
+def _batches(raw_tables, count=3):
+    """The raw tables split into ``count`` batches by order, with rows arriving out of order.
+
+    Items come one batch before their order, reviews and customers one batch
+    after it, and products in the last batch.
+    """
+    orders = raw_tables["orders"]
+    part = dict(zip(orders["order_id"], np.arange(len(orders)) * count // len(orders)))
+    customer_part = dict(zip(orders["customer_id"], (np.arange(len(orders)) * count // len(orders) + 1) % count))
+    batches = [{} for _ in range(count)]
+    for name, rows, shift in (
+        ("orders", orders, 0),
+        ("order_items", raw_tables["order_items"], -1),
+        ("order_reviews", raw_tables["order_reviews"], 1),
+    ):
+        index = (rows["order_id"].map(part).fillna(0).astype(int) + shift) % count
+        for batch in range(count):
+            batches[batch][name] = rows[index.to_numpy() == batch]
+    customers = raw_tables["customers"]
+    index = customers["customer_id"].map(customer_part).fillna(0).astype(int)
+    for batch in range(count):
+        batches[batch]["customers"] = customers[index.to_numpy() == batch]
+    batches[-1]["products"] = raw_tables["products"]
+    return batches
+
+
+def _artifacts(state):
+    connection = incremental.connect(state)
+    try:
+        return incremental.artifacts(connection)
+    finally:
+        connection.close()
+
+
+def test_incremental_batches_match_init(raw_dir, raw_tables, tmp_path):
+    init_state = tmp_path / "init.sqlite"
+    incremental.refresh(raw_dir, tmp_path / "init", init_state, log=quiet)
+
+    batches_state = tmp_path / "batches.sqlite"
+    for number, tables in enumerate(_batches(raw_tables)):
+        batch_dir = _write_batch(tmp_path / f"batch{number}", tables)
+        incremental.refresh(batch_dir, tmp_path / "batches", batches_state, log=quiet)
+    # A batch applied twice changes nothing
+    incremental.refresh(tmp_path / "batch0", tmp_path / "batches", batches_state, log=quiet)
+
+    expected, result = _artifacts(init_state), _artifacts(batches_state)
+    assert set(result) == set(expected)
+    for output in expected:
+        tm.assert_frame_equal(_by_key(result[output]), _by_key(expected[output]), check_dtype=False)
+
+
+def test_incremental_records_output_fingerprints(raw_dir, tmp_path):
+    incremental.refresh(raw_dir, tmp_path, log=quiet)
+    manifest = load_manifest(tmp_path)
+    assert set(manifest["outputs"]) == set(_artifacts(incremental.state_path(tmp_path)))
+    assert all((tmp_path / f"{output}.csv").exists() for output in manifest["outputs"])
+
@@ -0,0 +1,41 @@
+import shutil
+
+import pytest
+
+from pipeline import profile
+from pipeline.raw import RAW_TABLES, raw_path
+
+
+def test_profile_matches_pandas(raw_dir, raw_tables):
+    # Small chunks, so every statistic is combined across chunks
+    report = profile.profile_table("orders", raw_dir, chunk_rows=300)
+    orders = raw_tables["orders"]
+    assert report["rows"] == len(orders)
+    assert report["duplicate_rows"] == orders.duplicated().sum()
+    for column, values in orders.items():
+        stats = report["columns"][column]
+        assert stats["nulls"] == values.isna().sum()
+        assert stats["distinct"] == pytest.approx(values.nunique(), rel=3 * 0.016)
+
+    items = profile.profile_table("order_items", raw_dir, chunk_rows=300)["columns"]["price"]
+    prices = raw_tables["order_items"]["price"]
+    assert items["dtype"] == "float64"
+    assert (items["min"], items["max"]) == (prices.min(), prices.max())
+    assert items["mean"] == pytest.approx(prices.mean())
+
+
+def test_synthetic_data_passes_checks(raw_dir):
+    report = profile.profile(raw_dir=raw_dir)
+    assert set(report) == set(RAW_TABLES)
+    assert profile.check(report) == []
+
+
+def test_check_reports_duplicate_rows(raw_dir, tmp_path):
+    shutil.copytree(raw_dir, tmp_path, dirs_exist_ok=True)
+    sellers = raw_path("sellers", tmp_path)
+    lines = sellers.read_text().splitlines(keepends=True)
+    sellers.write_text("".join(lines + lines[-1:]))
+
+    report = profile.profile(["sellers"], raw_dir=tmp_path)
+    assert report["sellers"]["duplicate_rows"] == 1
+    assert any("duplicate rows" in failure for failure in profile.check(report))
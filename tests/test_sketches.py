@@ -0,0 +1,86 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import sketches
+import star_buckets
+from sketches import HyperLogLog, KLLSketch
+
+# Stated error bounds (sketches.py): about 1% rank error for the quantile
+# sketch, 1.6% standard error for HyperLogLog. Tests allow twice the former and
+# three standard errors for the latter; the data and sketch seeds are fixed.
+RANK_ERROR = 0.02
+DISTINCT_ERROR = 3 * 0.016
+
+QUANTILES = np.linspace(0.01, 0.99, 99)
+
+
+def _rank_error(sketch, data):
+    ranks = np.searchsorted(np.sort(data), sketch.quantile(QUANTILES), side="right") / len(data)
+    return np.abs(ranks - QUANTILES).max()
+
+
+def _ids(rng, n):
+    return np.array([f"{value:032x}" for value in rng.integers(0, 2 ** 62, n)])
+
+
+def test_kll_quantiles_within_rank_error():
+    data = np.random.default_rng(0).uniform(1, 5, 200_000)
+    sketch = KLLSketch().update(data)
+    assert _rank_error(sketch, data) <= RANK_ERROR
+    assert sketch.quantile(0) == data.min() and sketch.quantile(1) == data.max()
+    # Fixed size whatever the number of values
+    assert sum(len(items) for items in sketch.levels) < 3 * sketch.k
+
+
+def test_kll_merged_partitions_within_rank_error():
+    data = np.random.default_rng(1).normal(4, 1, 200_000)
+    parts = [KLLSketch(seed=seed).update(chunk) for seed, chunk in enumerate(np.array_split(data, 7))]
+    merged = parts[0]
+    for part in parts[1:]:
+        merged.merge(part)
+    assert merged.count == len(data)
+    assert _rank_error(merged, data) <= RANK_ERROR
+
+
+def test_kll_state_round_trip():
+    sketch = KLLSketch().update(np.random.default_rng(2).uniform(size=10_000))
+    restored = KLLSketch.from_state(sketch.state())
+    np.testing.assert_array_equal(restored.quantile(QUANTILES), sketch.quantile(QUANTILES))
+
+
+@pytest.mark.parametrize("n", [100, 5_000, 200_000])
+def test_hll_distinct_count_within_error(n):
+    ids = _ids(np.random.default_rng(n), n)
+    # Every id twice: duplicates do not count
+    estimate = HyperLogLog().update(np.concatenate([ids, ids])).estimate()
+    assert abs(estimate / len(set(ids)) - 1) <= DISTINCT_ERROR
+
+
+def test_hll_merge_is_union():
+    rng = np.random.default_rng(3)
+    first, second = _ids(rng, 30_000), _ids(rng, 30_000)
+    merged = HyperLogLog().update(first).merge(HyperLogLog().update(second))
+    union = HyperLogLog().update(np.concatenate([first, second]))
+    np.testing.assert_array_equal(merged.registers, union.registers)
+    restored = HyperLogLog.from_state(merged.state())
+    assert restored.estimate() == merged.estimate()
+
+
+def test_sketched_bucket_sales_match_exact():
+    rng = np.random.default_rng(4)
+    n = 50_000
+    frame = pd.DataFrame({
+        "product_id": _ids(rng, n),
+        "order_id": rng.integers(1, 5, n),
+        # Some scores outside every band or missing
+        "review_score_mean": np.where(rng.random(n) < 0.05, np.nan, rng.uniform(0.5, 5.2, n)),
+    })
+    read = sketches.read(sketches.sketch_rows({"score_per_product": (frame, "product_id")}, {}))
+
+    for bins_name, bins in sketches.BINS.items():
+        exact = star_buckets.bucket_sales(frame, bins, "product_id")
+        sketched = sketches.bucket_sales("score_per_product", bins_name, read)
+        assert list(sketched.index) == list(exact.index)
+        np.testing.assert_array_equal(sketched["total_sales"], exact["total_sales"])
+        np.testing.assert_allclose(sketched["entities"], exact["entities"], rtol=DISTINCT_ERROR)